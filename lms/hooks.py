@@ -102,6 +102,23 @@ doc_events = {
 		]
 	},
 	"Discussion Reply": {"after_insert": "lms.lms.utils.handle_notifications"},
+	"LMS Course": {"on_update": "lms.lms.utils.invalidate_course_structure"},
+	"Course Chapter": {
+		"on_update": "lms.lms.utils.invalidate_course_structure",
+		"after_delete": "lms.lms.utils.invalidate_course_structure",
+	},
+	"Course Lesson": {
+		"on_update": "lms.lms.utils.invalidate_course_structure",
+		"after_delete": "lms.lms.utils.invalidate_course_structure",
+	},
+	"Chapter Reference": {
+		"on_update": "lms.lms.utils.invalidate_course_structure",
+		"after_delete": "lms.lms.utils.invalidate_course_structure",
+	},
+	"Lesson Reference": {
+		"on_update": "lms.lms.utils.invalidate_course_structure",
+		"after_delete": "lms.lms.utils.invalidate_course_structure",
+	},
 	"Notification Log": {"on_change": "lms.lms.utils.publish_notifications"},
 	"User": {
 		"validate": "lms.lms.user.validate_username_duplicates",
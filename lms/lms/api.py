@@ -28,7 +28,14 @@ from frappe.utils import (
 from frappe.utils.response import Response
 
 from lms.lms.doctype.course_lesson.course_lesson import save_progress
-from lms.lms.utils import get_average_rating, get_lesson_count
+from lms.lms.utils import (
+	clear_completed_lessons_cache,
+	clear_course_structure_cache,
+	get_course_ratings,
+	get_enrollment_counts,
+	get_lesson_counts,
+	update_lesson_count,
+)
 
 
 @frappe.whitelist()
@@ -570,6 +577,7 @@ def delete_lesson(lesson, chapter):
 
 	# Delete progress
 	frappe.db.delete("LMS Course Progress", {"lesson": lesson})
+	clear_completed_lessons_cache(chapter.course)
 
 	# Delete Lesson
 	frappe.db.delete("Course Lesson", lesson)
@@ -632,6 +640,7 @@ def update_index(lessons, chapter):
 		frappe.db.set_value(
 			"Lesson Reference", {"lesson": row, "parent": chapter}, "idx", lessons.index(row) + 1
 		)
+	clear_course_structure_cache(frappe.db.get_value("Course Chapter", chapter, "course"))
 
 
 @frappe.whitelist()
@@ -651,6 +660,7 @@ def update_chapter_index(chapter, course, idx):
 
 	for i, chapter_name in enumerate(chapters):
 		frappe.db.set_value("Chapter Reference", {"chapter": chapter_name, "parent": course}, "idx", i + 1)
+	clear_course_structure_cache(course)
 
 
 @frappe.whitelist(allow_guest=True)
@@ -892,21 +902,25 @@ def get_new_gateway_fields(doctype):
 
 
 def update_course_statistics():
-	courses = frappe.get_all("LMS Course", fields=["name"])
-
-	for course in courses:
-		lessons = get_lesson_count(course.name)
-
-		enrollments = frappe.db.count("LMS Enrollment", {"course": course.name, "member_type": "Student"})
-
-		avg_rating = get_average_rating(course.name) or 0
-		avg_rating = flt(avg_rating, frappe.get_system_settings("float_precision") or 3)
+	"""Recomputes the lesson, enrollment and rating counters of all courses.
+
+	These are kept current by doc events, this hourly job repairs any drift."""
+	lessons = get_lesson_counts()
+	enrollments = get_enrollment_counts()
+	ratings = get_course_ratings()
+
+	updates = {}
+	for course in frappe.get_all("LMS Course", fields=["name", "lessons", "enrollments", "rating"]):
+		statistics = {
+			"lessons": lessons.get(course.name, 0),
+			"enrollments": enrollments.get(course.name, 0),
+			"rating": ratings.get(course.name, 0),
+		}
+		if any(flt(course[field]) != flt(value) for field, value in statistics.items()):
+			updates[course.name] = statistics
 
-		frappe.db.set_value(
-			"LMS Course",
-			course.name,
-			{"lessons": lessons, "enrollments": enrollments, "rating": avg_rating},
-		)
+	if updates:
+		frappe.db.bulk_update("LMS Course", updates, update_modified=False)
 
 
 @frappe.whitelist()
@@ -970,6 +984,7 @@ def delete_course(course):
 		frappe.delete_doc("Course Chapter", chapter)
 
 	frappe.db.delete("LMS Course Progress", {"course": course})
+	clear_completed_lessons_cache(course)
 	frappe.db.delete("LMS Quiz", {"course": course})
 	frappe.db.delete("LMS Quiz Submission", {"course": course})
 	frappe.db.delete("LMS Enrollment", {"course": course})
@@ -1143,7 +1158,7 @@ def add_lesson(title, chapter, course, idx):
 @frappe.whitelist()
 def delete_chapter(chapter):
 	chapterInfo = frappe.db.get_value(
-		"Course Chapter", chapter, ["is_scorm_package", "scorm_package_path"], as_dict=True
+		"Course Chapter", chapter, ["is_scorm_package", "scorm_package_path", "course"], as_dict=True
 	)
 
 	if chapterInfo.is_scorm_package:
@@ -1153,6 +1168,8 @@ def delete_chapter(chapter):
 	frappe.db.delete("Lesson Reference", {"parent": chapter})
 	frappe.db.delete("Course Lesson", {"chapter": chapter})
 	frappe.db.delete("Course Chapter", chapter)
+	update_lesson_count(chapterInfo.course)
+	clear_course_structure_cache(chapterInfo.course)
 
 
 def delete_scorm_package(scorm_package_path):
@@ -0,0 +1,75 @@
+"""
+Query count and latency benchmarks for hot code paths.
+
+Run them against a site with course data, e.g.
+
+	bench --site <site> execute lms.lms.benchmarks.benchmark_save_progress --kwargs "{'course': '<course>', 'lesson': '<lesson>'}"
+
+Every benchmark rolls back its writes and returns its report, which bench execute prints.
+"""
+
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import frappe
+
+
+@contextmanager
+def measure():
+	"""Counts frappe.db.sql calls and wall time of the block."""
+	stats = frappe._dict(queries=0, ms=0)
+	with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+		start = time.perf_counter()
+		yield stats
+		stats.ms = (time.perf_counter() - start) * 1000
+	stats.queries = sql.call_count
+
+
+def per_call(stats, calls):
+	return {"queries": round(stats.queries / calls, 1), "ms": round(stats.ms / calls, 4)}
+
+
+def benchmark_save_progress(course, lesson, iterations=20):
+	"""save_progress for the session user, who must be enrolled in the course.
+
+	first_call completes the lesson, completed_lesson revisits it."""
+	from lms.lms.doctype.course_lesson.course_lesson import save_progress
+
+	try:
+		frappe.db.delete("LMS Course Progress", {"lesson": lesson, "member": frappe.session.user})
+
+		with measure() as first_call:
+			save_progress(lesson, course)
+
+		with measure() as completed_lesson:
+			for _ in range(iterations):
+				save_progress(lesson, course)
+	finally:
+		frappe.db.rollback()
+
+	report = {
+		"first_call": per_call(first_call, 1),
+		"completed_lesson": per_call(completed_lesson, iterations),
+	}
+	return report
+
+
+def benchmark_badge_overhead(doctype="ToDo", iterations=1000):
+	"""The badge hook runs on every document change, this measures it on a doctype without badges."""
+	from lms.lms.doctype.lms_badge.lms_badge import process_badges
+
+	doc = frappe.new_doc(doctype)
+	with measure() as first_change:
+		process_badges(doc, "on_change")
+
+	with measure() as later_changes:
+		for _ in range(iterations):
+			process_badges(doc, "on_change")
+
+	report = {
+		"doctype": doctype,
+		"first_change": per_call(first_change, 1),
+		"later_changes": per_call(later_changes, iterations),
+	}
+	return report
@@ -4,13 +4,13 @@
 import frappe
 from frappe.model.document import Document
 
-from lms.lms.utils import get_course_progress, get_lesson_count
+from lms.lms.utils import get_course_progress, update_lesson_count
 
 
 class CourseChapter(Document):
 	def on_update(self):
+		update_lesson_count(self.course)
 		self.recalculate_course_progress()
-		self.update_lesson_count()
 		frappe.enqueue(method=self.recalculate_course_progress, queue="short", timeout=300, is_async=True)
 
 	def recalculate_course_progress(self):
@@ -23,7 +23,3 @@ class CourseChapter(Document):
 			for enrollment in enrolled_members:
 				new_progress = get_course_progress(self.course, enrollment.member)
 				frappe.db.set_value("LMS Enrollment", enrollment.name, "progress", new_progress)
-
-	def update_lesson_count(self):
-		"""Update lesson count in the course"""
-		frappe.db.set_value("LMS Course", self.course, "lessons", get_lesson_count(self.course))
@@ -9,7 +9,7 @@ from frappe.model.document import Document
 from frappe.realtime import get_website_room
 from frappe.utils.telemetry import capture
 
-from lms.lms.utils import get_course_progress
+from lms.lms.utils import clear_completed_lessons_cache, get_course_progress
 
 from ...md import find_macros
 
@@ -17,6 +17,16 @@ from ...md import find_macros
 class CourseLesson(Document):
 	def on_update(self):
 		self.validate_quiz_id()
+		self.update_lesson_dependencies()
+
+	def on_trash(self):
+		frappe.cache().hdel("lms_lesson_dependencies", self.name)
+
+	def update_lesson_dependencies(self):
+		"""Stores the quizzes and assignments needed to complete this lesson, see get_lesson_dependencies"""
+		frappe.cache().hset(
+			"lms_lesson_dependencies", self.name, extract_lesson_dependencies(self.body, self.content)
+		)
 
 	def validate_quiz_id(self):
 		if self.quiz_id and not frappe.db.exists("LMS Quiz", self.quiz_id):
@@ -50,26 +60,46 @@ def save_progress(lesson, course, scorm_details=None):
 	"""
 	Note: Pass the argument scorm_details as a dict if it is SCORM related save_progress
 	"""
-	membership = frappe.db.exists("LMS Enrollment", {"course": course, "member": frappe.session.user})
-	if not membership:
+	enrollment = frappe.db.get_value(
+		"LMS Enrollment",
+		{"course": course, "member": frappe.session.user},
+		["name", "current_lesson", "progress"],
+		as_dict=True,
+	)
+	if not enrollment:
 		return 0
 
-	frappe.db.set_value("LMS Enrollment", membership, "current_lesson", lesson)
-	progress_already_exists = frappe.db.exists(
-		"LMS Course Progress", {"lesson": lesson, "member": frappe.session.user}
-	)
-	lesson_already_completed = frappe.db.exists(
+	lesson_progress = frappe.db.get_value(
 		"LMS Course Progress",
-		{"lesson": lesson, "member": frappe.session.user, "status": "Complete"},
+		{"lesson": lesson, "member": frappe.session.user},
+		["name", "status"],
+		as_dict=True,
 	)
 
-	quiz_completed = get_quiz_progress(lesson)
-	assignment_completed = get_assignment_progress(lesson)
+	# A completed lesson stays complete, so revisiting it skips the quiz and assignment checks
+	lesson_completed = lesson_progress and lesson_progress.status == "Complete"
 
-	if scorm_details:
+	if scorm_details and not lesson_completed:
 		scorm_details = frappe._dict(**scorm_details)
-
-	if not progress_already_exists and quiz_completed and assignment_completed and not scorm_details:
+		values = {
+			"status": "Complete" if scorm_details.is_complete else "Partially Complete",
+			"scorm_content": "" if scorm_details.is_complete else scorm_details.scorm_content,
+		}
+		if lesson_progress:
+			# Update Existing SCORM Progress
+			frappe.db.set_value("LMS Course Progress", lesson_progress.name, values)
+			clear_completed_lessons_cache(course)
+		else:
+			# Create new SCORM progress
+			frappe.get_doc(
+				{
+					"doctype": "LMS Course Progress",
+					"lesson": lesson,
+					"member": frappe.session.user,
+					**values,
+				}
+			).save(ignore_permissions=True)
+	elif not lesson_progress and is_lesson_complete(lesson):
 		frappe.get_doc(
 			{
 				"doctype": "LMS Course Progress",
@@ -78,38 +108,18 @@ def save_progress(lesson, course, scorm_details=None):
 				"member": frappe.session.user,
 			}
 		).save(ignore_permissions=True)
-	elif scorm_details and not lesson_already_completed and not progress_already_exists:
-		# Create new SCORM progress
-		frappe.get_doc(
-			{
-				"doctype": "LMS Course Progress",
-				"lesson": lesson,
-				"status": "Complete" if scorm_details.is_complete else "Partially Complete",
-				"member": frappe.session.user,
-				"scorm_content": "" if scorm_details.is_complete else scorm_details.scorm_content,
-			}
-		).save(ignore_permissions=True)
-	elif scorm_details and not lesson_already_completed and progress_already_exists:
-		# Update Existing SCORM Progress
-		frappe.db.set_value(
-			"LMS Course Progress",
-			progress_already_exists,
-			{
-				"lesson": lesson,
-				"status": "Complete" if scorm_details.is_complete else "Partially Complete",
-				"member": frappe.session.user,
-				"scorm_content": "" if scorm_details.is_complete else scorm_details.scorm_content,
-			},
-		)
 
 	progress = get_course_progress(course)
 	capture_progress_for_analytics(progress, course)
 
-	# Had to get doc, as on_change doesn't trigger when you use set_value. The trigger is necessary for badge to get assigned.
-	enrollment = frappe.get_doc("LMS Enrollment", membership)
-	enrollment.progress = progress
-	enrollment.save()
-	enrollment.run_method("on_change")
+	if progress != enrollment.progress:
+		# A full save runs the enrollment's hooks, badges, program progress and notifications depend on them
+		enrollment = frappe.get_doc("LMS Enrollment", enrollment.name)
+		enrollment.current_lesson = lesson
+		enrollment.progress = progress
+		enrollment.save(ignore_permissions=True)
+	elif enrollment.current_lesson != lesson:
+		frappe.db.set_value("LMS Enrollment", enrollment.name, "current_lesson", lesson)
 
 	frappe.publish_realtime(
 		event="update_lesson_progress",
@@ -126,12 +136,31 @@ def capture_progress_for_analytics(progress, course):
 		capture("course_progress", "lms", properties={"course": course, "progress": progress})
 
 
-def get_quiz_progress(lesson):
-	lesson_details = frappe.db.get_value("Course Lesson", lesson, ["body", "content"], as_dict=1)
-	quizzes = []
+def is_lesson_complete(lesson):
+	"""Checks if the session user has done every quiz and assignment of the lesson."""
+	dependencies = get_lesson_dependencies(lesson)
+	return get_quiz_progress(lesson, dependencies.quizzes) and get_assignment_progress(
+		lesson, dependencies.assignments
+	)
+
+
+def get_lesson_dependencies(lesson):
+	"""Returns the quizzes and assignments embedded in a lesson.
+
+	Extracted when the lesson is saved, lessons saved before that are parsed on first use."""
+
+	def extract():
+		lesson_details = frappe.db.get_value("Course Lesson", lesson, ["body", "content"], as_dict=1)
+		return extract_lesson_dependencies(lesson_details.body, lesson_details.content)
+
+	return frappe.cache().hget("lms_lesson_dependencies", lesson, generator=extract)
+
 
-	if lesson_details.content:
-		content = json.loads(lesson_details.content)
+def extract_lesson_dependencies(body, content):
+	quizzes, assignments = [], []
+
+	if content:
+		content = json.loads(content)
 
 		for block in content.get("blocks"):
 			if block.get("type") == "quiz":
@@ -141,47 +170,53 @@ def get_quiz_progress(lesson):
 				if quizzes_in_video and len(quizzes_in_video) > 0:
 					for row in quizzes_in_video:
 						quizzes.append(row.get("quiz"))
-
-	elif lesson_details.body:
-		macros = find_macros(lesson_details.body)
-		quizzes = [value for name, value in macros if name == "Quiz"]
-
-	for quiz in quizzes:
-		passing_percentage = frappe.db.get_value("LMS Quiz", quiz, "passing_percentage")
-		if not frappe.db.exists(
-			"LMS Quiz Submission",
-			{
-				"quiz": quiz,
-				"member": frappe.session.user,
-				"percentage": [">=", passing_percentage],
-			},
-		):
-			return False
-	return True
-
-
-def get_assignment_progress(lesson):
-	lesson_details = frappe.db.get_value("Course Lesson", lesson, ["body", "content"], as_dict=1)
-	assignments = []
-
-	if lesson_details.content:
-		content = json.loads(lesson_details.content)
-
-		for block in content.get("blocks"):
 			if block.get("type") == "assignment":
 				assignments.append(block.get("data").get("assignment"))
 
-	elif lesson_details.body:
-		macros = find_macros(lesson_details.body)
+	elif body:
+		macros = find_macros(body)
+		quizzes = [value for name, value in macros if name == "Quiz"]
 		assignments = [value for name, value in macros if name == "Assignment"]
 
-	for assignment in assignments:
-		if not frappe.db.exists(
-			"LMS Assignment Submission",
-			{"assignment": assignment, "member": frappe.session.user},
-		):
-			return False
-	return True
+	return frappe._dict(quizzes=quizzes, assignments=assignments)
+
+
+def get_quiz_progress(lesson, quizzes=None):
+	if quizzes is None:
+		quizzes = get_lesson_dependencies(lesson).quizzes
+	if not quizzes:
+		return True
+
+	Quiz = frappe.qb.DocType("LMS Quiz")
+	Submission = frappe.qb.DocType("LMS Quiz Submission")
+	passed = (
+		frappe.qb.from_(Submission)
+		.join(Quiz)
+		.on(Submission.quiz == Quiz.name)
+		.select(Submission.quiz)
+		.distinct()
+		.where(Submission.member == frappe.session.user)
+		.where(Submission.quiz.isin(quizzes))
+		.where(Submission.percentage >= Quiz.passing_percentage)
+	).run(pluck=True)
+
+	return set(quizzes) <= set(passed)
+
+
+def get_assignment_progress(lesson, assignments=None):
+	if assignments is None:
+		assignments = get_lesson_dependencies(lesson).assignments
+	if not assignments:
+		return True
+
+	submitted = frappe.get_all(
+		"LMS Assignment Submission",
+		{"assignment": ["in", assignments], "member": frappe.session.user},
+		pluck="assignment",
+		distinct=True,
+	)
+
+	return set(assignments) <= set(submitted)
 
 
 @frappe.whitelist()
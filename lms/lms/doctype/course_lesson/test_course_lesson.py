@@ -1,9 +1,103 @@
 # Copyright (c) 2021, FOSS United and Contributors
 # See license.txt
 
-# import frappe
+import json
 import unittest
+from unittest.mock import patch
+
+import frappe
+
+from lms.lms.api import add_lesson
+from lms.lms.doctype.lms_course.test_lms_course import new_course
+
+from .course_lesson import extract_lesson_dependencies, save_progress
 
 
 class TestCourseLesson(unittest.TestCase):
-	pass
+	def setUp(self):
+		self.course = new_course("Save Progress Course")
+		self.chapter = frappe.get_doc(
+			{"doctype": "Course Chapter", "title": "Save Progress Chapter", "course": self.course.name}
+		).insert()
+		frappe.get_doc(
+			{
+				"doctype": "Chapter Reference",
+				"chapter": self.chapter.name,
+				"parent": self.course.name,
+				"parenttype": "LMS Course",
+				"parentfield": "chapters",
+				"idx": 1,
+			}
+		).insert()
+		add_lesson("Save Progress Lesson", self.chapter.name, self.course.name, 1)
+		self.lesson = frappe.db.get_value("Course Lesson", {"chapter": self.chapter.name}, "name")
+		frappe.get_doc(
+			{"doctype": "LMS Enrollment", "course": self.course.name, "member": frappe.session.user}
+		).insert()
+
+	def tearDown(self):
+		frappe.db.delete("LMS Course Progress", {"course": self.course.name})
+		frappe.db.delete("LMS Enrollment", {"course": self.course.name})
+		frappe.db.delete("Lesson Reference", {"parent": self.chapter.name})
+		frappe.db.delete("Course Lesson", {"chapter": self.chapter.name})
+		frappe.db.delete("Chapter Reference", {"parent": self.course.name})
+		frappe.db.delete("Course Chapter", self.chapter.name)
+		frappe.db.delete("Course Instructor", {"parent": self.course.name})
+		frappe.db.delete("LMS Course", self.course.name)
+
+	def test_save_progress_completes_lesson(self):
+		self.assertEqual(save_progress(self.lesson, self.course.name), 100)
+		self.assertEqual(
+			frappe.db.get_value(
+				"LMS Enrollment",
+				{"course": self.course.name, "member": frappe.session.user},
+				["current_lesson", "progress"],
+			),
+			(self.lesson, 100),
+		)
+
+	def test_save_progress_on_completed_lesson_only_reads(self):
+		save_progress(self.lesson, self.course.name)
+
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			self.assertEqual(save_progress(self.lesson, self.course.name), 100)
+
+		self.assertLessEqual(sql.call_count, 4)
+
+	def test_save_progress_on_completed_lesson_follows_lesson_count(self):
+		save_progress(self.lesson, self.course.name)
+		frappe.db.set_value("LMS Course", self.course.name, "lessons", 2)
+
+		self.assertEqual(save_progress(self.lesson, self.course.name), 50)
+		self.assertEqual(
+			frappe.db.get_value(
+				"LMS Enrollment", {"course": self.course.name, "member": frappe.session.user}, "progress"
+			),
+			50,
+		)
+
+	def test_lesson_dependencies_include_quizzes_in_videos(self):
+		content = json.dumps(
+			{
+				"blocks": [
+					{"type": "paragraph", "data": {"text": "Intro"}},
+					{"type": "quiz", "data": {"quiz": "quiz-1"}},
+					{
+						"type": "upload",
+						"data": {"file_type": "mp4", "quizzes": [{"quiz": "quiz-2", "time": 30}]},
+					},
+					{"type": "assignment", "data": {"assignment": "assignment-1"}},
+				]
+			}
+		)
+		dependencies = extract_lesson_dependencies(None, content)
+
+		self.assertEqual(dependencies.quizzes, ["quiz-1", "quiz-2"])
+		self.assertEqual(dependencies.assignments, ["assignment-1"])
+
+	def test_lesson_dependencies_from_markdown(self):
+		body = "{{ Quiz('quiz-1') }}\n\n{{ Assignment('assignment-1') }}"
+		dependencies = extract_lesson_dependencies(body, None)
+
+		self.assertEqual(dependencies.quizzes, ["quiz-1"])
+		self.assertEqual(dependencies.assignments, ["assignment-1"])
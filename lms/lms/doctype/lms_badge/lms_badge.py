@@ -7,6 +7,11 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 
+# site -> (rules version, {reference doctype: [rules]}), shared by the requests a worker serves
+_badge_rules = {}
+
+ASSIGNMENT_BATCH_SIZE = 1000
+
 
 class LMSBadge(Document):
 	def on_update(self):
@@ -21,43 +26,131 @@ class LMSBadge(Document):
 			except Exception:
 				frappe.throw(_("Condition must be valid python code."))
 
-	def apply(self, doc):
-		if self.rule_condition_satisfied(doc):
-			award(self, doc.get(self.user_field))
+		clear_badge_rules()
+
+	def on_trash(self):
+		clear_badge_rules()
+
+
+def eval_condition(condition, values):
+	"""Evaluates a badge condition against the values of a document (a dict, never the Document)."""
+	return frappe.safe_eval(condition, None, {"doc": values})
+
 
-	def rule_condition_satisfied(self, doc):
-		doc_before_save = doc.get_doc_before_save()
+def get_badge_rules(doctype):
+	"""Returns the rules of the enabled badges awarded on changes to this doctype.
+
+	Rules are built once per worker and rebuilt when any badge changes. The version
+	check reads redis once per request, every later lookup is a dict get."""
+	rules = getattr(frappe.local, "lms_badge_rules", None)
+	if rules is None:
+		version = frappe.cache().get_value("lms_badge_rules_version", generator=frappe.generate_hash)
+		cached = _badge_rules.get(frappe.local.site)
+		if not cached or cached[0] != version:
+			cached = _badge_rules[frappe.local.site] = (version, build_badge_rules())
+		rules = frappe.local.lms_badge_rules = cached[1]
+
+	return rules.get(doctype, ())
+
+
+def build_badge_rules():
+	rules = {}
+	badges = frappe.get_all(
+		"LMS Badge",
+		# Auto Assign conditions are list filters, used by assign_badge
+		filters={"enabled": 1, "event": ["!=", "Auto Assign"], "condition": ["is", "set"]},
+		fields=["name", "reference_doctype", "event", "condition", "user_field"],
+	)
+	for badge in badges:
+		try:
+			compile(badge.condition, "<string>", "eval")
+		except Exception:
+			frappe.log_error(title=_("Invalid condition in badge {0}").format(badge.name))
+			continue
+		rules.setdefault(badge.reference_doctype, []).append(badge)
 
-		if self.event == "New" and doc_before_save is not None:
-			return False
+	return rules
 
-		if self.condition:
-			return eval_condition(doc, self.condition)
 
+def clear_badge_rules():
+	frappe.cache().set_value("lms_badge_rules_version", frappe.generate_hash())
+	frappe.local.lms_badge_rules = None
+
+
+def rule_condition_satisfied(rule, doc, values):
+	if rule.event == "New" and doc.get_doc_before_save() is not None:
 		return False
 
+	return eval_condition(rule.condition, values)
 
-def award(doc, member):
-	if doc.grant_only_once:
-		if frappe.db.exists(
-			"LMS Badge Assignment",
-			{"badge": doc.name, "member": member},
-		):
-			return
-
-	assignment = frappe.new_doc("LMS Badge Assignment")
-	assignment.update(
-		{
-			"badge": doc.name,
-			"member": member,
-			"issued_on": frappe.utils.now(),
-		}
+
+def queue_badge_award(badge, member):
+	"""Collects the awards of a request, they are assigned in one background job after commit."""
+	if not member:
+		return
+
+	if getattr(frappe.local, "lms_badge_awards", None) is None:
+		frappe.local.lms_badge_awards = set()
+		frappe.db.after_commit.add(enqueue_badge_awards)
+		frappe.db.after_rollback.add(discard_badge_awards)
+
+	frappe.local.lms_badge_awards.add((badge, member))
+
+
+def enqueue_badge_awards():
+	awards = frappe.local.lms_badge_awards
+	frappe.local.lms_badge_awards = None
+	if awards:
+		frappe.enqueue(
+			"lms.lms.doctype.lms_badge.lms_badge.award_badges",
+			queue="short",
+			awards=sorted(awards),
+		)
+
+
+def discard_badge_awards():
+	frappe.local.lms_badge_awards = None
+
+
+def award_badges(awards):
+	"""Assigns (badge, member) pairs, skipping duplicates and badges granted only once that are already held."""
+	awards = sorted({tuple(award) for award in awards})
+	if not awards:
+		return
+
+	grant_only_once = frappe.get_all(
+		"LMS Badge",
+		{"name": ["in", list({badge for badge, member in awards})], "grant_only_once": 1},
+		pluck="name",
 	)
-	assignment.save()
+	assigned = set()
+	if grant_only_once:
+		assigned = {
+			tuple(row)
+			for row in frappe.get_all(
+				"LMS Badge Assignment",
+				{
+					"badge": ["in", grant_only_once],
+					"member": ["in", list({member for badge, member in awards})],
+				},
+				["badge", "member"],
+				as_list=True,
+			)
+		}
 
+	for badge, member in awards:
+		if (badge, member) in assigned:
+			continue
 
-def eval_condition(doc, condition):
-	return condition and frappe.safe_eval(condition, None, {"doc": doc.as_dict()})
+		assignment = frappe.new_doc("LMS Badge Assignment")
+		assignment.update(
+			{
+				"badge": badge,
+				"member": member,
+				"issued_on": frappe.utils.now(),
+			}
+		)
+		assignment.save()
 
 
 @frappe.whitelist()
@@ -66,11 +159,90 @@ def assign_badge(badge):
 	if not badge.event == "Auto Assign":
 		return
 
-	fields = ["name"]
-	fields.append(badge.user_field)
-	list = frappe.get_all(badge.reference_doctype, filters=badge.condition, fields=fields)
-	for doc in list:
-		award(badge, doc.get(badge.user_field))
+	frappe.enqueue(
+		"lms.lms.doctype.lms_badge.lms_badge.assign_badge_to_eligible_members",
+		queue="long",
+		timeout=3600,
+		job_id=f"lms_assign_badge::{badge.name}",
+		deduplicate=True,
+		badge=badge.name,
+	)
+	return _("Badge assignment has been queued. Progress is shown on this form.")
+
+
+def assign_badge_to_eligible_members(badge):
+	"""Awards the badge to every member matching its condition who doesn't hold it yet."""
+	badge = frappe.db.get_value(
+		"LMS Badge",
+		badge,
+		["name", "reference_doctype", "condition", "user_field", "image", "description"],
+		as_dict=True,
+	)
+
+	eligible = frappe.get_all(
+		badge.reference_doctype, filters=badge.condition, pluck=badge.user_field, distinct=True
+	)
+	assigned = frappe.get_all("LMS Badge Assignment", {"badge": badge.name}, pluck="member")
+	members = sorted(set(eligible) - set(assigned) - {None, ""})
+
+	fields = [
+		"name",
+		"owner",
+		"modified_by",
+		"creation",
+		"modified",
+		"badge",
+		"badge_image",
+		"badge_description",
+		"member",
+		"member_name",
+		"member_username",
+		"member_image",
+		"issued_on",
+	]
+	issued_on = frappe.utils.today()
+
+	for start in range(0, len(members), ASSIGNMENT_BATCH_SIZE):
+		batch = members[start : start + ASSIGNMENT_BATCH_SIZE]
+		users = {
+			user.name: user
+			for user in frappe.get_all(
+				"User", {"name": ["in", batch]}, ["name", "full_name", "username", "user_image"]
+			)
+		}
+		now = frappe.utils.now()
+		values = [
+			(
+				frappe.generate_hash(length=10),
+				frappe.session.user,
+				frappe.session.user,
+				now,
+				now,
+				badge.name,
+				badge.image,
+				badge.description,
+				member,
+				users[member].full_name,
+				users[member].username,
+				users[member].user_image,
+				issued_on,
+			)
+			for member in batch
+			if member in users
+		]
+		frappe.db.bulk_insert("LMS Badge Assignment", fields, values)
+		frappe.db.commit()
+
+		done = min(start + ASSIGNMENT_BATCH_SIZE, len(members))
+		frappe.publish_progress(
+			done * 100 / len(members),
+			title=_("Assigning Badge"),
+			doctype="LMS Badge",
+			docname=badge.name,
+			description=_("{0} of {1} members").format(done, len(members)),
+		)
+
+	return len(members)
 
 
 def process_badges(doc, state):
@@ -83,7 +255,11 @@ def process_badges(doc, state):
 	):
 		return
 
-	for d in frappe.cache_manager.get_doctype_map(
-		"LMS Badge", doc.doctype, dict(reference_doctype=doc.doctype, enabled=1)
-	):
-		frappe.get_doc("LMS Badge", d.get("name")).apply(doc)
+	rules = get_badge_rules(doc.doctype)
+	if not rules:
+		return
+
+	values = doc.as_dict()
+	for rule in rules:
+		if rule_condition_satisfied(rule, doc, values):
+			queue_badge_award(rule.name, doc.get(rule.user_field))
@@ -1,9 +1,64 @@
 # Copyright (c) 2024, Frappe and Contributors
 # See license.txt
 
-# import frappe
+import json
+import unittest
+from unittest.mock import patch
+
+import frappe
 from frappe.tests import UnitTestCase
 
+from lms.lms.doctype.lms_course.test_lms_course import new_user
+
+from .lms_badge import assign_badge_to_eligible_members, eval_condition
+
 
 class TestLMSBadge(UnitTestCase):
-	pass
+	def test_condition_is_evaluated_against_values(self):
+		condition = "doc.progress == 100 and doc.member"
+
+		self.assertTrue(eval_condition(condition, frappe._dict(progress=100, member="a@example.com")))
+		self.assertFalse(eval_condition(condition, frappe._dict(progress=50, member="a@example.com")))
+		self.assertTrue(eval_condition('doc["progress"] == 100', frappe._dict(progress=100)))
+
+	def test_condition_cannot_reach_document_methods(self):
+		self.assertFalse(eval_condition("doc.save", frappe._dict(progress=100)))
+		with self.assertRaises(Exception):
+			eval_condition("doc.__class__", frappe._dict(progress=100))
+
+
+class TestAssignBadge(unittest.TestCase):
+	def setUp(self):
+		self.members = [new_user(f"Badge Member {i}", f"badge_member_{i}@example.com").name for i in range(3)]
+		self.badge = frappe.get_doc(
+			{
+				"doctype": "LMS Badge",
+				"title": "Bulk Assigned Badge",
+				"image": "/assets/lms/images/course-home.png",
+				"description": "Bulk Assigned Badge",
+				"reference_doctype": "User",
+				"event": "Auto Assign",
+				"condition": json.dumps({"name": ["in", self.members]}),
+				"user_field": "name",
+				"enabled": 1,
+			}
+		).insert()
+		frappe.get_doc(
+			{
+				"doctype": "LMS Badge Assignment",
+				"badge": self.badge.name,
+				"member": self.members[0],
+				"issued_on": frappe.utils.today(),
+			}
+		).insert()
+
+	def tearDown(self):
+		frappe.db.delete("LMS Badge Assignment", {"badge": self.badge.name})
+		frappe.db.delete("LMS Badge", self.badge.name)
+
+	def test_assign_badge_skips_existing_assignments(self):
+		with patch.object(frappe.db, "commit"):
+			self.assertEqual(assign_badge_to_eligible_members(self.badge.name), 2)
+
+		assigned = frappe.get_all("LMS Badge Assignment", {"badge": self.badge.name}, pluck="member")
+		self.assertCountEqual(assigned, self.members)
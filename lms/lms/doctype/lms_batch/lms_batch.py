@@ -14,6 +14,7 @@ from frappe.utils import add_days, cint, format_datetime, get_time, nowdate
 from lms.lms.utils import (
 	generate_slug,
 	get_assignment_details,
+	get_completed_lessons,
 	get_lesson_index,
 	get_lesson_url,
 	get_quiz_details,
@@ -263,20 +264,9 @@ def get_timetable_details(timetable):
 
 		if entry.reference_doctype == "Course Lesson":
 			course = frappe.db.get_value(entry.reference_doctype, entry.reference_docname, "course")
-			entry.url = get_lesson_url(course, get_lesson_index(entry.reference_docname))
-
-			entry.completed = (
-				True
-				if frappe.db.exists(
-					"LMS Course Progress",
-					{
-						"lesson": entry.reference_docname,
-						"member": frappe.session.user,
-						"status": "Complete",
-					},
-				)
-				else False
-			)
+			entry.url = get_lesson_url(course, get_lesson_index(entry.reference_docname, course))
+
+			entry.completed = entry.reference_docname in get_completed_lessons(course)
 
 		elif entry.reference_doctype == "LMS Quiz":
 			entry.url = "/quizzes"
@@ -5,11 +5,15 @@ import frappe
 from frappe.model.document import Document
 
 from lms.lms.doctype.lms_enrollment.lms_enrollment import update_program_progress
-from lms.lms.utils import get_course_progress
+from lms.lms.utils import clear_completed_lessons_cache, get_course_progress
 
 
 class LMSCourseProgress(Document):
+	def on_update(self):
+		clear_completed_lessons_cache(self.course, self.member)
+
 	def after_delete(self):
+		clear_completed_lessons_cache(self.course, self.member)
 		progress = get_course_progress(self.course, self.member)
 		membership = frappe.db.get_value(
 			"LMS Enrollment",
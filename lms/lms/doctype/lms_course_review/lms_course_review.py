@@ -5,11 +5,20 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import cint
 
+from lms.lms.utils import update_course_rating
+
 
 class LMSCourseReview(Document):
 	def validate(self):
 		self.validate_if_already_reviewed()
 
+	def on_update(self):
+		if self.has_value_changed("rating"):
+			update_course_rating(self.course)
+
+	def after_delete(self):
+		update_course_rating(self.course)
+
 	def validate_if_already_reviewed(self):
 		if frappe.db.exists("LMS Course Review", {"course": self.course, "owner": self.owner}):
 			frappe.throw(frappe._("You have already reviewed this course"))
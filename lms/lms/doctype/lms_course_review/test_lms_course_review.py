@@ -1,9 +1,40 @@
 # Copyright (c) 2021, FOSS United and Contributors
 # See license.txt
 
-# import frappe
 import unittest
 
+import frappe
+
+from lms.lms.api import update_course_statistics
+from lms.lms.doctype.lms_course.test_lms_course import new_course
+
 
 class TestLMSCourseReview(unittest.TestCase):
-	pass
+	def setUp(self):
+		self.course = new_course("Course Review Statistics")
+
+	def tearDown(self):
+		frappe.db.delete("LMS Course Review", {"course": self.course.name})
+		frappe.db.delete("Course Instructor", {"parent": self.course.name})
+		frappe.db.delete("LMS Course", self.course.name)
+
+	def get_rating(self):
+		return frappe.db.get_value("LMS Course", self.course.name, "rating")
+
+	def test_review_updates_course_rating(self):
+		review = frappe.get_doc(
+			{"doctype": "LMS Course Review", "course": self.course.name, "rating": 0.8, "review": "Good"}
+		).insert()
+		self.assertEqual(self.get_rating(), 4)
+
+		review.delete()
+		self.assertEqual(self.get_rating(), 0)
+
+	def test_course_statistics_repair_drift(self):
+		frappe.get_doc(
+			{"doctype": "LMS Course Review", "course": self.course.name, "rating": 0.6, "review": "Fine"}
+		).insert()
+		frappe.db.set_value("LMS Course", self.course.name, "rating", 0)
+
+		update_course_statistics()
+		self.assertEqual(self.get_rating(), 3)
@@ -6,6 +6,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import ceil
 
+from lms.lms.utils import update_course_enrollments
+
 
 class LMSEnrollment(Document):
 	def validate(self):
@@ -14,6 +16,11 @@ class LMSEnrollment(Document):
 
 	def on_update(self):
 		update_program_progress(self.member)
+		if self.has_value_changed("member_type"):
+			update_course_enrollments(self.course)
+
+	def after_delete(self):
+		update_course_enrollments(self.course)
 
 	def validate_membership_in_same_batch(self):
 		filters = {"member": self.member, "course": self.course, "name": ["!=", self.name]}
@@ -1,8 +1,20 @@
 import unittest
+from unittest.mock import patch
 
 import frappe
 
-from .utils import slugify
+from .api import add_lesson, update_lesson_index
+from .doctype.lms_course.test_lms_course import new_course
+from .utils import (
+	clear_course_structure_cache,
+	get_cached_course_outline,
+	get_completed_lessons,
+	get_course_card_details,
+	get_enrollment_details,
+	get_lesson_index,
+	get_neighbour_lesson,
+	slugify,
+)
 
 
 class TestUtils(unittest.TestCase):
@@ -15,3 +27,128 @@ class TestUtils(unittest.TestCase):
 		self.assertEqual(slugify("Hello World", ["hello-world"]), "hello-world-2")
 
 		self.assertEqual(slugify("Hello World", ["hello-world", "hello-world-2"]), "hello-world-3")
+
+
+class TestCatalogueQueries(unittest.TestCase):
+	def setUp(self):
+		self.courses = [new_course(f"Catalogue Query Course {i}") for i in range(6)]
+
+	def tearDown(self):
+		for course in self.courses:
+			frappe.db.delete("Course Instructor", {"parent": course.name})
+			frappe.db.delete("LMS Course", course.name)
+
+	def count_catalogue_queries(self, names):
+		courses = frappe.get_all(
+			"LMS Course",
+			filters={"name": ["in", names]},
+			fields=["name", "paid_course", "published", "course_price", "currency", "amount_usd"],
+		)
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			get_enrollment_details(courses)
+			get_course_card_details(courses)
+		return sql.call_count, courses
+
+	def test_catalogue_queries_do_not_grow_with_courses(self):
+		names = [course.name for course in self.courses]
+		small_page, _ = self.count_catalogue_queries(names[:2])
+		large_page, courses = self.count_catalogue_queries(names)
+
+		self.assertEqual(small_page, large_page)
+		for course in courses:
+			self.assertEqual(len(course.instructors), 1)
+
+
+class TestCourseStructure(unittest.TestCase):
+	def setUp(self):
+		self.course = new_course("Course Structure Course")
+		self.chapter = self.add_chapter("First Chapter", 1)
+		add_lesson("First Lesson", self.chapter.name, self.course.name, 1)
+
+	def add_chapter(self, title, idx):
+		chapter = frappe.get_doc(
+			{"doctype": "Course Chapter", "title": title, "course": self.course.name}
+		).insert()
+		frappe.get_doc(
+			{
+				"doctype": "Chapter Reference",
+				"chapter": chapter.name,
+				"parent": self.course.name,
+				"parenttype": "LMS Course",
+				"parentfield": "chapters",
+				"idx": idx,
+			}
+		).insert()
+		return chapter
+
+	def tearDown(self):
+		chapters = frappe.get_all("Course Chapter", {"course": self.course.name}, pluck="name")
+		frappe.db.delete("LMS Course Progress", {"course": self.course.name})
+		frappe.db.delete("LMS Enrollment", {"course": self.course.name})
+		frappe.db.delete("Lesson Reference", {"parent": ["in", chapters]})
+		frappe.db.delete("Course Lesson", {"course": self.course.name})
+		frappe.db.delete("Chapter Reference", {"parent": self.course.name})
+		frappe.db.delete("Course Chapter", {"course": self.course.name})
+		frappe.db.delete("Course Instructor", {"parent": self.course.name})
+		frappe.db.delete("LMS Course", self.course.name)
+		clear_course_structure_cache(self.course.name)
+
+	def test_outline_is_served_from_cache(self):
+		outline = get_cached_course_outline(self.course.name)
+		self.assertEqual([lesson.number for lesson in outline[0].lessons], ["1.1"])
+
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			get_cached_course_outline(self.course.name)
+		self.assertEqual(sql.call_count, 0)
+
+	def test_outline_is_invalidated_by_new_lessons(self):
+		get_cached_course_outline(self.course.name)
+		add_lesson("Second Lesson", self.chapter.name, self.course.name, 2)
+
+		outline = get_cached_course_outline(self.course.name)
+		self.assertEqual([lesson.title for lesson in outline[0].lessons], ["First Lesson", "Second Lesson"])
+
+	def test_completed_lessons_follow_progress(self):
+		lesson = get_cached_course_outline(self.course.name)[0].lessons[0].name
+		self.assertEqual(get_completed_lessons(self.course.name), set())
+
+		frappe.get_doc(
+			{"doctype": "LMS Enrollment", "course": self.course.name, "member": frappe.session.user}
+		).insert()
+		progress = frappe.get_doc(
+			{
+				"doctype": "LMS Course Progress",
+				"lesson": lesson,
+				"status": "Complete",
+				"member": frappe.session.user,
+			}
+		).insert()
+		self.assertEqual(get_completed_lessons(self.course.name), {lesson})
+
+		progress.delete()
+		self.assertEqual(get_completed_lessons(self.course.name), set())
+
+	def test_lesson_index_follows_new_lessons(self):
+		self.assertEqual(get_neighbour_lesson(self.course.name, 1, 1), {"prev": None, "next": None})
+
+		add_lesson("Second Lesson", self.chapter.name, self.course.name, 2)
+		second_lesson = frappe.db.get_value(
+			"Course Lesson", {"chapter": self.chapter.name, "title": "Second Lesson"}, "name"
+		)
+
+		self.assertEqual(get_lesson_index(second_lesson), "1-2")
+		self.assertEqual(get_neighbour_lesson(self.course.name, 1, 1), {"prev": None, "next": "1.2"})
+		self.assertEqual(get_neighbour_lesson(self.course.name, 1, 2), {"prev": "1.1", "next": None})
+
+	def test_lesson_count_survives_moves_between_chapters(self):
+		second_chapter = self.add_chapter("Second Chapter", 2)
+		add_lesson("Second Lesson", self.chapter.name, self.course.name, 2)
+		self.assertEqual(frappe.db.get_value("LMS Course", self.course.name, "lessons"), 2)
+
+		first_lesson = frappe.db.get_value(
+			"Course Lesson", {"chapter": self.chapter.name, "title": "First Lesson"}, "name"
+		)
+		update_lesson_index(first_lesson, self.chapter.name, second_chapter.name, 0)
+
+		self.assertEqual(frappe.db.get_value("LMS Course", self.course.name, "lessons"), 2)
+		self.assertEqual(get_lesson_index(first_lesson), "2-1")
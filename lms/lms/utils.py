@@ -1,3 +1,4 @@
+import copy
 import hashlib
 import json
 import re
@@ -10,6 +11,7 @@ from frappe import _
 from frappe.desk.doctype.dashboard_chart.dashboard_chart import get_result
 from frappe.desk.doctype.notification_log.notification_log import make_notification_logs
 from frappe.desk.notifications import extract_mentions
+from frappe.query_builder.functions import Avg, Count
 from frappe.rate_limiter import rate_limit
 from frappe.utils import (
 	add_months,
@@ -158,7 +160,7 @@ def get_lesson_details(chapter, progress=False):
 		lesson_details.icon = get_lesson_icon(lesson_details.body, lesson_details.content)
 
 		if progress:
-			lesson_details.is_complete = get_progress(lesson_details.course, lesson_details.name)
+			lesson_details.is_complete = lesson_details.name in get_completed_lessons(lesson_details.course)
 
 		lessons.append(lesson_details)
 	return lessons
@@ -208,24 +210,39 @@ def get_tags(course):
 
 
 def get_instructors(doctype, docname):
-	instructor_details = []
-	instructors = frappe.get_all(
-		"Course Instructor",
-		{"parent": docname, "parenttype": doctype},
-		order_by="idx",
-		pluck="instructor",
-	)
+	return get_instructors_map(doctype, [docname])[docname]
 
-	for instructor in instructors:
-		instructor_details.append(
-			frappe.db.get_value(
-				"User",
-				instructor,
-				["name", "username", "full_name", "user_image", "first_name"],
-				as_dict=True,
-			)
+
+def get_instructors_map(doctype, docnames):
+	"""Returns {docname: [instructor details]} for many documents with a single query."""
+	instructors = {docname: [] for docname in docnames}
+	if not docnames:
+		return instructors
+
+	CourseInstructor = frappe.qb.DocType("Course Instructor")
+	User = frappe.qb.DocType("User")
+
+	query = (
+		frappe.qb.from_(CourseInstructor)
+		.join(User)
+		.on(CourseInstructor.instructor == User.name)
+		.select(
+			CourseInstructor.parent,
+			User.name,
+			User.username,
+			User.full_name,
+			User.user_image,
+			User.first_name,
 		)
-	return instructor_details
+		.where(CourseInstructor.parenttype == doctype)
+		.where(CourseInstructor.parent.isin(docnames))
+		.orderby(CourseInstructor.parent)
+		.orderby(CourseInstructor.idx)
+	)
+
+	for row in query.run(as_dict=True):
+		instructors[row.pop("parent")].append(row)
+	return instructors
 
 
 def get_students(course, batch=None):
@@ -292,17 +309,60 @@ def is_certified(course):
 	return
 
 
-def get_lesson_index(lesson_name):
-	"""Returns the {chapter_index}.{lesson_index} for the lesson."""
-	lesson = frappe.db.get_value("Lesson Reference", {"lesson": lesson_name}, ["idx", "parent"], as_dict=True)
-	if not lesson:
+def get_lesson_index(lesson_name, course=None):
+	"""Returns the {chapter_index}-{lesson_index} for the lesson."""
+	if not course:
+		course = frappe.db.get_value("Course Lesson", lesson_name, "course")
+	if not course:
 		return "1-1"
 
-	chapter = frappe.db.get_value("Chapter Reference", {"chapter": lesson.parent}, ["idx"], as_dict=True)
-	if not chapter:
+	number = get_course_lesson_index(course).numbers.get(lesson_name)
+	if not number:
 		return "1-1"
 
-	return f"{chapter.idx}-{lesson.idx}"
+	return number.replace(".", "-")
+
+
+def get_course_lesson_index(course):
+	"""Returns the lessons of a course in reading order.
+
+	order: lesson numbers ("chapter.lesson") in order
+	position: lesson number -> its position in order
+	numbers: lesson name -> lesson number
+	Cached until the course structure changes."""
+	lesson_index = frappe.cache().hget("lms_lesson_index", course)
+	if lesson_index is None:
+		lesson_index = build_course_lesson_index(course)
+		frappe.cache().hset("lms_lesson_index", course, lesson_index)
+	return lesson_index
+
+
+def build_course_lesson_index(course):
+	ChapterReference = frappe.qb.DocType("Chapter Reference")
+	LessonReference = frappe.qb.DocType("Lesson Reference")
+
+	lessons = (
+		frappe.qb.from_(ChapterReference)
+		.join(LessonReference)
+		.on(LessonReference.parent == ChapterReference.chapter)
+		.select(
+			ChapterReference.idx.as_("chapter_idx"),
+			LessonReference.idx.as_("lesson_idx"),
+			LessonReference.lesson,
+		)
+		.where(ChapterReference.parent == course)
+		.orderby(ChapterReference.idx)
+		.orderby(LessonReference.idx)
+	).run(as_dict=True)
+
+	lesson_index = frappe._dict(order=[], position={}, numbers={})
+	for row in lessons:
+		number = f"{row.chapter_idx}.{row.lesson_idx}"
+		lesson_index.position[number] = len(lesson_index.order)
+		lesson_index.order.append(number)
+		lesson_index.numbers[row.lesson] = number
+
+	return lesson_index
 
 
 def get_lesson_url(course, lesson_number):
@@ -330,6 +390,35 @@ def get_progress(course, lesson, member=None):
 	)
 
 
+def get_completed_lessons(course, member=None):
+	"""Returns the set of lessons of this course the member has completed.
+
+	Cached in redis until the member's progress changes, redis hget also keeps
+	it in memory for the rest of the request."""
+	if not member:
+		member = frappe.session.user
+
+	return frappe.cache().hget(
+		f"lms_completed_lessons::{course}",
+		member,
+		generator=lambda: set(
+			frappe.get_all(
+				"LMS Course Progress",
+				{"course": course, "member": member, "status": "Complete"},
+				pluck="lesson",
+			)
+		),
+	)
+
+
+def clear_completed_lessons_cache(course, member=None):
+	"""Clears the cached completed lessons of a member, or of every member if none is passed."""
+	if member:
+		frappe.cache().hdel(f"lms_completed_lessons::{course}", member)
+	else:
+		frappe.cache().delete_value(f"lms_completed_lessons::{course}")
+
+
 def render_html(lesson):
 	youtube = lesson.youtube
 	quiz_id = lesson.quiz_id
@@ -385,7 +474,7 @@ def is_eligible_to_review(course):
 
 def get_course_progress(course, member=None):
 	"""Returns the course progress of the session user"""
-	lesson_count = get_lessons(course, get_details=False)
+	lesson_count = frappe.db.get_value("LMS Course", course, "lessons")
 	if not lesson_count:
 		return 0
 	completed_lessons = frappe.db.count(
@@ -585,7 +674,7 @@ def create_notification_log(doc, topic):
 
 		users += instructors
 		subject = _("New reply on the topic {0} in course {1}").format(topic.title, course_title)
-		link = get_lesson_url(course, get_lesson_index(topic.reference_docname))
+		link = get_lesson_url(course, get_lesson_index(topic.reference_docname, course))
 
 	else:
 		batch_title = frappe.db.get_value("LMS Batch", topic.reference_docname, "title")
@@ -620,7 +709,7 @@ def notify_mentions_on_portal(doc, topic):
 	if topic.reference_doctype == "Course Lesson":
 		course = frappe.db.get_value("Course Lesson", topic.reference_docname, "course")
 		subject = _("{0} mentioned you in a comment in {1}").format(from_user_name, topic.title)
-		link = get_lesson_url(course, get_lesson_index(topic.reference_docname))
+		link = get_lesson_url(course, get_lesson_index(topic.reference_docname, course))
 	else:
 		batch_title = frappe.db.get_value("LMS Batch", topic.reference_docname, "title")
 		subject = _("{0} mentioned you in a comment in {1}").format(from_user_name, batch_title)
@@ -669,7 +758,7 @@ def notify_mentions_via_email(doc, topic):
 		link = f"/batches/{topic.reference_docname}#discussions"
 	if topic.reference_doctype == "Course Lesson":
 		course = frappe.db.get_value("Course Lesson", topic.reference_docname, "course")
-		lesson_index = get_lesson_index(topic.reference_docname)
+		lesson_index = get_lesson_index(topic.reference_docname, course)
 		link = get_lesson_url(course, lesson_index)
 
 	args = {
@@ -690,12 +779,80 @@ def notify_mentions_via_email(doc, topic):
 
 
 def get_lesson_count(course):
-	lesson_count = 0
-	chapters = frappe.get_all("Chapter Reference", {"parent": course}, ["chapter"])
-	for chapter in chapters:
-		lesson_count += frappe.db.count("Lesson Reference", {"parent": chapter.chapter})
+	ChapterReference = frappe.qb.DocType("Chapter Reference")
+	LessonReference = frappe.qb.DocType("Lesson Reference")
+
+	return (
+		frappe.qb.from_(ChapterReference)
+		.join(LessonReference)
+		.on(LessonReference.parent == ChapterReference.chapter)
+		.select(Count(LessonReference.name))
+		.where(ChapterReference.parent == course)
+	).run()[0][0]
+
+
+def update_lesson_count(course):
+	"""Stores the number of lessons on the course, used to compute progress."""
+	frappe.db.set_value("LMS Course", course, "lessons", get_lesson_count(course), update_modified=False)
+
+
+def get_lesson_counts():
+	"""Returns {course: number of lessons} for every course with lessons."""
+	ChapterReference = frappe.qb.DocType("Chapter Reference")
+	LessonReference = frappe.qb.DocType("Lesson Reference")
+
+	return dict(
+		frappe.qb.from_(ChapterReference)
+		.join(LessonReference)
+		.on(LessonReference.parent == ChapterReference.chapter)
+		.select(ChapterReference.parent, Count(LessonReference.name))
+		.groupby(ChapterReference.parent)
+		.run()
+	)
+
+
+def get_enrollment_counts(course=None):
+	"""Returns {course: number of student enrollments}, for one course if passed."""
+	Enrollment = frappe.qb.DocType("LMS Enrollment")
+	query = (
+		frappe.qb.from_(Enrollment)
+		.select(Enrollment.course, Count(Enrollment.name))
+		.where(Enrollment.member_type == "Student")
+		.groupby(Enrollment.course)
+	)
+	if course:
+		query = query.where(Enrollment.course == course)
+
+	return dict(query.run())
+
 
-	return lesson_count
+def get_course_ratings(course=None):
+	"""Returns {course: average review rating on the rating field's scale}, for one course if passed."""
+	Review = frappe.qb.DocType("LMS Course Review")
+	query = frappe.qb.from_(Review).select(Review.course, Avg(Review.rating)).groupby(Review.course)
+	if course:
+		query = query.where(Review.course == course)
+
+	# Ratings are stored as a fraction of the scale
+	out_of_ratings = cint(frappe.get_meta("LMS Course Review").get_field("rating").options) or 5
+	precision = cint(frappe.get_system_settings("float_precision")) or 3
+	return {course: flt(flt(rating) * out_of_ratings, precision) for course, rating in query.run()}
+
+
+def update_course_enrollments(course):
+	frappe.db.set_value(
+		"LMS Course",
+		course,
+		"enrollments",
+		get_enrollment_counts(course).get(course, 0),
+		update_modified=False,
+	)
+
+
+def update_course_rating(course):
+	frappe.db.set_value(
+		"LMS Course", course, "rating", get_course_ratings(course).get(course, 0), update_modified=False
+	)
 
 
 def get_all_memberships(member):
@@ -889,7 +1046,7 @@ def get_upcoming_evals(courses=None, batch=None):
 
 
 def check_multicurrency(amount, currency, country=None, amount_usd=None):
-	settings = frappe.get_single("LMS Settings")
+	settings = frappe.get_cached_doc("LMS Settings")
 	show_usd_equivalent = settings.show_usd_equivalent
 
 	# Countries for which currency should not be converted
@@ -898,13 +1055,7 @@ def check_multicurrency(amount, currency, country=None, amount_usd=None):
 
 	# Get users country
 	if not country:
-		country = frappe.db.get_value("Address", {"email_id": frappe.session.user}, "country")
-
-	if not country:
-		country = frappe.db.get_value("User", frappe.session.user, "country")
-
-	if not country:
-		country = get_country_code()
+		country = get_user_country()
 
 	# If the country is the one for which conversion is not needed then return as is
 	if not country or (exception_country and country in exception_country):
@@ -931,6 +1082,18 @@ def check_multicurrency(amount, currency, country=None, amount_usd=None):
 	return ceil(amount), currency
 
 
+def get_user_country():
+	country = frappe.db.get_value("Address", {"email_id": frappe.session.user}, "country")
+
+	if not country:
+		country = frappe.db.get_value("User", frappe.session.user, "country")
+
+	if not country:
+		country = get_country_code()
+
+	return country
+
+
 def apply_gst(amount, country=None):
 	gst_applied = 0
 	apply_gst = frappe.db.get_single_value("LMS Settings", "apply_gst")
@@ -990,14 +1153,23 @@ def get_courses(filters=None, start=0):
 
 
 def get_course_card_details(courses):
+	instructors = get_instructors_map("LMS Course", [course.name for course in courses])
+
+	# The visitor's country is the same for every card, look it up once
+	paid_courses = [course for course in courses if course.paid_course and course.published == 1]
+	country = get_user_country() if paid_courses else None
+
 	for course in courses:
-		course.instructors = get_instructors("LMS Course", course.name)
+		course.instructors = instructors[course.name]
 
-		if course.paid_course and course.published == 1:
+	for course in paid_courses:
+		if country:
 			course.amount, course.currency = check_multicurrency(
-				course.course_price, course.currency, None, course.amount_usd
+				course.course_price, course.currency, country, course.amount_usd
 			)
-			course.price = fmt_money(course.amount, 0, course.currency)
+		else:
+			course.amount = course.course_price
+		course.price = fmt_money(course.amount, 0, course.currency)
 
 	return courses
 
@@ -1045,19 +1217,25 @@ def update_course_filters(filters):
 
 
 def get_enrollment_details(courses):
-	for course in courses:
-		filters = {
-			"course": course.name,
+	if not courses or frappe.session.user == "Guest":
+		return courses
+
+	enrollments = frappe.get_all(
+		"LMS Enrollment",
+		filters={
+			"course": ["in", [course.name for course in courses]],
 			"member": frappe.session.user,
-		}
+		},
+		fields=["name", "course", "current_lesson", "progress", "member"],
+	)
 
-		if frappe.db.exists("LMS Enrollment", filters):
-			course.membership = frappe.db.get_value(
-				"LMS Enrollment",
-				filters,
-				["name", "course", "current_lesson", "progress", "member"],
-				as_dict=1,
-			)
+	memberships = {}
+	for enrollment in enrollments:
+		memberships.setdefault(enrollment.course, enrollment)
+
+	for course in courses:
+		if course.name in memberships:
+			course.membership = memberships[course.name]
 
 	return courses
 
@@ -1156,7 +1334,9 @@ def get_course_details(course):
 		)
 
 	if course_details.membership and course_details.membership.current_lesson:
-		course_details.current_lesson = get_lesson_index(course_details.membership.current_lesson)
+		course_details.current_lesson = get_lesson_index(
+			course_details.membership.current_lesson, course_details.name
+		)
 
 	return course_details
 
@@ -1200,30 +1380,127 @@ def get_categorized_courses(courses):
 @rate_limit(limit=50, seconds=60 * 60)
 def get_course_outline(course, progress=False):
 	"""Returns the course outline."""
+	outline = copy.deepcopy(get_cached_course_outline(course))
+
+	if progress:
+		completed_lessons = get_completed_lessons(course)
+		for chapter in outline:
+			for lesson in chapter.lessons:
+				lesson.is_complete = lesson.name in completed_lessons
+
+	return outline
+
+
+def get_cached_course_outline(course):
+	"""Returns the chapters and lessons of a course, cached until its structure changes."""
+	outline = frappe.cache().hget("lms_course_outline", course)
+	if outline is None:
+		outline = build_course_outline(course)
+		frappe.cache().hset("lms_course_outline", course, outline)
+	return outline
+
+
+def build_course_outline(course):
+	ChapterReference = frappe.qb.DocType("Chapter Reference")
+	CourseChapter = frappe.qb.DocType("Course Chapter")
+	File = frappe.qb.DocType("File")
+
+	chapters = (
+		frappe.qb.from_(ChapterReference)
+		.join(CourseChapter)
+		.on(ChapterReference.chapter == CourseChapter.name)
+		.left_join(File)
+		.on(CourseChapter.scorm_package == File.name)
+		.select(
+			CourseChapter.name,
+			CourseChapter.title,
+			CourseChapter.is_scorm_package,
+			CourseChapter.launch_file,
+			CourseChapter.scorm_package,
+			ChapterReference.idx,
+			File.file_name,
+			File.file_size,
+			File.file_url,
+		)
+		.where(ChapterReference.parent == course)
+		.orderby(ChapterReference.idx)
+	).run(as_dict=True)
+
+	if not chapters:
+		return []
+
+	LessonReference = frappe.qb.DocType("Lesson Reference")
+	CourseLesson = frappe.qb.DocType("Course Lesson")
+
+	lessons = (
+		frappe.qb.from_(LessonReference)
+		.join(CourseLesson)
+		.on(LessonReference.lesson == CourseLesson.name)
+		.select(
+			LessonReference.parent.as_("chapter"),
+			LessonReference.idx,
+			CourseLesson.name,
+			CourseLesson.title,
+			CourseLesson.include_in_preview,
+			CourseLesson.course,
+			CourseLesson.body,
+			CourseLesson.content,
+		)
+		.where(LessonReference.parent.isin([chapter.name for chapter in chapters]))
+		.orderby(LessonReference.parent)
+		.orderby(LessonReference.idx)
+	).run(as_dict=True)
+
 	outline = []
-	chapters = frappe.get_all("Chapter Reference", {"parent": course}, ["chapter", "idx"], order_by="idx")
+	chapter_lessons = {}
 	for chapter in chapters:
-		chapter_details = frappe.db.get_value(
-			"Course Chapter",
-			chapter.chapter,
-			["name", "title", "is_scorm_package", "launch_file", "scorm_package"],
-			as_dict=True,
-		)
-		chapter_details["idx"] = chapter.idx
-		chapter_details.lessons = get_lessons(course, chapter_details, progress=progress)
-
-		if chapter_details.is_scorm_package:
-			chapter_details.scorm_package = frappe.db.get_value(
-				"File",
-				chapter_details.scorm_package,
-				["file_name", "file_size", "file_url"],
-				as_dict=1,
-			)
+		file_details = {
+			"file_name": chapter.pop("file_name"),
+			"file_size": chapter.pop("file_size"),
+			"file_url": chapter.pop("file_url"),
+		}
+		if chapter.is_scorm_package:
+			chapter.scorm_package = frappe._dict(file_details)
+
+		chapter.lessons = chapter_lessons[chapter.name] = []
+		outline.append(chapter)
+
+	chapter_idx = {chapter.name: chapter.idx for chapter in chapters}
+	for lesson in lessons:
+		chapter = lesson.pop("chapter")
+		lesson.number = f"{chapter_idx[chapter]}.{lesson.idx}"
+		lesson.icon = get_lesson_icon(lesson.pop("body"), lesson.pop("content"))
+		chapter_lessons[chapter].append(lesson)
 
-		outline.append(chapter_details)
 	return outline
 
 
+def clear_course_structure_cache(course):
+	"""Clears the cached outline and lesson index of a course."""
+	if course:
+		frappe.cache().hdel("lms_course_outline", course)
+		frappe.cache().hdel("lms_lesson_index", course)
+
+
+def invalidate_course_structure(doc, method=None):
+	"""Doc event on the course structure doctypes, see hooks.py
+
+	Runs in the same transaction as the change, so the lesson count on the
+	course always matches its lesson references."""
+	if doc.doctype == "LMS Course":
+		course = doc.name
+	elif doc.doctype == "Chapter Reference":
+		course = doc.parent
+	elif doc.doctype == "Lesson Reference":
+		course = frappe.db.get_value("Course Chapter", doc.parent, "course")
+	else:
+		course = doc.course
+
+	if course:
+		update_lesson_count(course)
+	clear_course_structure_cache(course)
+
+
 @frappe.whitelist(allow_guest=True)
 @rate_limit(limit=50, seconds=60 * 60)
 def get_lesson(course, chapter, lesson):
@@ -1290,7 +1567,7 @@ def get_lesson(course, chapter, lesson):
 	if frappe.session.user == "Guest":
 		progress = 0
 	else:
-		progress = get_progress(course, lesson_details.name)
+		progress = lesson_details.name in get_completed_lessons(course)
 
 	lesson_details.chapter_title = frappe.db.get_value("Course Chapter", chapter_name, "title")
 	neighbours = get_neighbour_lesson(course, chapter, lesson)
@@ -1316,22 +1593,15 @@ def get_video_details(lesson_name):
 
 
 def get_neighbour_lesson(course, chapter, lesson):
-	numbers = []
-	current = f"{chapter}.{lesson}"
-	chapters = frappe.get_all("Chapter Reference", {"parent": course}, ["idx", "chapter"])
-	for chapter in chapters:
-		lessons = frappe.get_all("Lesson Reference", {"parent": chapter.chapter}, pluck="idx")
-		for lesson in lessons:
-			numbers.append(f"{chapter.idx}.{lesson}")
-
-	tuples_list = [tuple(int(x) for x in s.split(".")) for s in numbers]
-	sorted_tuples = sorted(tuples_list)
-	sorted_numbers = [".".join(str(num) for num in t) for t in sorted_tuples]
-	index = sorted_numbers.index(current)
+	lesson_index = get_course_lesson_index(course)
+	order = lesson_index.order
+	index = lesson_index.position.get(f"{chapter}.{lesson}")
+	if index is None:
+		return {"prev": None, "next": None}
 
 	return {
-		"prev": sorted_numbers[index - 1] if index - 1 >= 0 else None,
-		"next": sorted_numbers[index + 1] if index + 1 < len(sorted_numbers) else None,
+		"prev": order[index - 1] if index - 1 >= 0 else None,
+		"next": order[index + 1] if index + 1 < len(order) else None,
 	}
 
 
@@ -2107,8 +2377,9 @@ def get_batch_type(filters):
 
 
 def get_batch_card_details(batches):
+	instructors = get_instructors_map("LMS Batch", [batch.name for batch in batches])
 	for batch in batches:
-		batch.instructors = get_instructors("LMS Batch", batch.name)
+		batch.instructors = instructors[batch.name]
 		students_count = frappe.db.count("LMS Batch Enrollment", {"batch": batch.name})
 
 		if batch.seat_count:
@@ -0,0 +1,8 @@
+import frappe
+
+from lms.lms.utils import update_lesson_count
+
+
+def execute():
+	for course in frappe.get_all("LMS Course", pluck="name"):
+		update_lesson_count(course)
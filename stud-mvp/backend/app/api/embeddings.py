@@ -2,15 +2,49 @@
 API endpoints for embedding and RAG operations
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List, Optional
-from pathlib import Path
+from typing import Dict, List, Optional
 from app.core.config import settings
+from app.core.singleflight import pipeline_jobs, job_key
+from app.core.storage import get_store
 from app.services.embeddings import process_transcript_for_rag, EmbeddingService
-import json
+from app.services.dedup import collapse_duplicates, load_embedded_chunks
+from app.services.manifest import stage_config
+from app.services.search_scope import in_time_range, resolve_scope
+import time
 
 
 router = APIRouter(prefix="/api/v1/embed", tags=["embeddings"])
 
+SEARCH_RESULT_FIELDS = ("video_id", "chunk_index", "text", "start", "end", "similarity")
+
+
+def project_chunks(
+    chunks: List[Dict],
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+) -> List[Dict]:
+    """
+    Trim chunk dicts to the requested fields
+
+    - fields: comma-separated field names (e.g. "chunk_index,text,start,end");
+      None keeps every field
+    - include_embeddings: embeddings are ~30KB of floats per chunk, so they are
+      only returned when explicitly requested
+    """
+    wanted = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    if wanted is not None and include_embeddings:
+        wanted.add("embedding")
+
+    projected = []
+    for chunk in chunks:
+        if wanted is not None:
+            projected.append({k: v for k, v in chunk.items() if k in wanted})
+        elif include_embeddings:
+            projected.append(chunk)
+        else:
+            projected.append({k: v for k, v in chunk.items() if k != "embedding"})
+    return projected
+
 
 @router.post("/video/{video_id}", status_code=202)
 async def embed_video_transcript(
@@ -27,10 +61,36 @@ async def embed_video_transcript(
     4. Store in vector database
     
     Returns 202 Accepted - processing in background
+    Concurrent requests for the same video share one job
     """
     try:
+        # Keyed on the settings that change the output, so a request never joins a differently configured job
+        key = job_key("embed", video_id, stage_config("embed"))
+        if pipeline_jobs.in_flight(key):
+            return {
+                "status": "processing",
+                "video_id": video_id,
+                "message": "Embedding generation already in progress"
+            }
+        
+        # Another worker may finish the same job while we wait for its lock
+        requested_at = time.time()
+        
+        def finished_elsewhere():
+            store = get_store()
+            version = store.version("embeddings", video_id)
+            if version is not None and version >= requested_at:
+                return store.read_json("embeddings", video_id)
+            return None
+        
         # Add to background tasks
-        background_tasks.add_task(process_transcript_for_rag, video_id)
+        background_tasks.add_task(
+            pipeline_jobs.do,
+            key,
+            process_transcript_for_rag,
+            video_id,
+            done_check=finished_elsewhere
+        )
         
         return {
             "status": "processing",
@@ -42,35 +102,42 @@ async def embed_video_transcript(
 
 
 @router.get("/video/{video_id}")
-async def get_embedded_chunks(video_id: str):
+async def get_embedded_chunks(
+    video_id: str,
+    fields: Optional[str] = None,
+    include_embeddings: bool = False
+):
     """
     Retrieve embedded chunks for a video
     
+    Args:
+    - fields: Optional - comma-separated chunk fields to return (default: all)
+    - include_embeddings: Include embedding vectors (default: false)
+    
     Returns:
     - video_id
-    - chunks: List of chunks with embeddings
+    - chunks: List of chunks (with embeddings only if requested)
     - total_chunks
     - avg_tokens
     """
-    embeddings_dir = Path(settings.storage_path) / "embeddings"
-    embeddings_file = embeddings_dir / f"{video_id}.json"
+    try:
+        chunks = get_store().read_json("embeddings", video_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
-    if not embeddings_file.exists():
+    if chunks is None:
         raise HTTPException(
             status_code=404,
             detail=f"Embeddings not found for video: {video_id}"
         )
     
     try:
-        with open(embeddings_file, 'r', encoding='utf-8') as f:
-            chunks = json.load(f)
-        
         total_tokens = sum(c.get("tokens", 0) for c in chunks)
         avg_tokens = total_tokens / len(chunks) if chunks else 0
         
         return {
             "video_id": video_id,
-            "chunks": chunks,
+            "chunks": project_chunks(chunks, fields, include_embeddings),
             "total_chunks": len(chunks),
             "avg_tokens": round(avg_tokens, 1)
         }
@@ -87,10 +154,12 @@ async def get_embedding_status(video_id: str):
     - status: "completed" or "not_started"
     - video_id
     """
-    embeddings_dir = Path(settings.storage_path) / "embeddings"
-    embeddings_file = embeddings_dir / f"{video_id}.json"
-    
-    if embeddings_file.exists():
+    if pipeline_jobs.in_flight(job_key("embed", video_id, stage_config("embed"))):
+        return {
+            "status": "processing",
+            "video_id": video_id
+        }
+    elif get_store().exists("embeddings", video_id):
         return {
             "status": "completed",
             "video_id": video_id
@@ -106,7 +175,12 @@ async def get_embedding_status(video_id: str):
 async def search_similar_chunks(
     query: str,
     video_id: Optional[str] = None,
-    top_k: int = 5
+    top_k: int = 5,
+    fields: Optional[str] = None,
+    playlist_id: Optional[str] = None,
+    video_ids: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None
 ):
     """
     Search for similar chunks using semantic similarity
@@ -114,7 +188,11 @@ async def search_similar_chunks(
     Args:
     - query: User's search query
     - video_id: Optional - limit search to specific video
+    - playlist_id: Optional - limit search to one playlist (course)
+    - video_ids: Optional - comma-separated videos to search
+    - start / end: Optional - only chunks overlapping this window (seconds) of a single video
     - top_k: Number of results to return (default: 5)
+    - fields: Optional - comma-separated result fields to return (default: all)
     
     Returns:
     - query
@@ -123,36 +201,73 @@ async def search_similar_chunks(
     Note: This is a basic implementation for MVP
     Production should use Weaviate's native vector search
     """
+    try:
+        scope = resolve_scope(
+            video_id,
+            [v.strip() for v in video_ids.split(",") if v.strip()] if video_ids else None,
+            playlist_id,
+            start,
+            end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         # Generate embedding for query
         embedding_service = EmbeddingService()
         query_embedding = await embedding_service.generate_embedding(query)
         
-        # Load chunks from storage
-        embeddings_dir = Path(settings.storage_path) / "embeddings"
+        if settings.vector_compression != "none":
+            from app.services.vector_compression import search_compressed
+            results = search_compressed(
+                query_embedding,
+                video_ids=scope.video_ids,
+                top_k=top_k * 2 if settings.dedup_enabled else top_k,
+                time_range=scope.time_range
+            )
+            if settings.dedup_enabled:
+                results = collapse_duplicates(results)
+            results = results[:top_k]
+            return {
+                "query": query,
+                "results": project_chunks(
+                    [{key: r[key] for key in SEARCH_RESULT_FIELDS} for r in results], fields
+                ),
+                "compression": settings.vector_compression
+            }
+        
+        if settings.shared_index_enabled:
+            from app.services.index_snapshot import shared_index
+            results = shared_index.search(
+                query_embedding,
+                top_k=top_k * 2 if settings.dedup_enabled else top_k,
+                video_ids=scope.video_ids,
+                time_range=scope.time_range
+            )
+            if settings.dedup_enabled:
+                results = collapse_duplicates(results)
+            return {
+                "query": query,
+                "results": project_chunks(
+                    [{key: r[key] for key in SEARCH_RESULT_FIELDS} for r in results[:top_k]], fields
+                ),
+                "generation": shared_index.current().generation if shared_index.current() else 0
+            }
         
-        if not embeddings_dir.exists():
+        store = get_store()
+        keys = scope.video_ids if scope.video_ids is not None else store.keys("embeddings")
+        if not keys:
             return {
                 "query": query,
                 "results": [],
                 "message": "No embeddings found in storage"
             }
         
-        all_chunks = []
-        
-        if video_id:
-            # Search specific video
-            embeddings_file = embeddings_dir / f"{video_id}.json"
-            if embeddings_file.exists():
-                with open(embeddings_file, 'r', encoding='utf-8') as f:
-                    chunks = json.load(f)
-                    all_chunks.extend(chunks)
-        else:
-            # Search all videos
-            for embeddings_file in embeddings_dir.glob("*.json"):
-                with open(embeddings_file, 'r', encoding='utf-8') as f:
-                    chunks = json.load(f)
-                    all_chunks.extend(chunks)
+        all_chunks, vectors = [], {}
+        for key in keys:
+            chunks = load_embedded_chunks(key, vectors)
+            if chunks:
+                all_chunks.extend(c for c in chunks if in_time_range(c, scope.time_range))
         
         # Compute cosine similarity
         import numpy as np
@@ -179,11 +294,14 @@ async def search_similar_chunks(
         
         # Sort by similarity and return top K
         similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        top_results = similarities[:top_k]
+        if settings.dedup_enabled:
+            top_results = collapse_duplicates(similarities[:top_k * 2])[:top_k]
+        else:
+            top_results = similarities[:top_k]
         
         return {
             "query": query,
-            "results": top_results,
+            "results": project_chunks(top_results, fields),
             "total_searched": len(all_chunks)
         }
         
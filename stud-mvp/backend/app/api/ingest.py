@@ -3,8 +3,10 @@ API endpoints for video ingestion and transcription
 Phase 1: YouTube playlist ingestion
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from typing import Optional
 from app.models.schemas import IngestRequest, PlaylistData
 from app.services.youtube_ingest import YouTubeIngestionService
+from app.services.manifest import STAGES, plan_refresh, refresh_playlist
 import logging
 
 logger = logging.getLogger(__name__)
@@ -57,19 +59,65 @@ async def get_playlist(playlist_id: str):
     """
     Retrieve a previously ingested playlist by ID
     """
-    import json
-    from pathlib import Path
-    from app.core.config import settings
+    from app.core.storage import get_store
     
-    playlist_file = Path(settings.storage_path) / "playlists" / f"{playlist_id}.json"
+    try:
+        data = get_store().read_json("playlists", playlist_id)
+    except Exception as e:
+        logger.error(f"Failed to load playlist: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load playlist")
     
-    if not playlist_file.exists():
+    if data is None:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
     try:
-        with open(playlist_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
         return PlaylistData(**data)
     except Exception as e:
         logger.error(f"Failed to load playlist: {e}")
         raise HTTPException(status_code=500, detail="Failed to load playlist")
+
+
+@router.post("/playlist/{playlist_id}/refresh", status_code=202)
+async def refresh_playlist_pipeline(
+    playlist_id: str,
+    background_tasks: BackgroundTasks,
+    dry_run: bool = False,
+    refetch: bool = True,
+    stages: Optional[str] = None
+):
+    """
+    Incrementally re-run the pipeline for a playlist
+    
+    Only stages whose inputs (video list, transcript, chunks) or settings
+    (whisper_model, chunk_max_tokens, embedding_model, quiz_model...) changed
+    since the last run are recomputed (tracked in the playlist's manifest artifact).
+    
+    Args:
+        dry_run: Only report what would be recomputed and its estimated cost
+        refetch: Re-fetch the playlist from YouTube first to pick up new videos
+        stages: Optional - comma-separated subset of transcribe,embed,quiz
+    
+    Returns:
+        The refresh plan (stages to run, reasons, estimated tokens/cost)
+    """
+    selected = [s.strip() for s in stages.split(",") if s.strip()] if stages else list(STAGES)
+    unknown = set(selected) - set(STAGES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown stages: {sorted(unknown)}. Options: {list(STAGES)}")
+    
+    try:
+        if refetch:
+            service = YouTubeIngestionService()
+            await service.ingest_playlist(f"https://www.youtube.com/playlist?list={playlist_id}")
+        
+        plan = plan_refresh(playlist_id, selected)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Refresh planning failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to plan playlist refresh")
+    
+    if not dry_run and plan["stages_to_run"]:
+        background_tasks.add_task(refresh_playlist, playlist_id, selected)
+    
+    return {**plan, "status": "dry_run" if dry_run else "processing" if plan["stages_to_run"] else "up_to_date"}
@@ -4,8 +4,7 @@ API endpoints for quiz generation and management
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 from typing import Optional
-from pathlib import Path
-from app.core.config import settings
+from app.core.storage import get_store
 from app.services.quiz_generator import QuizGeneratorService
 from app.models.schemas import QuizData
 
@@ -49,10 +48,7 @@ async def generate_quiz(
     """
     try:
         # Verify embeddings exist
-        embeddings_dir = Path(settings.storage_path) / "embeddings"
-        embeddings_file = embeddings_dir / f"{video_id}.json"
-        
-        if not embeddings_file.exists():
+        if not get_store().exists("embeddings", video_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Embeddings not found for video: {video_id}. Generate embeddings first."
@@ -142,10 +138,7 @@ async def get_quiz_status(video_id: str):
         - total_questions (if completed)
         - needs_review (if completed)
     """
-    quizzes_dir = Path(settings.storage_path) / "quizzes"
-    quiz_file = quizzes_dir / f"{video_id}.json"
-    
-    if quiz_file.exists():
+    if get_store().exists("quizzes", video_id):
         try:
             generator = QuizGeneratorService()
             quiz = generator.load_quiz(video_id)
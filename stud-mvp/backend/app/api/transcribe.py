@@ -3,6 +3,8 @@ API endpoints for video transcription
 Phase 1: Whisper transcription
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from app.core.singleflight import pipeline_jobs, job_key
+from app.services.manifest import stage_config
 from app.models.schemas import TranscriptData
 from app.services.transcription import TranscriptionService
 import logging
@@ -52,11 +54,23 @@ async def transcribe_video(
                 "chunks": len(existing.transcript)
             }
         
+        # Concurrent requests for the same video share one transcription job
+        key = job_key("transcribe", video_id, stage_config("transcribe"))
+        if pipeline_jobs.in_flight(key):
+            return {
+                "video_id": video_id,
+                "status": "transcribing",
+                "message": "Transcription already in progress"
+            }
+        
         # Start transcription in background
         background_tasks.add_task(
+            pipeline_jobs.do,
+            key,
             service.transcribe_video,
             video_id=video_id,
-            cleanup_audio=cleanup_audio
+            cleanup_audio=cleanup_audio,
+            done_check=lambda: service.load_transcript(video_id)
         )
         
         logger.info(f"Started transcription for video: {video_id}")
@@ -123,9 +137,12 @@ async def get_transcription_status(video_id: str):
             "status": "completed",
             "chunks": len(transcript.transcript)
         }
+    elif pipeline_jobs.in_flight(job_key("transcribe", video_id, stage_config("transcribe"))):
+        return {
+            "video_id": video_id,
+            "status": "transcribing"
+        }
     else:
-        # TODO: Check background job status
-        # For now, just return not_started
         return {
             "video_id": video_id,
             "status": "not_started",
@@ -1,10 +1,16 @@
 """
 API endpoints for AI Tutor (RAG-based question answering)
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from app.services.ai_tutor import AITutorService
+from app.services.suggestions import load_suggestions
+from app.services.analytics import analytics_writer, get_video_analytics
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.metrics import stage_timeline
 from app.models.schemas import TutorResponse
 
 
@@ -18,6 +24,10 @@ class AskQuestionRequest(BaseModel):
     session_id: Optional[str] = None
     top_k: int = 5
     context_window: int = 3
+    playlist_id: Optional[str] = None  # Limit search to one course
+    video_ids: Optional[List[str]] = None
+    start: Optional[float] = None  # Window (seconds) within a single video
+    end: Optional[float] = None
 
 
 class FeedbackRequest(BaseModel):
@@ -26,6 +36,7 @@ class FeedbackRequest(BaseModel):
     question_index: int  # Index in conversation history
     rating: int  # 1-5 stars
     comment: Optional[str] = None
+    video_id: Optional[str] = None  # Defaults to the rated question's video
 
 
 @router.post("/ask")
@@ -43,12 +54,16 @@ async def ask_question(request: AskQuestionRequest):
     Args:
         question: User's question
         video_id: Optional - limit to specific video
+        playlist_id / video_ids: Optional - limit to a course or set of videos
+        start / end: Optional - limit to a window (seconds) of a single video
         session_id: Optional - conversation session ID (generated if not provided)
         top_k: Number of chunks to retrieve (default: 5)
         context_window: Number of previous messages to include (default: 3)
     
     Returns:
         TutorResponse with answer, sources, confidence, and suggestions
+        (with TIMELINE_ENABLED also "timeline": the request's stages with start
+        offsets and durations in ms, so overlapping stages are visible)
     """
     try:
         if not request.question or len(request.question.strip()) < 3:
@@ -58,14 +73,21 @@ async def ask_question(request: AskQuestionRequest):
             )
         
         tutor = AITutorService()
-        response = await tutor.ask_question(
-            question=request.question,
-            video_id=request.video_id,
-            session_id=request.session_id,
-            top_k=request.top_k,
-            context_window=request.context_window
-        )
+        with stage_timeline() as timeline:
+            response = await tutor.ask_question(
+                question=request.question,
+                video_id=request.video_id,
+                session_id=request.session_id,
+                top_k=request.top_k,
+                context_window=request.context_window,
+                playlist_id=request.playlist_id,
+                video_ids=request.video_ids,
+                start=request.start,
+                end=request.end
+            )
         
+        if settings.timeline_enabled:
+            return {**response.model_dump(mode="json"), "timeline": sorted(timeline, key=lambda e: e["start_ms"])}
         return response
         
     except ValueError as e:
@@ -129,6 +151,7 @@ async def submit_feedback(feedback: FeedbackRequest):
         question_index: Index of Q&A in history (0-based)
         rating: 1-5 stars
         comment: Optional feedback comment
+        video_id: Optional - video the answer was about
     """
     try:
         if not (1 <= feedback.rating <= 5):
@@ -137,8 +160,14 @@ async def submit_feedback(feedback: FeedbackRequest):
                 detail="Rating must be between 1 and 5"
             )
         
-        # TODO: Store feedback in database for analytics
-        # For MVP, just acknowledge receipt
+        # Buffered: written with the next analytics batch
+        analytics_writer.record_feedback(
+            session_id=feedback.session_id,
+            question_index=feedback.question_index,
+            rating=feedback.rating,
+            comment=feedback.comment,
+            video_id=feedback.video_id
+        )
         
         return {
             "session_id": feedback.session_id,
@@ -153,12 +182,41 @@ async def submit_feedback(feedback: FeedbackRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/analytics/{video_id}")
+async def get_video_tutor_analytics(
+    video_id: str,
+    days: int = 30,
+    db: Session = Depends(get_db)
+):
+    """
+    Tutor analytics for a video, read from pre-aggregated rollups
+    
+    Args:
+        video_id: ID of the video
+        days: Days of question volume to return (default: 30, max: 365)
+    
+    Returns:
+        - Total questions and average confidence
+        - Total ratings and average rating
+        - Questions per day
+    """
+    days = max(1, min(days, 365))
+    analytics = get_video_analytics(db, video_id, days)
+    if analytics is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No tutor activity recorded for video: {video_id}"
+        )
+    return analytics
+
+
 @router.get("/suggest/{video_id}")
 async def suggest_questions(video_id: str, count: int = 5):
     """
     Suggest questions a student might ask about a video
     
-    Uses the video's transcript to generate relevant questions.
+    Serves questions precomputed at embedding time (one per topic cluster of
+    the transcript). Falls back to generic starter questions if none exist.
     Useful for guiding student exploration.
     
     Args:
@@ -172,8 +230,14 @@ async def suggest_questions(video_id: str, count: int = 5):
         if count > 10:
             count = 10
         
-        # TODO: Implement intelligent question generation based on transcript
-        # For MVP, return generic starter questions
+        precomputed = load_suggestions(video_id)
+        if precomputed:
+            return {
+                "video_id": video_id,
+                "suggestions": [s["question"] for s in precomputed[:count]],
+                "timestamps": [s["start"] for s in precomputed[:count]],
+                "source": "precomputed"
+            }
         
         generic_questions = [
             f"What is the main topic covered in this video?",
@@ -190,7 +254,8 @@ async def suggest_questions(video_id: str, count: int = 5):
         
         return {
             "video_id": video_id,
-            "suggestions": generic_questions[:count]
+            "suggestions": generic_questions[:count],
+            "source": "generic"
         }
         
     except Exception as e:
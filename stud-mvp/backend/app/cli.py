@@ -0,0 +1,50 @@
+"""
+STUD command line tools
+Usage: python -m app.cli import-dir <path> [--workers N] [--no-recursive] [--no-embed] [--verbose]
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+def _import_dir(args: argparse.Namespace) -> int:
+    from app.services.local_import import import_directory, format_summary
+
+    root = Path(args.path)
+    if not root.is_dir():
+        print(f"❌ Not a directory: {root}")
+        return 1
+    try:
+        summary = import_directory(root, workers=args.workers, recursive=args.recursive, embed=args.embed)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted. Re-run the same command to resume.")
+        return 130
+    print(format_summary(summary))
+    return 1 if summary["failed"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="STUD command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_dir = commands.add_parser(
+        "import-dir",
+        help="Transcribe and embed a folder of local audio/video recordings"
+    )
+    import_dir.add_argument("path", help="Directory with lecture recordings")
+    import_dir.add_argument("--workers", type=int, default=None, help="Transcription processes (default: sized to this machine)")
+    import_dir.add_argument("--no-recursive", dest="recursive", action="store_false", help="Don't descend into subdirectories")
+    import_dir.add_argument("--no-embed", dest="embed", action="store_false", help="Only transcribe")
+    import_dir.add_argument("--verbose", action="store_true", help="Log every pipeline step")
+    import_dir.set_defaults(handler=_import_dir)
+
+    args = parser.parse_args(argv)
+    # Keep the progress bar readable unless asked for the full pipeline log
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,8 +25,13 @@ class Settings(BaseSettings):
     # Application
     app_env: str = "development"
     debug: bool = True
+    app_role: str = "all"  # "all", "api" (no transcription code) or "pipeline"
     secret_key: str = "change-this-in-production"
     
+    # Responses ("none", "gzip" or "brotli"; only bodies above min_size bytes are compressed)
+    response_compression: str = "gzip"
+    response_compression_min_size: int = 1024
+    
     # CORS
     allowed_origins: str = "http://localhost:3000,http://localhost:8000"
     
@@ -34,15 +39,30 @@ class Settings(BaseSettings):
     rate_limit_free_tier: int = 10
     rate_limit_premium_tier: int = 100
     
-    # Storage
+    # Storage ("local" or "s3"; artifacts are compressed with "zstd", "gzip" or "none")
     storage_type: str = "local"
     storage_path: str = "/app/data"
+    storage_compression: str = "zstd"
+    s3_bucket_name: str = ""
+    s3_endpoint_url: str = ""  # e.g. http://minio:9000 for MinIO
+    s3_region: str = ""
+    
+    # Pipeline job de-duplication ("memory", "file" for multi-worker, "redis" for multi-host)
+    singleflight_backend: str = "memory"
+    singleflight_lock_timeout_seconds: int = 7200
     
     # Transcription
     whisper_model: str = "base"
     max_video_duration_minutes: int = 120
+    word_timestamps: bool = False  # Store word timings and chunk at exact word boundaries
+    import_threads_per_worker: int = 2  # Torch threads per `app.cli import-dir` process
+    
+    # Embeddings
+    embedding_model: str = "text-embedding-3-small"
+    chunk_max_tokens: int = 800
     
     # Quiz Generation
+    quiz_model: str = "gpt-4"
     quiz_questions_per_video: int = 5
     quiz_difficulty_mix: str = "recall:2,apply:2,analyze:1"
     
@@ -51,6 +71,30 @@ class Settings(BaseSettings):
     tutor_max_tokens: int = 500
     tutor_temperature: float = 0.7
     rag_top_k_chunks: int = 5
+    suggested_questions_enabled: bool = True
+    suggested_questions_count: int = 10  # Clusters (and questions) per video
+    suggestions_model: str = "gpt-4o-mini"  # Must support JSON mode (response_format)
+    
+    # Tutor analytics (events are bulk-written every N events or T ms)
+    analytics_batch_size: int = 100
+    analytics_flush_interval_ms: int = 1000
+    
+    # Vector compression ("none", "int8", "matryoshka", "pca", "matryoshka+int8", "pca+int8")
+    vector_compression: str = "none"
+    vector_compression_dims: int = 256  # Target dims for matryoshka/pca
+    vector_rescore_candidates: int = 50  # Candidates rescored with full-precision vectors
+    
+    # Shared memory-mapped index snapshot (multi-worker deployments)
+    shared_index_enabled: bool = False
+    
+    # Near-duplicate chunk detection (MinHash/LSH, estimated Jaccard threshold)
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.8
+    
+    # Observability
+    log_level: str = "INFO"
+    metrics_enabled: bool = True
+    timeline_enabled: bool = False  # Add per-request stage timings ("timeline") to /tutor/ask responses
     
     class Config:
         env_file = ".env"
@@ -40,5 +40,6 @@ def get_db():
 def init_db():
     """Initialize database - create all tables"""
     from app.models import User  # Import all models here
+    from app.models.analytics import TutorEvent, VideoAnalytics, VideoDailyQuestions
     Base.metadata.create_all(bind=engine)
     print("✅ Database initialized successfully")
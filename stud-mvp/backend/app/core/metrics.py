@@ -0,0 +1,265 @@
+"""
+Lightweight metrics and request tracing for STUD backend
+Records per-stage counters/histograms and renders them in Prometheus text format
+"""
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Request ID for the request currently being handled (propagated into logs)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Per-request stage timeline: (origin perf_counter, entries), set by stage_timeline()
+_timeline_var: ContextVar[Optional[Tuple[float, List[Dict]]]] = ContextVar("stage_timeline", default=None)
+
+# Default latency buckets in seconds (embedding/LLM calls span ms → tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    """Normalise a label dict into a hashable, sorted key"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a label key as {a="1",b="2"} (empty string if no labels)"""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels"""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increment the counter for the given label set"""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for the given label set"""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Record a single observation"""
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        """Number of observations for the given label set"""
+        state = self._values.get(_label_key(labels))
+        return int(state[-1]) if state else 0
+
+    def sum(self, **labels) -> float:
+        """Sum of observations for the given label set"""
+        state = self._values.get(_label_key(labels))
+        return state[-2] if state else 0.0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, state):
+                    le = ("le", repr(float(bound)))
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {bucket_count}")
+                lines.append(f'{self.name}_bucket{_format_labels(key, ("le", "+Inf"))} {state[-1]}')
+                lines.append(f"{self.name}_sum{_format_labels(key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str) -> Counter:
+        """Get or create a counter"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, description)
+            return self._metrics[name]
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+registry = MetricsRegistry()
+
+# Stage-level metrics shared by the services
+STAGE_SECONDS = registry.histogram(
+    "stud_stage_duration_seconds",
+    "Wall-clock duration of a pipeline/tutor stage"
+)
+STAGE_ERRORS = registry.counter(
+    "stud_stage_errors_total",
+    "Number of stages that raised an exception"
+)
+LLM_TOKENS = registry.counter(
+    "stud_llm_tokens_total",
+    "Tokens sent to / received from the LLM, by direction"
+)
+WHISPER_REALTIME_FACTOR = registry.histogram(
+    "stud_whisper_seconds_per_audio_second",
+    "Whisper processing seconds per second of audio",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "stud_http_request_duration_seconds",
+    "HTTP request latency by route and status"
+)
+
+
+@contextmanager
+def timed_stage(stage: str, **labels) -> Iterator[Dict[str, float]]:
+    """
+    Time a block of work and record it under stud_stage_duration_seconds
+
+    Usage:
+        with timed_stage("embedding_call"):
+            ...
+
+    Yields a dict whose "seconds" key is filled in when the block exits,
+    so callers can reuse the measured duration (e.g. Whisper realtime factor).
+    """
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage, **labels)
+        raise
+    finally:
+        result["seconds"] = time.perf_counter() - start
+        STAGE_SECONDS.observe(result["seconds"], stage=stage, **labels)
+        timeline = _timeline_var.get()
+        if timeline is not None:
+            origin, entries = timeline
+            entries.append({
+                "stage": stage,
+                "start_ms": round((start - origin) * 1000, 1),
+                "ms": round(result["seconds"] * 1000, 1)
+            })
+
+
+@contextmanager
+def stage_timeline() -> Iterator[List[Dict]]:
+    """
+    Collect every timed_stage that runs inside the block as
+    {"stage", "start_ms", "ms"} entries (offsets from the block's start)
+
+    Tasks and threads started from the block (asyncio.gather, to_thread)
+    inherit the context, so concurrent stages show up as overlapping entries.
+    """
+    entries: List[Dict] = []
+    token = _timeline_var.set((time.perf_counter(), entries))
+    try:
+        yield entries
+    finally:
+        _timeline_var.reset(token)
+
+
+def record_llm_usage(usage, model: str):
+    """Record prompt/completion token counts from an OpenAI usage object"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    LLM_TOKENS.inc(prompt_tokens, model=model, direction="in")
+    LLM_TOKENS.inc(completion_tokens, model=model, direction="out")
+
+
+def new_request_id() -> str:
+    """Generate a short random request ID"""
+    return uuid.uuid4().hex[:16]
+
+
+class RequestIdFilter(logging.Filter):
+    """Logging filter that stamps each record with the current request ID"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging(level: str = "INFO"):
+    """
+    Configure root logging with request IDs in every line
+    Safe to call more than once
+    """
+    root = logging.getLogger()
+    if any(isinstance(f, RequestIdFilter) for h in root.handlers for f in h.filters):
+        return
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+    ))
+    root.addHandler(handler)
+    root.setLevel(level)
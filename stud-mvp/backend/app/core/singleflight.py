@@ -0,0 +1,149 @@
+"""
+Single-flight de-duplication of concurrent identical pipeline jobs
+Concurrent calls with the same (stage, video_id, params) key share one execution
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JobKey = Tuple[str, str, str]
+
+
+def job_key(stage: str, video_id: str, params: Optional[Dict] = None) -> JobKey:
+    """Build a hashable key; params are serialised with sorted keys"""
+    return (stage, video_id, json.dumps(params or {}, sort_keys=True, default=str))
+
+
+def _lock_name(key: JobKey) -> str:
+    digest = hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()[:16]
+    return f"{key[0]}-{key[1]}-{digest}"
+
+
+class MemoryLock:
+    """No cross-process locking (single worker deployments)"""
+
+    @asynccontextmanager
+    async def acquire(self, key: JobKey):
+        yield
+
+
+class FileLock:
+    """
+    Cross-process lock using fcntl.flock on storage_path/locks/<key>.lock
+    For multiple workers on one host (POSIX only)
+    """
+
+    def __init__(self, lock_dir: Optional[Path] = None):
+        self.lock_dir = lock_dir or Path(settings.storage_path) / "locks"
+
+    @asynccontextmanager
+    async def acquire(self, key: JobKey):
+        import fcntl
+
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        handle = open(self.lock_dir / f"{_lock_name(key)}.lock", "a+")
+        try:
+            # flock blocks, so wait for it off the event loop
+            await asyncio.to_thread(fcntl.flock, handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+
+class RedisLock:
+    """Cross-host lock using a Redis lock (for multi-host deployments)"""
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[int] = None):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url or settings.redis_url)
+        self.timeout = timeout or settings.singleflight_lock_timeout_seconds
+
+    @asynccontextmanager
+    async def acquire(self, key: JobKey):
+        lock = self.client.lock(f"stud:singleflight:{_lock_name(key)}", timeout=self.timeout)
+        await lock.acquire()
+        try:
+            yield
+        finally:
+            await lock.release()
+
+
+LOCK_BACKENDS = {
+    "memory": MemoryLock,
+    "file": FileLock,
+    "redis": RedisLock,
+}
+
+
+class SingleFlight:
+    """
+    Registry of in-flight jobs
+
+    Within a process, callers with the same key await the same future. The
+    optional lock backend serialises the job across workers; `done_check`
+    runs after the lock is acquired so a worker that waited on another
+    worker's run can return its output instead of recomputing it.
+    """
+
+    def __init__(self, lock=None):
+        self.lock = lock or MemoryLock()
+        self._inflight: Dict[JobKey, asyncio.Future] = {}
+
+    @classmethod
+    def from_settings(cls) -> "SingleFlight":
+        backend = settings.singleflight_backend
+        if backend not in LOCK_BACKENDS:
+            raise ValueError(f"Unknown singleflight backend: {backend}. Options: {list(LOCK_BACKENDS)}")
+        return cls(LOCK_BACKENDS[backend]())
+
+    def in_flight(self, key: JobKey) -> bool:
+        """True if a job with this key is currently running in this process"""
+        return key in self._inflight
+
+    async def do(
+        self,
+        key: JobKey,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        done_check: Optional[Callable[[], Any]] = None,
+        **kwargs
+    ) -> Any:
+        """Run fn(*args, **kwargs) once per key; concurrent callers share the result"""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            logger.info(f"🔗 Attached to in-flight job: {key[0]} {key[1]}")
+            return await asyncio.shield(existing)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self.lock.acquire(key):
+                result = done_check() if done_check else None
+                if result is None:
+                    result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so unattended failures don't warn
+            raise
+        finally:
+            del self._inflight[key]
+
+
+# Global registry shared by the pipeline endpoints
+pipeline_jobs = SingleFlight.from_settings()
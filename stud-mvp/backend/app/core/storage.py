@@ -0,0 +1,378 @@
+"""
+Artifact storage behind settings.storage_type
+JSON artifacts (transcripts, embeddings, quizzes, playlists, conversations...) are
+addressed by (kind, key) and stored compressed and content-addressed, either on
+local disk or in an S3-compatible bucket (AWS S3, MinIO)
+"""
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+import orjson
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CODECS = ("zstd", "gzip", "none")
+_EXTENSIONS = {"zstd": ".json.zst", "gzip": ".json.gz", "none": ".json"}
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if codec == "none":
+        return data
+    raise ValueError(f"Unknown storage compression: {codec}. Options: {CODECS}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "none":
+        return data
+    raise ValueError(f"Unknown storage compression: {codec}. Options: {CODECS}")
+
+
+class ArtifactInfo(NamedTuple):
+    """What a (kind, key) currently points at"""
+    digest: str  # sha256 of the uncompressed JSON
+    codec: str
+    size: int  # Uncompressed bytes
+    stored_size: int  # Bytes on disk / in the bucket
+    version: float  # Changes on every write (mtime / LastModified)
+
+
+class ArtifactStore(ABC):
+    """
+    JSON artifacts on top of two primitives implemented by each backend:
+    immutable blobs named by content digest, and small mutable refs
+    (kind/key -> digest). Writing identical content twice stores one blob;
+    refs are replaced atomically so readers never see a partial artifact.
+    """
+
+    def __init__(self, codec: str = "zstd"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown storage compression: {codec}. Options: {CODECS}")
+        self.codec = codec
+
+    @staticmethod
+    def blob_name(digest: str, codec: str) -> str:
+        return f"objects/{digest[:2]}/{digest}{_EXTENSIONS[codec]}"
+
+    # Backend primitives
+    @abstractmethod
+    def _blob_size(self, name: str) -> Optional[int]:
+        """Stored size of a blob (None if it doesn't exist)"""
+
+    @abstractmethod
+    def _get_blob(self, name: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def _put_blob(self, name: str, data: bytes):
+        ...
+
+    @abstractmethod
+    def _get_ref(self, kind: str, key: str) -> Optional[Dict]:
+        """Ref dict (digest, codec, size, stored_size, version) or None"""
+
+    @abstractmethod
+    def _put_ref(self, kind: str, key: str, ref: Dict):
+        ...
+
+    @abstractmethod
+    def _delete_ref(self, kind: str, key: str):
+        ...
+
+    @abstractmethod
+    def keys(self, kind: str) -> List[str]:
+        """Keys stored under a kind, sorted"""
+
+    # Public API
+    def write_json(self, kind: str, key: str, data: Any) -> ArtifactInfo:
+        raw = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+        digest = hashlib.sha256(raw).hexdigest()
+        name = self.blob_name(digest, self.codec)
+        stored_size = self._blob_size(name)
+        if stored_size is None:
+            blob = compress(raw, self.codec)
+            self._put_blob(name, blob)
+            stored_size = len(blob)
+        ref = {"digest": digest, "codec": self.codec, "size": len(raw), "stored_size": stored_size}
+        self._put_ref(kind, key, ref)
+        return self.info(kind, key)
+
+    def read_bytes(self, kind: str, key: str) -> Optional[bytes]:
+        """Uncompressed JSON bytes (None if the artifact doesn't exist)"""
+        ref = self._get_ref(kind, key)
+        if ref is None:
+            return None
+        return decompress(self._get_blob(self.blob_name(ref["digest"], ref["codec"])), ref["codec"])
+
+    def read_json(self, kind: str, key: str) -> Optional[Any]:
+        raw = self.read_bytes(kind, key)
+        return orjson.loads(raw) if raw is not None else None
+
+    def info(self, kind: str, key: str) -> Optional[ArtifactInfo]:
+        ref = self._get_ref(kind, key)
+        if ref is None:
+            return None
+        return ArtifactInfo(
+            ref["digest"], ref["codec"], ref["size"], ref["stored_size"], ref["version"]
+        )
+
+    def exists(self, kind: str, key: str) -> bool:
+        return self._get_ref(kind, key) is not None
+
+    def version(self, kind: str, key: str) -> Optional[float]:
+        """Change token for caches keyed on an artifact (None if missing)"""
+        ref = self._get_ref(kind, key)
+        return ref["version"] if ref else None
+
+    def delete(self, kind: str, key: str):
+        """Remove the ref (blobs are shared and reclaimed by gc())"""
+        self._delete_ref(kind, key)
+
+
+class LocalStore(ArtifactStore):
+    """
+    Artifacts under storage_path:
+        <kind>/<key>.ref                      ref JSON
+        objects/<ab>/<digest>.json.zst|gz     compressed content blobs
+
+    Plain <kind>/<key>.json files from older versions are still read (and
+    replaced on the next write).
+    """
+
+    def __init__(self, root: Optional[Path] = None, codec: Optional[str] = None):
+        super().__init__(codec or settings.storage_compression)
+        self.root = Path(root or settings.storage_path)
+
+    def _atomic_write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _blob_size(self, name: str) -> Optional[int]:
+        # Called before a write re-references an existing blob: refresh its mtime
+        # so gc's grace period covers it until the new ref is in place
+        try:
+            os.utime(self.root / name)
+            return (self.root / name).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _get_blob(self, name: str) -> bytes:
+        return (self.root / name).read_bytes()
+
+    def _put_blob(self, name: str, data: bytes):
+        self._atomic_write(self.root / name, data)
+
+    def _ref_path(self, kind: str, key: str) -> Path:
+        return self.root / kind / f"{key}.ref"
+
+    def _legacy_path(self, kind: str, key: str) -> Path:
+        return self.root / kind / f"{key}.json"
+
+    def _get_ref(self, kind: str, key: str) -> Optional[Dict]:
+        try:
+            path = self._ref_path(kind, key)
+            ref = orjson.loads(path.read_bytes())
+            ref["version"] = path.stat().st_mtime
+            return ref
+        except FileNotFoundError:
+            pass
+        legacy = self._legacy_path(kind, key)
+        if not legacy.exists():
+            return None
+        stat = legacy.stat()
+        return {"legacy": True, "codec": "none", "size": stat.st_size,
+                "stored_size": stat.st_size, "version": stat.st_mtime}
+
+    def read_bytes(self, kind: str, key: str) -> Optional[bytes]:
+        ref = self._get_ref(kind, key)
+        if ref and ref.get("legacy"):
+            return self._legacy_path(kind, key).read_bytes()
+        return super().read_bytes(kind, key)
+
+    def info(self, kind: str, key: str) -> Optional[ArtifactInfo]:
+        ref = self._get_ref(kind, key)
+        if ref and ref.get("legacy"):
+            digest = hashlib.sha256(self._legacy_path(kind, key).read_bytes()).hexdigest()
+            return ArtifactInfo(digest, "none", ref["size"], ref["stored_size"], ref["version"])
+        return super().info(kind, key)
+
+    def _put_ref(self, kind: str, key: str, ref: Dict):
+        self._atomic_write(self._ref_path(kind, key), orjson.dumps(ref))
+        self._legacy_path(kind, key).unlink(missing_ok=True)
+
+    def _delete_ref(self, kind: str, key: str):
+        self._ref_path(kind, key).unlink(missing_ok=True)
+        self._legacy_path(kind, key).unlink(missing_ok=True)
+
+    def keys(self, kind: str) -> List[str]:
+        folder = self.root / kind
+        if not folder.exists():
+            return []
+        return sorted({p.stem for p in folder.glob("*.ref")} | {p.stem for p in folder.glob("*.json")})
+
+    def gc(self, grace_seconds: float = 3600) -> int:
+        """
+        Delete blobs no ref points at; returns bytes reclaimed
+
+        Blobs written or re-used in the last `grace_seconds` are kept: a
+        concurrent write_json stores (or touches) its blob before writing the
+        ref, so a young unreferenced blob may be about to be referenced.
+        """
+        cutoff = time.time() - grace_seconds
+        referenced = set()
+        for ref_file in self.root.glob("*/*.ref"):
+            ref = orjson.loads(ref_file.read_bytes())
+            referenced.add(self.blob_name(ref["digest"], ref["codec"]))
+        reclaimed = 0
+        for blob in (self.root / "objects").glob("*/*"):
+            if blob.name.endswith(".tmp"):
+                continue
+            if str(blob.relative_to(self.root)) in referenced:
+                continue
+            try:
+                stat = blob.stat()
+                if stat.st_mtime >= cutoff:
+                    continue
+                blob.unlink()
+            except FileNotFoundError:
+                continue  # Reclaimed by a concurrent gc
+            reclaimed += stat.st_size
+        return reclaimed
+
+
+class S3Store(ArtifactStore):
+    """
+    Artifacts in an S3-compatible bucket (same layout as LocalStore, under `prefix`)
+    Point s3_endpoint_url at MinIO (or any S3-compatible server) for self-hosting.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        prefix: str = "",
+        client=None,
+        codec: Optional[str] = None
+    ):
+        super().__init__(codec or settings.storage_compression)
+        self.bucket = bucket or settings.s3_bucket_name
+        if not self.bucket:
+            raise ValueError("S3_BUCKET_NAME must be set when STORAGE_TYPE=s3")
+        self.prefix = prefix
+        if client is None:
+            import boto3
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.s3_endpoint_url or None,
+                region_name=settings.s3_region or None
+            )
+        self.client = client
+
+    @staticmethod
+    def _is_missing(error: Exception) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, name: str) -> Optional[Dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.prefix + name)
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    def _blob_size(self, name: str) -> Optional[int]:
+        head = self._head(name)
+        return head["ContentLength"] if head else None
+
+    def _get_blob(self, name: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + name)["Body"].read()
+
+    def _put_blob(self, name: str, data: bytes):
+        # A single PUT is atomic in S3: readers see the old object or the new one
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + name, Body=data)
+
+    def _ref_name(self, kind: str, key: str) -> str:
+        return f"{kind}/{key}.ref"
+
+    def _get_ref(self, kind: str, key: str) -> Optional[Dict]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + self._ref_name(kind, key))
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+        ref = orjson.loads(response["Body"].read())
+        ref["version"] = response["LastModified"].timestamp()
+        return ref
+
+    def _put_ref(self, kind: str, key: str, ref: Dict):
+        self._put_blob(self._ref_name(kind, key), orjson.dumps(ref))
+
+    def _delete_ref(self, kind: str, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + self._ref_name(kind, key))
+
+    def keys(self, kind: str) -> List[str]:
+        keys, token = [], None
+        folder = f"{self.prefix}{kind}/"
+        while True:
+            kwargs = {"Bucket": self.bucket, "Prefix": folder}
+            if token:
+                kwargs["ContinuationToken"] = token
+            page = self.client.list_objects_v2(**kwargs)
+            keys.extend(
+                obj["Key"][len(folder):-len(".ref")]
+                for obj in page.get("Contents", [])
+                if obj["Key"].endswith(".ref") and "/" not in obj["Key"][len(folder):]
+            )
+            if not page.get("IsTruncated"):
+                return sorted(keys)
+            token = page["NextContinuationToken"]
+
+
+STORAGE_BACKENDS = {
+    "local": LocalStore,
+    "s3": S3Store,
+}
+
+_store: Optional[ArtifactStore] = None
+_store_config = None
+
+
+def get_store() -> ArtifactStore:
+    """Process-wide store for the current settings (rebuilt if they change)"""
+    global _store, _store_config
+    config = (
+        settings.storage_type, settings.storage_path, settings.storage_compression,
+        settings.s3_bucket_name, settings.s3_endpoint_url
+    )
+    if _store is None or _store_config != config:
+        if settings.storage_type not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage type: {settings.storage_type}. Options: {list(STORAGE_BACKENDS)}")
+        _store = STORAGE_BACKENDS[settings.storage_type]()
+        _store_config = config
+    return _store
@@ -0,0 +1,48 @@
+"""
+Tutor analytics models: raw events plus per-video rollups
+"""
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Date
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class TutorEvent(Base):
+    """One tutor question or feedback rating (append-only)"""
+
+    __tablename__ = "tutor_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)  # "question" or "feedback"
+    session_id = Column(String, index=True, nullable=False)
+    question_index = Column(Integer, nullable=True)
+    video_id = Column(String, index=True, nullable=True)
+    confidence = Column(Float, nullable=True)  # question events
+    rating = Column(Integer, nullable=True)  # feedback events (1-5)
+    comment = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<TutorEvent(id={self.id}, type='{self.event_type}', video_id='{self.video_id}')>"
+
+
+class VideoAnalytics(Base):
+    """Running totals per video, updated on every flush of the event writer"""
+
+    __tablename__ = "video_analytics"
+
+    video_id = Column(String, primary_key=True)
+    question_count = Column(Integer, default=0, nullable=False)
+    confidence_sum = Column(Float, default=0.0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class VideoDailyQuestions(Base):
+    """Question volume per video per (UTC) day"""
+
+    __tablename__ = "video_daily_questions"
+
+    video_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    question_count = Column(Integer, default=0, nullable=False)
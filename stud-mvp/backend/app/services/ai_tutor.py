@@ -2,17 +2,23 @@
 AI Tutor service using RAG (Retrieval-Augmented Generation)
 Answers user questions based on video content with source citations
 """
-import openai
 from typing import List, Dict, Optional
-from pathlib import Path
-import json
+import asyncio
+import logging
 import uuid
 from datetime import datetime
 from app.core.config import settings
+from app.core.metrics import timed_stage, record_llm_usage
+from app.core.storage import get_store
 from app.services.embeddings import EmbeddingService
+from app.services.dedup import collapse_duplicates, load_embedded_chunks
+from app.services.suggestions import load_suggestions
+from app.services.analytics import analytics_writer
+from app.services.search_scope import SearchScope, in_time_range, resolve_scope
 from app.models.schemas import TutorResponse
 import numpy as np
 
+logger = logging.getLogger(__name__)
 
 class AITutorService:
     """Service for conversational AI tutoring using RAG"""
@@ -21,6 +27,7 @@ class AITutorService:
         self.api_key = settings.openai_api_key
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not set in environment")
+        import openai
         openai.api_key = self.api_key
         self.model = "gpt-4"
         self.embedding_service = EmbeddingService()
@@ -31,7 +38,11 @@ class AITutorService:
         video_id: Optional[str] = None,
         session_id: Optional[str] = None,
         top_k: int = 5,
-        context_window: int = 3
+        context_window: int = 3,
+        playlist_id: Optional[str] = None,
+        video_ids: Optional[List[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None
     ) -> TutorResponse:
         """
         Answer a question using RAG
@@ -51,21 +62,30 @@ class AITutorService:
             session_id: Optional - conversation session ID
             top_k: Number of chunks to retrieve (default: 5)
             context_window: Number of previous messages to include (default: 3)
+            playlist_id / video_ids: Optional - limit search to a course or set of videos
+            start / end: Optional - limit search to a window (seconds) of a single video
         
         Returns:
             TutorResponse with answer, sources, confidence, and suggested questions
         """
-        print(f"🤖 AI Tutor processing question: {question[:50]}...")
+        logger.info(f"🤖 AI Tutor processing question: {question[:50]}...")
         
         # Generate session ID if not provided
         if not session_id:
             session_id = str(uuid.uuid4())
         
-        # Step 1: Retrieve relevant chunks
-        relevant_chunks = await self._retrieve_relevant_chunks(
-            question=question,
-            video_id=video_id,
-            top_k=top_k
+        scope = resolve_scope(video_id, video_ids, playlist_id, start, end)
+        
+        # Steps 1-2: Retrieve relevant chunks and load conversation history concurrently
+        # (blocking file reads run in threads so the event loop keeps serving requests)
+        relevant_chunks, conversation_history = await asyncio.gather(
+            self._retrieve_relevant_chunks(
+                question=question,
+                video_id=video_id,
+                top_k=top_k,
+                scope=scope
+            ),
+            asyncio.to_thread(self._load_conversation_history, session_id, context_window)
         )
         
         if not relevant_chunks:
@@ -78,42 +98,44 @@ class AITutorService:
                 session_id=session_id
             )
         
-        print(f"   Retrieved {len(relevant_chunks)} relevant chunks")
-        
-        # Step 2: Load conversation history
-        conversation_history = self._load_conversation_history(session_id, context_window)
+        logger.info(f"   Retrieved {len(relevant_chunks)} relevant chunks")
         
         # Step 3: Build prompt with context
-        prompt = self._build_tutor_prompt(
-            question=question,
-            chunks=relevant_chunks,
-            conversation_history=conversation_history
-        )
+        with timed_stage("prompt_build"):
+            prompt = self._build_tutor_prompt(
+                question=question,
+                chunks=relevant_chunks,
+                conversation_history=conversation_history
+            )
         
         # Step 4: Generate answer with GPT-4
+        import openai
+        
         try:
-            response = await openai.chat.completions.acreate(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,  # Slightly higher for conversational tone
-                max_tokens=800
-            )
+            with timed_stage("llm_call", model=self.model):
+                response = await openai.chat.completions.acreate(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": self._get_system_prompt()
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.7,  # Slightly higher for conversational tone
+                    max_tokens=800
+                )
+            record_llm_usage(getattr(response, "usage", None), self.model)
             
             answer_text = response.choices[0].message.content
             
-            print(f"   Generated answer ({len(answer_text)} chars)")
+            logger.info(f"   Generated answer ({len(answer_text)} chars)")
             
         except Exception as e:
-            print(f"❌ GPT-4 error: {e}")
+            logger.error(f"❌ GPT-4 error: {e}")
             raise
         
         # Step 5: Extract source citations
@@ -122,8 +144,9 @@ class AITutorService:
         # Step 6: Calculate confidence score
         confidence = self._calculate_confidence(relevant_chunks, answer_text)
         
-        # Step 7: Generate suggested follow-up questions
-        suggested_questions = self._generate_suggested_questions(
+        # Step 7: Generate suggested follow-up questions (may read precomputed suggestions)
+        suggested_questions = await asyncio.to_thread(
+            self._generate_suggested_questions,
             question=question,
             answer=answer_text,
             chunks=relevant_chunks
@@ -139,45 +162,102 @@ class AITutorService:
             session_id=session_id
         )
         
-        # Step 9: Save to conversation history
-        self._save_to_history(session_id, question, tutor_response)
+        # Step 9: Save to conversation history and record analytics (buffered)
+        question_index = await asyncio.to_thread(self._save_to_history, session_id, question, tutor_response)
+        analytics_writer.record_question(
+            session_id=session_id,
+            question_index=question_index,
+            video_id=video_id or sources[0]["video_id"],
+            confidence=confidence
+        )
         
-        print(f"✅ Answer generated (confidence: {confidence:.2f})")
+        logger.info(f"✅ Answer generated (confidence: {confidence:.2f})")
         return tutor_response
     
     async def _retrieve_relevant_chunks(
         self,
         question: str,
         video_id: Optional[str],
-        top_k: int
+        top_k: int,
+        scope: Optional[SearchScope] = None
     ) -> List[Dict]:
         """
         Retrieve most relevant chunks using semantic similarity
+        The question is embedded while the index is warmed up off the event loop
         """
-        # Generate embedding for question
-        query_embedding = await self.embedding_service.generate_embedding(question)
+        scope = scope or resolve_scope(video_id)
+        query_embedding, loaded_chunks = await asyncio.gather(
+            self.embedding_service.generate_embedding(question),
+            asyncio.to_thread(self._warm_index, scope)
+        )
         
-        # Load embedded chunks
-        embeddings_dir = Path(settings.storage_path) / "embeddings"
+        # Over-fetch when collapsing near-duplicates so top_k distinct chunks remain
+        fetch_k = top_k * 2 if settings.dedup_enabled else top_k
+        with timed_stage("index_search"):
+            chunks = await asyncio.to_thread(self._search_chunks, query_embedding, scope, fetch_k, loaded_chunks)
         
-        if not embeddings_dir.exists():
-            return []
+        if settings.dedup_enabled:
+            chunks = collapse_duplicates(chunks)
+        return chunks[:top_k]
+    
+    def _warm_index(self, scope: SearchScope) -> Optional[List[Dict]]:
+        """
+        Load the partitions _search_chunks will scan (blocking, run off the event loop)
+        Returns the embedded chunks for the uncompressed path; the compressed
+        and shared indexes keep their own caches and are only warmed
+        """
+        with timed_stage("index_warmup"):
+            if settings.shared_index_enabled and settings.vector_compression == "none":
+                from app.services.index_snapshot import shared_index
+                shared_index.current()
+                return None
+            
+            keys = scope.video_ids if scope.video_ids is not None else get_store().keys("embeddings")
+            if settings.vector_compression != "none":
+                from app.services.vector_compression import get_video_index
+                for key in keys:
+                    get_video_index(key)
+                return None
+            
+            # Load embedded chunks (scoped videos, or every video)
+            all_chunks, vectors = [], {}
+            for key in keys:
+                chunks = load_embedded_chunks(key, vectors)
+                if chunks:
+                    all_chunks.extend(c for c in chunks if in_time_range(c, scope.time_range))
+            return all_chunks
+    
+    def _search_chunks(
+        self,
+        query_embedding: List[float],
+        scope: SearchScope,
+        top_k: int,
+        all_chunks: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """
+        Rank embedded chunks by cosine similarity to the query
+        (all_chunks: chunks already loaded by _warm_index)
+        """
+        if settings.vector_compression != "none":
+            from app.services.vector_compression import search_compressed
+            return search_compressed(
+                query_embedding,
+                video_ids=scope.video_ids,
+                top_k=top_k,
+                time_range=scope.time_range
+            )
+        
+        if settings.shared_index_enabled:
+            from app.services.index_snapshot import shared_index
+            return shared_index.search(
+                query_embedding,
+                top_k=top_k,
+                video_ids=scope.video_ids,
+                time_range=scope.time_range
+            )
         
-        all_chunks = []
-        
-        if video_id:
-            # Search specific video
-            embeddings_file = embeddings_dir / f"{video_id}.json"
-            if embeddings_file.exists():
-                with open(embeddings_file, 'r', encoding='utf-8') as f:
-                    chunks = json.load(f)
-                    all_chunks.extend(chunks)
-        else:
-            # Search all videos
-            for embeddings_file in embeddings_dir.glob("*.json"):
-                with open(embeddings_file, 'r', encoding='utf-8') as f:
-                    chunks = json.load(f)
-                    all_chunks.extend(chunks)
+        if all_chunks is None:
+            all_chunks = self._warm_index(scope)
         
         if not all_chunks:
             return []
@@ -325,12 +405,22 @@ Please answer the student's question based on the video content above. Remember
     ) -> List[str]:
         """
         Generate suggested follow-up questions
-        Simple heuristic-based approach for MVP
+        Prefers questions precomputed for the retrieved videos (their
+        embeddings are already cached), then falls back to heuristics
         """
         suggestions = []
         
-        # Extract topics from chunks
-        chunk_texts = " ".join([c["text"] for c in chunks[:3]])
+        # Precomputed questions nearest to each retrieved chunk's topic
+        for chunk in chunks:
+            entries = load_suggestions(chunk["video_id"]) if chunk.get("video_id") else None
+            entries = entries or []
+            for entry in sorted(entries, key=lambda e: abs(e["chunk_index"] - chunk.get("chunk_index", 0))):
+                candidate = entry["question"]
+                if candidate.strip().lower() != question.strip().lower() and candidate not in suggestions:
+                    suggestions.append(candidate)
+                    break
+        if len(suggestions) >= 3:
+            return suggestions[:3]
         
         # Common follow-up patterns
         if "what" in question.lower():
@@ -358,21 +448,18 @@ Please answer the student's question based on the video content above. Remember
         """
         Load recent conversation history for context
         """
-        history_dir = Path(settings.storage_path) / "conversations"
-        history_file = history_dir / f"{session_id}.json"
-        
-        if not history_file.exists():
-            return []
-        
         try:
-            with open(history_file, 'r', encoding='utf-8') as f:
-                full_history = json.load(f)
+            with timed_stage("history_read"):
+                full_history = get_store().read_json("conversations", session_id)
+            
+            if not full_history:
+                return []
             
             # Return last N entries
             return full_history[-context_window:] if context_window > 0 else []
         
         except Exception as e:
-            print(f"⚠️  Error loading history: {e}")
+            logger.warning(f"⚠️  Error loading history: {e}")
             return []
     
     def _save_to_history(
@@ -380,21 +467,13 @@ Please answer the student's question based on the video content above. Remember
         session_id: str,
         question: str,
         response: TutorResponse
-    ):
+    ) -> int:
         """
         Save Q&A to conversation history
+        Returns the entry's index in the history
         """
-        history_dir = Path(settings.storage_path) / "conversations"
-        history_dir.mkdir(parents=True, exist_ok=True)
-        
-        history_file = history_dir / f"{session_id}.json"
-        
         # Load existing history
-        if history_file.exists():
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-        else:
-            history = []
+        history = get_store().read_json("conversations", session_id) or []
         
         # Add new entry
         entry = {
@@ -408,10 +487,11 @@ Please answer the student's question based on the video content above. Remember
         history.append(entry)
         
         # Save updated history
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2)
+        with timed_stage("history_write"):
+            get_store().write_json("conversations", session_id, history)
         
-        print(f"💾 Saved to conversation history: {session_id}")
+        logger.info(f"💾 Saved to conversation history: {session_id}")
+        return len(history) - 1
     
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """
@@ -423,12 +503,10 @@ Please answer the student's question based on the video content above. Remember
         """
         Clear conversation history for a session
         """
-        history_dir = Path(settings.storage_path) / "conversations"
-        history_file = history_dir / f"{session_id}.json"
-        
-        if history_file.exists():
-            history_file.unlink()
-            print(f"🗑️  Cleared history for session: {session_id}")
+        store = get_store()
+        if store.exists("conversations", session_id):
+            store.delete("conversations", session_id)
+            logger.info(f"🗑️  Cleared history for session: {session_id}")
 
 
 # CLI interface
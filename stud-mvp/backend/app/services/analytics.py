@@ -0,0 +1,247 @@
+"""
+Tutor analytics: buffered event writer and pre-aggregated per-video rollups
+Events are queued in memory and bulk-inserted every N events or T milliseconds;
+each flush also folds the batch into the rollup tables read by the analytics API
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import timed_stage
+from app.models.analytics import TutorEvent, VideoAnalytics, VideoDailyQuestions
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsWriter:
+    """
+    Async buffered writer for tutor events
+
+    record() only appends to an in-memory buffer; a flush is triggered once
+    `batch_size` events are queued and by a background loop every
+    `flush_interval_ms`. The database work runs in a thread so request
+    handlers never wait on it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.analytics_batch_size
+        self.flush_interval_ms = flush_interval_ms or settings.analytics_flush_interval_ms
+        self._buffer: List[Dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Events waiting to be written"""
+        return len(self._buffer)
+
+    def record(self, event_type: str, session_id: str, **fields):
+        """Queue an event (fields are TutorEvent columns)"""
+        self._buffer.append({
+            "event_type": event_type,
+            "session_id": session_id,
+            "created_at": datetime.utcnow(),
+            **fields
+        })
+        if len(self._buffer) >= self.batch_size:
+            try:
+                asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass  # No event loop (CLI use): the next flush() picks it up
+
+    def record_question(
+        self,
+        session_id: str,
+        question_index: int,
+        video_id: Optional[str],
+        confidence: float
+    ):
+        self.record(
+            "question", session_id,
+            question_index=question_index, video_id=video_id, confidence=confidence
+        )
+
+    def record_feedback(
+        self,
+        session_id: str,
+        question_index: int,
+        rating: int,
+        comment: Optional[str] = None,
+        video_id: Optional[str] = None
+    ):
+        # Without a video_id the flush resolves it from the matching question event
+        self.record(
+            "feedback", session_id,
+            question_index=question_index, rating=rating, comment=comment, video_id=video_id
+        )
+
+    async def flush(self) -> int:
+        """Write every queued event; returns the number written"""
+        async with self._flush_lock:
+            events, self._buffer = self._buffer, []
+            if not events:
+                return 0
+            try:
+                with timed_stage("analytics_flush"):
+                    await asyncio.to_thread(self._write, events)
+            except Exception as e:
+                logger.error(f"❌ Dropped {len(events)} analytics events: {e}")
+                return 0
+            return len(events)
+
+    def _write(self, events: List[Dict]):
+        """Bulk insert a batch and apply its rollup deltas in one transaction"""
+        with self.session_factory() as db:
+            self._resolve_video_ids(db, events)
+            db.execute(insert(TutorEvent), events)
+            apply_rollups(db, events)
+            db.commit()
+
+    @staticmethod
+    def _resolve_video_ids(db: Session, events: List[Dict]):
+        """Attribute feedback to the video of the question it rates"""
+        questions = {
+            (e["session_id"], e["question_index"]): e.get("video_id")
+            for e in events if e["event_type"] == "question"
+        }
+        for event in events:
+            if event["event_type"] != "feedback" or event.get("video_id"):
+                continue
+            key = (event["session_id"], event["question_index"])
+            if key not in questions:
+                questions[key] = db.execute(
+                    select(TutorEvent.video_id).where(
+                        TutorEvent.event_type == "question",
+                        TutorEvent.session_id == key[0],
+                        TutorEvent.question_index == key[1]
+                    ).limit(1)
+                ).scalar()
+            event["video_id"] = questions[key]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_ms / 1000)
+            await self.flush()
+
+    async def start(self):
+        """Start the periodic flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop and write whatever is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+def apply_rollups(db: Session, events: List[Dict]):
+    """
+    Fold a batch of events into the per-video rollup tables
+
+    Deltas are aggregated per video (and per day) first, then applied with
+    `column = column + delta` upserts so concurrent workers don't lose counts
+    or collide when both create a video's first row.
+    """
+    totals = defaultdict(lambda: {"question_count": 0, "confidence_sum": 0.0, "rating_count": 0, "rating_sum": 0})
+    daily = defaultdict(int)
+
+    for event in events:
+        video_id = event.get("video_id")
+        if not video_id:
+            continue
+        if event["event_type"] == "question":
+            totals[video_id]["question_count"] += 1
+            totals[video_id]["confidence_sum"] += event.get("confidence") or 0.0
+            daily[(video_id, event["created_at"].date())] += 1
+        elif event["event_type"] == "feedback":
+            totals[video_id]["rating_count"] += 1
+            totals[video_id]["rating_sum"] += event["rating"]
+
+    for video_id, delta in totals.items():
+        _add_to_row(db, VideoAnalytics, {"video_id": video_id}, delta)
+
+    for (video_id, day), count in daily.items():
+        _add_to_row(db, VideoDailyQuestions, {"video_id": video_id, "day": day}, {"question_count": count})
+
+
+def _add_to_row(db: Session, model, keys: Dict, deltas: Dict):
+    """
+    Add `deltas` to the row with primary key `keys`, creating it if missing
+
+    SQLite and PostgreSQL do this in one INSERT ... ON CONFLICT DO UPDATE;
+    other databases update first and, if another worker created the row
+    between the update and the insert, retry the update.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        statement = upsert(model).values(**keys, **deltas)
+        changes = {column: getattr(model, column) + getattr(statement.excluded, column) for column in deltas}
+        if hasattr(model, "updated_at"):
+            changes["updated_at"] = func.now()  # onupdate doesn't fire for ON CONFLICT
+        db.execute(statement.on_conflict_do_update(index_elements=list(keys), set_=changes))
+        return
+
+    increment = (
+        update(model)
+        .where(*(getattr(model, column) == value for column, value in keys.items()))
+        .values({getattr(model, column): getattr(model, column) + value for column, value in deltas.items()})
+    )
+    if db.execute(increment).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values(**keys, **deltas))
+    except IntegrityError:
+        db.execute(increment)
+
+
+def get_video_analytics(db: Session, video_id: str, days: int = 30) -> Optional[Dict]:
+    """
+    Read a video's rollups (one primary-key lookup plus at most `days` rows)
+    Returns None if no events have been recorded for the video
+    """
+    totals = db.get(VideoAnalytics, video_id)
+    if totals is None:
+        return None
+
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    rows = db.execute(
+        select(VideoDailyQuestions.day, VideoDailyQuestions.question_count)
+        .where(VideoDailyQuestions.video_id == video_id, VideoDailyQuestions.day >= since)
+        .order_by(VideoDailyQuestions.day)
+    ).all()
+
+    return {
+        "video_id": video_id,
+        "total_questions": totals.question_count,
+        "average_confidence": round(totals.confidence_sum / totals.question_count, 2) if totals.question_count else None,
+        "total_ratings": totals.rating_count,
+        "average_rating": round(totals.rating_sum / totals.rating_count, 2) if totals.rating_count else None,
+        "questions_per_day": [{"day": day.isoformat(), "questions": count} for day, count in rows]
+    }
+
+
+# Process-wide writer (started and stopped with the app)
+analytics_writer = AnalyticsWriter()
@@ -0,0 +1,301 @@
+"""
+Near-duplicate chunk detection using MinHash + LSH
+Repeated intros, sponsor reads and recaps are linked to one canonical chunk
+so they are embedded and stored only once and collapsed into one search result
+"""
+import asyncio
+import logging
+import re
+import zlib
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.singleflight import job_key, pipeline_jobs
+from app.core.storage import get_store
+
+logger = logging.getLogger(__name__)
+
+_PRIME = np.uint64(4294967311)  # Smallest prime above 2^32
+_WORD_RE = re.compile(r"\w+")
+
+# Serialises index updates between pipelines in this process (the singleflight
+# lock backend does the same across workers)
+_index_lock = asyncio.Lock()
+
+
+def shingles(text: str, k: int = 5) -> Set[str]:
+    """Word k-gram shingles of normalised (lowercased, punctuation-free) text"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures with universal hashing"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2**32 - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (uint64 [num_perm]) of a text's shingle set"""
+        grams = shingles(text)
+        if not grams:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) for g in grams),
+            dtype=np.uint64,
+            count=len(grams)
+        )
+        permuted = (np.outer(hashes, self.a) + self.b) % _PRIME
+        return permuted.min(axis=0)
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity: fraction of matching MinHash slots"""
+    return float(np.mean(sig_a == sig_b))
+
+
+class NearDuplicateDetector:
+    """
+    LSH index of canonical chunk signatures, persisted in the artifact store
+
+    Signatures are split into `bands` bands of `rows` rows; chunks sharing any
+    band bucket are candidates and are confirmed with the estimated Jaccard
+    similarity against `threshold`. Duplicates are remembered per canonical
+    chunk so they can be re-pointed when that chunk goes away.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self.dependents: Dict[str, Dict[str, np.ndarray]] = {}
+        self.generation = 0  # Bumped on every save
+
+    @staticmethod
+    def ref(video_id: str, chunk_index: int) -> str:
+        return f"{video_id}:{chunk_index}"
+
+    @staticmethod
+    def parse_ref(ref: str) -> Dict:
+        video_id, chunk_index = ref.rsplit(":", 1)
+        return {"video_id": video_id, "chunk_index": int(chunk_index)}
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, ref: str, signature: np.ndarray):
+        """Register a canonical chunk"""
+        self.signatures[ref] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(ref)
+
+    def find(self, signature: np.ndarray) -> Optional[str]:
+        """Return the most similar canonical chunk above threshold, if any"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best_ref, best_score = None, self.threshold
+        for ref in candidates:
+            score = estimate_jaccard(signature, self.signatures[ref])
+            if score >= best_score:
+                best_ref, best_score = ref, score
+        return best_ref
+
+    def remove_video(self, video_id: str) -> Dict[str, Optional[str]]:
+        """
+        Forget every chunk of a video (before re-processing it)
+
+        Duplicates in other videos of a removed canonical chunk are re-pointed:
+        the first becomes canonical and the rest link to it. Returns those
+        chunks as {ref: new canonical ref, or None if it became canonical}.
+        """
+        prefix = f"{video_id}:"
+        for duplicates in self.dependents.values():
+            for ref in [r for r in duplicates if r.startswith(prefix)]:
+                del duplicates[ref]
+        removed = {ref for ref in self.signatures if ref.startswith(prefix)}
+        for ref in removed:
+            del self.signatures[ref]
+        for key in list(self.buckets):
+            remaining = [r for r in self.buckets[key] if r not in removed]
+            if remaining:
+                self.buckets[key] = remaining
+            else:
+                del self.buckets[key]
+
+        repointed: Dict[str, Optional[str]] = {}
+        for ref in sorted(removed):
+            orphans = self.dependents.pop(ref, None)
+            if not orphans:
+                continue
+            canonical, *rest = sorted(orphans)
+            self.add(canonical, orphans[canonical])
+            repointed[canonical] = None
+            if rest:
+                self.dependents[canonical] = {r: orphans[r] for r in rest}
+                repointed.update(dict.fromkeys(rest, canonical))
+        self.dependents = {ref: dups for ref, dups in self.dependents.items() if dups}
+        return repointed
+
+    def mark_duplicates(self, chunks: List[Dict]) -> int:
+        """
+        Link near-duplicate chunks to their canonical chunk
+
+        Duplicates get a "duplicate_of" reference ({video_id, chunk_index}) and
+        are not registered; unique chunks become canonical. Earlier chunks of
+        the same video are also considered. Returns the number of duplicates.
+        """
+        duplicates = 0
+        for chunk in chunks:
+            signature = self.hasher.signature(chunk["text"])
+            match = self.find(signature)
+            ref = self.ref(chunk["video_id"], chunk["chunk_index"])
+            if match:
+                chunk["duplicate_of"] = self.parse_ref(match)
+                self.dependents.setdefault(match, {})[ref] = signature
+                duplicates += 1
+            else:
+                chunk.pop("duplicate_of", None)
+                self.add(ref, signature)
+        return duplicates
+
+    @classmethod
+    def load(cls) -> "NearDuplicateDetector":
+        """Load the persisted index (empty if none exists yet)"""
+        detector = cls(threshold=settings.dedup_threshold)
+        stored = get_store().read_json("dedup", "signatures") or {}
+        detector.generation = stored.get("generation", 0)
+        for ref, signature in stored.get("signatures", {}).items():
+            detector.add(ref, np.asarray(signature, dtype=np.uint64))
+        for ref, duplicates in stored.get("dependents", {}).items():
+            detector.dependents[ref] = {
+                dup: np.asarray(signature, dtype=np.uint64) for dup, signature in duplicates.items()
+            }
+        return detector
+
+    def save(self):
+        """Persist canonical signatures and the duplicates linked to each"""
+        self.generation += 1
+        get_store().write_json("dedup", "signatures", {
+            "generation": self.generation,
+            "signatures": {ref: sig.tolist() for ref, sig in self.signatures.items()},
+            "dependents": {
+                ref: {dup: sig.tolist() for dup, sig in duplicates.items()}
+                for ref, duplicates in self.dependents.items()
+            }
+        })
+
+
+@asynccontextmanager
+async def index_lock():
+    """
+    Hold while reading or writing the index (and the "duplicate_of" links it
+    keeps in stored embeddings), so concurrent pipelines don't overwrite each
+    other's updates
+    """
+    async with _index_lock:
+        async with pipeline_jobs.lock.acquire(job_key("dedup", "signatures")):
+            yield
+
+
+def resolve_duplicates(
+    chunks: List[Dict],
+    vectors: Optional[Dict[str, Dict[int, List[float]]]] = None
+) -> List[Dict]:
+    """
+    Give stored duplicates (in place) their canonical chunk's vector, so they
+    are searched under their own video_id and start/end
+
+    Canonical vectors are read from the canonical video's stored embeddings;
+    pass `vectors` (video_id -> chunk_index -> vector) to share those reads
+    across calls. Duplicates whose canonical is missing stay without a vector.
+    """
+    vectors = {} if vectors is None else vectors
+    for chunk in chunks:
+        link = chunk.get("duplicate_of")
+        if not link or chunk.get("embedding"):
+            continue
+        if link["video_id"] not in vectors:
+            vectors[link["video_id"]] = {
+                c["chunk_index"]: c["embedding"]
+                for c in get_store().read_json("embeddings", link["video_id"]) or []
+                if c.get("embedding")
+            }
+        embedding = vectors[link["video_id"]].get(link["chunk_index"])
+        if embedding:
+            chunk["embedding"] = embedding
+    return chunks
+
+
+def load_embedded_chunks(
+    video_id: str,
+    vectors: Optional[Dict[str, Dict[int, List[float]]]] = None
+) -> Optional[List[Dict]]:
+    """A video's stored chunks with duplicates resolved (None if not embedded)"""
+    chunks = get_store().read_json("embeddings", video_id)
+    return resolve_duplicates(chunks, vectors) if chunks else chunks
+
+
+def repoint_duplicates(repointed: Dict[str, Optional[str]]):
+    """
+    Update "duplicate_of" in the stored embeddings of chunks re-pointed by
+    remove_video. A chunk that became canonical takes over its old canonical's
+    vector, so call this before that video's new embeddings are saved.
+    """
+    by_video: Dict[str, Dict[int, Optional[str]]] = {}
+    for ref, canonical in repointed.items():
+        link = NearDuplicateDetector.parse_ref(ref)
+        by_video.setdefault(link["video_id"], {})[link["chunk_index"]] = canonical
+
+    store = get_store()
+    vectors: Dict[str, Dict[int, List[float]]] = {}
+    for video_id, changes in by_video.items():
+        chunks = store.read_json("embeddings", video_id)
+        if not chunks:
+            continue
+        for chunk in chunks:
+            if chunk["chunk_index"] not in changes:
+                continue
+            canonical = changes[chunk["chunk_index"]]
+            if canonical:
+                chunk["duplicate_of"] = NearDuplicateDetector.parse_ref(canonical)
+                chunk.pop("embedding", None)
+            else:
+                resolve_duplicates([chunk], vectors)
+                chunk.pop("duplicate_of", None)
+        store.write_json("embeddings", video_id, chunks)
+
+
+def collapse_duplicates(chunks: List[Dict], threshold: Optional[float] = None) -> List[Dict]:
+    """
+    Drop search results that are near-duplicates of a higher-ranked result
+
+    Expects chunks sorted best-first; the surviving chunk records how many
+    copies were collapsed into it under "duplicates".
+    """
+    if threshold is None:
+        threshold = settings.dedup_threshold
+    hasher = MinHasher()
+    kept: List[Tuple[Dict, np.ndarray]] = []
+    for chunk in chunks:
+        signature = hasher.signature(chunk["text"])
+        for other, other_sig in kept:
+            if estimate_jaccard(signature, other_sig) >= threshold:
+                other["duplicates"] = other.get("duplicates", 0) + 1
+                break
+        else:
+            kept.append((chunk, signature))
+    return [chunk for chunk, _ in kept]
@@ -2,21 +2,64 @@
 Chunking and embedding service for transcript processing
 Prepares transcript chunks for RAG-based AI tutor
 """
-import tiktoken
-from typing import List, Dict
-from pathlib import Path
-import json
-import openai
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+import logging
 from app.core.config import settings
+from app.core.metrics import timed_stage, registry
+from app.core.storage import get_store
 from app.models.schemas import TranscriptData, TranscriptChunk
 
+logger = logging.getLogger(__name__)
+
+SENTENCE_ENDINGS = (".", "?", "!")
+
+# Query embedding cache: (model, normalised text) -> embedding, LRU-bounded
+QUERY_CACHE_SIZE = 2048
+_query_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+QUERY_CACHE_LOOKUPS = registry.counter(
+    "stud_query_embedding_cache_total",
+    "Query embedding cache lookups by result"
+)
+
+
+def _query_cache_key(model: str, text: str) -> Tuple[str, str]:
+    return model, " ".join(text.split())
+
+
+def get_cached_query_embedding(model: str, text: str) -> Optional[List[float]]:
+    """Return a cached query embedding (and mark it recently used)"""
+    key = _query_cache_key(model, text)
+    embedding = _query_cache.get(key)
+    if embedding is not None:
+        _query_cache.move_to_end(key)
+    return embedding
+
+
+def cache_query_embedding(model: str, text: str, embedding: List[float]):
+    """Store a query embedding, evicting the least recently used entry if full"""
+    key = _query_cache_key(model, text)
+    _query_cache[key] = embedding
+    _query_cache.move_to_end(key)
+    while len(_query_cache) > QUERY_CACHE_SIZE:
+        _query_cache.popitem(last=False)
+
 
 class ChunkingService:
     """Service for chunking transcripts into semantic units"""
     
     def __init__(self, max_tokens: int = 800):
         self.max_tokens = max_tokens
-        self.encoding = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
+        self._encoding = None
+    
+    @property
+    def encoding(self):
+        """tiktoken encoding, loaded on first use (GPT-4 encoding)"""
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding("cl100k_base")
+        return self._encoding
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text using tiktoken"""
@@ -65,6 +108,52 @@ class ChunkingService:
         
         return merged_chunks
     
+    def word_token_offsets(self, words: List[str]) -> List[int]:
+        """
+        Prefix sums of per-word token counts (len(words) + 1 entries)
+        Words carry their leading space, as Whisper emits them, so per-word
+        counts add up to (almost exactly) the count of the joined text
+        """
+        offsets = [0]
+        for word in words:
+            offsets.append(offsets[-1] + len(self.encoding.encode(word)))
+        return offsets
+    
+    def chunk_words(self, word_timings: Dict) -> List[Dict]:
+        """
+        Cut word-level timings (see TranscriptionService.extract_word_timings)
+        into chunks of at most max_tokens, with each chunk's start/end taken
+        from its first and last word. A cut is moved back to the last sentence
+        end in the final quarter of the budget when there is one.
+        """
+        words = word_timings["words"]
+        starts, ends = word_timings["start"], word_timings["end"]
+        offsets = word_timings.get("token_offsets") or self.word_token_offsets(words)
+        
+        chunks = []
+        i = 0
+        while i < len(words):
+            # Furthest word end that keeps the chunk within budget (at least one word)
+            j = max(bisect_right(offsets, offsets[i] + self.max_tokens) - 1, i + 1)
+            if j < len(words):
+                floor = offsets[i] + self.max_tokens * 3 // 4
+                for k in range(j, i, -1):
+                    if offsets[k] < floor:
+                        break
+                    if words[k - 1].rstrip().endswith(SENTENCE_ENDINGS):
+                        j = k
+                        break
+            chunks.append({
+                "video_id": word_timings["video_id"],
+                "chunk_index": len(chunks),
+                "start": starts[i],
+                "end": ends[j - 1],
+                "text": "".join(words[i:j]).strip(),
+                "tokens": offsets[j] - offsets[i]
+            })
+            i = j
+        return chunks
+    
     def chunk_transcript(self, transcript_data: TranscriptData) -> List[Dict]:
         """
         Main method: Chunk transcript into optimal-sized segments
@@ -100,19 +189,32 @@ class EmbeddingService:
         self.api_key = settings.openai_api_key
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not set in environment")
+        import openai
         openai.api_key = self.api_key
-        self.model = "text-embedding-3-small"  # OpenAI's latest efficient model
+        self.model = settings.embedding_model  # Default: text-embedding-3-small
     
     async def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
         Returns 1536-dimensional vector (text-embedding-3-small)
+        Results are cached so repeated questions skip the API round-trip
         """
-        response = await openai.embeddings.acreate(
-            model=self.model,
-            input=text
-        )
-        return response.data[0].embedding
+        cached = get_cached_query_embedding(self.model, text)
+        if cached is not None:
+            QUERY_CACHE_LOOKUPS.inc(result="hit")
+            return cached
+        QUERY_CACHE_LOOKUPS.inc(result="miss")
+        
+        import openai
+        
+        with timed_stage("embedding_call", mode="single"):
+            response = await openai.embeddings.acreate(
+                model=self.model,
+                input=text
+            )
+        embedding = response.data[0].embedding
+        cache_query_embedding(self.model, text, embedding)
+        return embedding
     
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """
@@ -122,16 +224,19 @@ class EmbeddingService:
         if not texts:
             return []
         
+        import openai
+        
         # Split into batches of 2048
         batch_size = 2048
         all_embeddings = []
         
         for i in range(0, len(texts), batch_size):
             batch = texts[i:i+batch_size]
-            response = await openai.embeddings.acreate(
-                model=self.model,
-                input=batch
-            )
+            with timed_stage("embedding_call", mode="batch"):
+                response = await openai.embeddings.acreate(
+                    model=self.model,
+                    input=batch
+                )
             batch_embeddings = [item.embedding for item in response.data]
             all_embeddings.extend(batch_embeddings)
         
@@ -141,26 +246,37 @@ class EmbeddingService:
         """
         Generate embeddings for all chunks
         Adds 'embedding' field to each chunk dict
+        Chunks linked to a canonical chunk ('duplicate_of') and chunks that
+        already have an embedding are skipped
         """
-        texts = [chunk["text"] for chunk in chunks]
+        to_embed = [c for c in chunks if not c.get("duplicate_of") and not c.get("embedding")]
+        texts = [chunk["text"] for chunk in to_embed]
         embeddings = await self.generate_embeddings_batch(texts)
         
-        for chunk, embedding in zip(chunks, embeddings):
+        for chunk, embedding in zip(to_embed, embeddings):
             chunk["embedding"] = embedding
         
         return chunks
     
     def save_embedded_chunks(self, chunks: List[Dict], video_id: str):
-        """Save chunks with embeddings to JSON file"""
-        output_dir = Path(settings.storage_path) / "embeddings"
-        output_dir.mkdir(parents=True, exist_ok=True)
+        """Save chunks with embeddings to the artifact store"""
+        with timed_stage("embeddings_write"):
+            get_store().write_json("embeddings", video_id, chunks)
+            
+            # Full-precision sidecar used to rescore compressed search results
+            # (one row per searchable chunk, so duplicates take their canonical vector)
+            if settings.vector_compression != "none":
+                from app.services.dedup import resolve_duplicates
+                from app.services.vector_compression import write_full_precision
+                write_full_precision(resolve_duplicates([dict(c) for c in chunks]), video_id)
         
-        output_file = output_dir / f"{video_id}.json"
+        # Publish a new shared snapshot generation; other workers pick it up on their next query
+        if settings.shared_index_enabled:
+            from app.services.index_snapshot import publish_snapshot
+            with timed_stage("index_publish"):
+                publish_snapshot()
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(chunks, f, indent=2)
-        
-        print(f"✅ Saved {len(chunks)} embedded chunks to: {output_file}")
+        logger.info(f"✅ Saved {len(chunks)} embedded chunks: {video_id}")
 
 
 class VectorStoreService:
@@ -193,7 +309,7 @@ class VectorStoreService:
         """
         # TODO: Implement Weaviate indexing
         # For now, embeddings are saved to JSON files
-        print(f"⏳ Vector DB indexing not yet implemented. Using JSON storage.")
+        logger.info("⏳ Vector DB indexing not yet implemented. Using JSON storage.")
         pass
     
     async def search_similar_chunks(self, query_embedding: List[float], top_k: int = 5) -> List[Dict]:
@@ -207,6 +323,34 @@ class VectorStoreService:
         pass
 
 
+async def _save_deduplicated(embedding_service, detector, repointed: Dict, chunks: List[Dict], video_id: str):
+    """
+    Save a video's embeddings together with the dedup index update
+
+    Embedding ran without the index lock, so if another pipeline saved the
+    index meanwhile the chunks are linked again against its version; chunks
+    that became canonical are embedded (outside the lock) before retrying.
+    """
+    from app.services.dedup import NearDuplicateDetector, index_lock, repoint_duplicates
+    
+    while True:
+        async with index_lock():
+            latest = NearDuplicateDetector.load()
+            if latest.generation != detector.generation:
+                detector = latest
+                repointed = detector.remove_video(video_id)
+                detector.mark_duplicates(chunks)
+            if all(c.get("embedding") for c in chunks if not c.get("duplicate_of")):
+                for chunk in chunks:
+                    if chunk.get("duplicate_of"):
+                        chunk.pop("embedding", None)  # Resolved from the canonical chunk when searched
+                repoint_duplicates(repointed)
+                embedding_service.save_embedded_chunks(chunks, video_id)
+                detector.save()
+                return
+        await embedding_service.embed_chunks(chunks)
+
+
 # Combined pipeline
 async def process_transcript_for_rag(video_id: str):
     """
@@ -227,32 +371,59 @@ async def process_transcript_for_rag(video_id: str):
     if not transcript:
         raise ValueError(f"Transcript not found for video: {video_id}")
     
-    print(f"📄 Processing transcript for {video_id}")
-    print(f"   Original chunks: {len(transcript.transcript)}")
+    logger.info(f"📄 Processing transcript for {video_id}")
+    logger.info(f"   Original chunks: {len(transcript.transcript)}")
     
-    # Chunk transcript
-    chunking_service = ChunkingService(max_tokens=800)
-    chunks = chunking_service.chunk_transcript(transcript)
-    print(f"   Merged chunks: {len(chunks)}")
+    # Chunk transcript (at exact word boundaries when word timings were stored)
+    chunking_service = ChunkingService(max_tokens=settings.chunk_max_tokens)
+    word_timings = get_store().read_json("words", video_id) if settings.word_timestamps else None
+    with timed_stage("chunking"):
+        if word_timings:
+            chunks = chunking_service.chunk_words(word_timings)
+        else:
+            chunks = chunking_service.chunk_transcript(transcript)
+    logger.info(f"   Merged chunks: {len(chunks)}")
     
     total_tokens = sum(c["tokens"] for c in chunks)
     avg_tokens = total_tokens / len(chunks) if chunks else 0
-    print(f"   Total tokens: {total_tokens}")
-    print(f"   Avg tokens/chunk: {avg_tokens:.0f}")
+    logger.info(f"   Total tokens: {total_tokens}")
+    logger.info(f"   Avg tokens/chunk: {avg_tokens:.0f}")
     
-    # Generate embeddings
+    # Link near-duplicates (repeated intros, sponsor reads, recaps) to a canonical chunk
+    detector, repointed = None, {}
+    if settings.dedup_enabled:
+        from app.services.dedup import NearDuplicateDetector, index_lock
+        async with index_lock():
+            detector = NearDuplicateDetector.load()
+            repointed = detector.remove_video(video_id)
+            with timed_stage("dedup"):
+                duplicates = detector.mark_duplicates(chunks)
+        logger.info(f"   Near-duplicate chunks: {duplicates}")
+    
+    # Generate embeddings (canonical chunks only)
     embedding_service = EmbeddingService()
     embedded_chunks = await embedding_service.embed_chunks(chunks)
-    print(f"   Generated {len(embedded_chunks)} embeddings")
+    logger.info(f"   Generated {sum(1 for c in embedded_chunks if c.get('embedding'))} embeddings")
     
     # Save to JSON
-    embedding_service.save_embedded_chunks(embedded_chunks, video_id)
+    if detector:
+        await _save_deduplicated(embedding_service, detector, repointed, embedded_chunks, video_id)
+    else:
+        embedding_service.save_embedded_chunks(embedded_chunks, video_id)
+    
+    # Precompute suggested questions from chunk clusters (served by /tutor/suggest)
+    if settings.suggested_questions_enabled:
+        from app.services.suggestions import SuggestionService
+        try:
+            await SuggestionService(embedding_service).generate_for_video(video_id, embedded_chunks)
+        except Exception as e:
+            logger.warning(f"⚠️  Suggested question generation failed for {video_id}: {e}")
     
     # Index in vector DB (TODO for production)
     vector_store = VectorStoreService()
     await vector_store.index_chunks(embedded_chunks)
     
-    print(f"✅ RAG processing complete for {video_id}")
+    logger.info(f"✅ RAG processing complete for {video_id}")
     return embedded_chunks
 
 
@@ -0,0 +1,289 @@
+"""
+Shared, memory-mapped index snapshots for multi-worker deployments
+One immutable file per generation holds every chunk vector plus metadata offsets;
+workers mmap it read-only so vector memory is paid once per host
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.storage import get_store
+from app.services.search_scope import in_time_range
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"STUDIDX1"
+ALIGNMENT = 64
+KEEP_GENERATIONS = 2
+
+# File layout:
+#   MAGIC | uint32 header length | header JSON | pad to 64 bytes
+#   vectors   float32 [count, dims]   (L2-normalised)
+#   offsets   int64   [count + 1]     (byte offsets into the metadata block)
+#   metadata  UTF-8 JSON per row (chunk dict without its embedding)
+
+
+def _index_dir() -> Path:
+    return Path(settings.storage_path) / "index"
+
+
+def _snapshot_path(generation: int) -> Path:
+    return _index_dir() / f"snapshot-{generation:08d}.idx"
+
+
+def _align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def current_generation() -> int:
+    """Generation number published in index/CURRENT (0 if none)"""
+    try:
+        return int((_index_dir() / "CURRENT").read_text().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+class IndexSnapshot:
+    """Read-only view over one snapshot file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        # The mapping stays valid after the file is closed (or unlinked); it is
+        # released once the last array view is garbage collected
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not an index snapshot: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + header_len])
+
+        self.generation = self.header["generation"]
+        self.count = self.header["count"]
+        self.dims = self.header["dims"]
+        self.videos: Dict[str, List] = self.header["videos"]
+        self.vectors = np.frombuffer(
+            self._mmap, dtype=np.float32, count=self.count * self.dims,
+            offset=self.header["vectors_offset"]
+        ).reshape(self.count, self.dims)
+        self.offsets = np.frombuffer(
+            self._mmap, dtype=np.int64, count=self.count + 1,
+            offset=self.header["offsets_offset"]
+        )
+        self._meta_offset = self.header["meta_offset"]
+
+    def raw_metadata(self, row: int) -> bytes:
+        """One row's encoded chunk metadata"""
+        begin = self._meta_offset + int(self.offsets[row])
+        end = self._meta_offset + int(self.offsets[row + 1])
+        return self._mmap[begin:end]
+
+    def metadata(self, row: int) -> Dict:
+        """Decode one row's chunk metadata"""
+        return json.loads(self.raw_metadata(row))
+
+    def rows_for(self, video_ids: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Row indices for the given videos (None means every row)"""
+        if video_ids is None:
+            return None
+        ranges = [self.videos[v][:2] for v in video_ids if v in self.videos]
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in ranges])
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        video_ids: Optional[List[str]] = None,
+        time_range: Optional[Tuple[float, float]] = None
+    ) -> List[Dict]:
+        """
+        Exact cosine search over the mapped vectors
+        Only the row ranges of the requested videos are scored; a time range
+        (single-video scopes) drops rows before scoring
+        """
+        if self.count == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        rows = self.rows_for(video_ids)
+        if time_range is not None:
+            candidates = np.arange(self.count) if rows is None else rows
+            rows = candidates[[in_time_range(self.metadata(int(r)), time_range) for r in candidates]]
+        if rows is not None and len(rows) == 0:
+            return []
+        scores = (self.vectors if rows is None else self.vectors[rows]) @ query
+
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for i in best:
+            row = int(i) if rows is None else int(rows[i])
+            chunk = self.metadata(row)
+            chunk["similarity"] = float(scores[i])
+            results.append(chunk)
+        return results
+
+
+def _write_snapshot(path: Path, generation: int, videos: Dict[str, Tuple[float, np.ndarray, List[bytes]]]):
+    """Serialise vectors and metadata for every video into one file"""
+    dims = next((v[1].shape[1] for v in videos.values() if len(v[1])), 0)
+    video_rows, all_vectors, all_meta = {}, [], []
+    row = 0
+    for video_id in sorted(videos):
+        mtime, vectors, meta = videos[video_id]
+        video_rows[video_id] = [row, row + len(meta), mtime]
+        if len(meta):
+            all_vectors.append(vectors)
+            all_meta.extend(meta)
+        row += len(meta)
+
+    vectors = np.concatenate(all_vectors) if all_vectors else np.empty((0, dims), dtype=np.float32)
+    offsets = np.zeros(row + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(m) for m in all_meta]) if all_meta else []
+
+    header = {
+        "generation": generation,
+        "count": row,
+        "dims": dims,
+        "videos": video_rows,
+    }
+    # Offsets depend on the header's own length; two passes settle the sizes
+    for _ in range(2):
+        header_bytes = json.dumps(header).encode("utf-8")
+        header["vectors_offset"] = _align(len(MAGIC) + 4 + len(header_bytes) + 64)
+        header["offsets_offset"] = _align(header["vectors_offset"] + vectors.nbytes)
+        header["meta_offset"] = header["offsets_offset"] + offsets.nbytes
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        f.write(b"\0" * (header["vectors_offset"] - f.tell()))
+        f.write(vectors.astype(np.float32).tobytes())
+        f.write(b"\0" * (header["offsets_offset"] - f.tell()))
+        f.write(offsets.tobytes())
+        for meta in all_meta:
+            f.write(meta)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _load_video(video_id: str) -> Tuple[np.ndarray, List[bytes]]:
+    from app.services.dedup import load_embedded_chunks
+    chunks = [c for c in load_embedded_chunks(video_id) or [] if c.get("embedding")]
+    if not chunks:
+        return np.empty((0, 0), dtype=np.float32), []
+    vectors = np.asarray([c["embedding"] for c in chunks], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    meta = [
+        json.dumps({k: v for k, v in c.items() if k != "embedding"}).encode("utf-8")
+        for c in chunks
+    ]
+    return vectors / norms, meta
+
+
+def publish_snapshot() -> int:
+    """
+    Build and atomically publish a new snapshot generation
+
+    Rows for videos whose embeddings are unchanged are copied from the
+    current snapshot; only new or modified videos are re-read from the store.
+    The new file is written under a temp name, renamed into place, and then
+    index/CURRENT is swapped (temp + rename) so readers never see a partial file.
+    Returns the published generation.
+    """
+    import fcntl
+
+    index_dir = _index_dir()
+    index_dir.mkdir(parents=True, exist_ok=True)
+    store = get_store()
+
+    with open(index_dir / "publish.lock", "a+") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+        previous_gen = current_generation()
+        previous = None
+        if previous_gen and _snapshot_path(previous_gen).exists():
+            previous = IndexSnapshot(_snapshot_path(previous_gen))
+
+        videos = {}
+        reused = 0
+        for video_id in store.keys("embeddings"):
+            mtime = store.version("embeddings", video_id)
+            if mtime is None:
+                continue  # Deleted while listing
+            old = previous.videos.get(video_id) if previous else None
+            if old and old[2] == mtime:
+                start, end = old[0], old[1]
+                vectors = np.array(previous.vectors[start:end])
+                meta = [previous.raw_metadata(r) for r in range(start, end)]
+                reused += 1
+            else:
+                vectors, meta = _load_video(video_id)
+            videos[video_id] = (mtime, vectors, meta)
+
+        generation = previous_gen + 1
+        tmp_path = _snapshot_path(generation).with_suffix(".idx.tmp")
+        _write_snapshot(tmp_path, generation, videos)
+        os.replace(tmp_path, _snapshot_path(generation))
+
+        current_tmp = index_dir / "CURRENT.tmp"
+        current_tmp.write_text(str(generation))
+        os.replace(current_tmp, index_dir / "CURRENT")
+
+        # Readers keep using an unlinked file until they notice the new generation
+        for old_file in index_dir.glob("snapshot-*.idx"):
+            old_gen = int(old_file.stem.split("-")[1])
+            if old_gen <= generation - KEEP_GENERATIONS:
+                old_file.unlink(missing_ok=True)
+
+    logger.info(f"📦 Published index snapshot generation {generation} "
+                f"({len(videos)} videos, {reused} reused)")
+    return generation
+
+
+class SharedIndex:
+    """Per-worker handle that follows the published generation"""
+
+    def __init__(self):
+        self._snapshot: Optional[IndexSnapshot] = None
+
+    def current(self) -> Optional[IndexSnapshot]:
+        """Return the latest snapshot, re-mapping if the generation was bumped"""
+        generation = current_generation()
+        if generation == 0:
+            return None
+        if self._snapshot is None or self._snapshot.generation != generation:
+            path = _snapshot_path(generation)
+            if not path.exists():
+                return self._snapshot
+            self._snapshot = IndexSnapshot(path)
+            logger.info(f"🔄 Mapped index snapshot generation {generation}")
+        return self._snapshot
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        video_ids: Optional[List[str]] = None,
+        time_range: Optional[Tuple[float, float]] = None
+    ) -> List[Dict]:
+        snapshot = self.current()
+        if snapshot is None:
+            return []
+        return snapshot.search(query_embedding, top_k, video_ids, time_range)
+
+
+# Process-wide handle (each worker maps the same file)
+shared_index = SharedIndex()
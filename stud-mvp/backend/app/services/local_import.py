@@ -0,0 +1,271 @@
+"""
+Bulk import of local lecture recordings (not on YouTube)
+Discovers media files, fingerprints them and runs decode + Whisper in a process
+pool; chunking and embedding run in the parent as transcripts come back
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO
+from app.core.config import settings
+from app.core.storage import get_store
+
+logger = logging.getLogger(__name__)
+
+MEDIA_EXTENSIONS = {
+    ".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg", ".opus",
+    ".mp4", ".mkv", ".webm", ".mov", ".avi", ".m4v",
+}
+
+# Approximate resident memory (GB) of one worker holding a Whisper model on CPU
+WHISPER_WORKER_MEMORY_GB = {"tiny": 1.0, "base": 1.0, "small": 2.0, "medium": 5.0, "large": 10.0}
+
+FINGERPRINT_SAMPLE_BYTES = 1 << 20
+
+
+def discover_media(root: Path, recursive: bool = True) -> List[Path]:
+    """Audio/video files under root, sorted by path"""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        p for p in root.glob(pattern)
+        if p.is_file() and p.suffix.lower() in MEDIA_EXTENSIONS and not p.name.startswith(".")
+    )
+
+
+def fingerprint(path: Path) -> str:
+    """
+    Content fingerprint: sha256 of the size plus 1 MB samples from the start,
+    middle and end of the file. Renamed or moved copies map to the same value
+    without reading multi-GB recordings end to end.
+    """
+    size = path.stat().st_size
+    digest = hashlib.sha256(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(size // 2 - FINGERPRINT_SAMPLE_BYTES // 2, 0), max(size - FINGERPRINT_SAMPLE_BYTES, 0)}):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def video_id_for(fp: str) -> str:
+    """Stable video_id for an imported file (the same content always gets the same id)"""
+    return f"local-{fp[:16]}"
+
+
+def default_workers(num_files: Optional[int] = None) -> int:
+    """
+    Pool size for this machine: CPU cores divided by the threads each
+    Whisper worker uses, capped by available memory and the number of files
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, cpus // max(settings.import_threads_per_worker, 1))
+    try:
+        available_gb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES") / 1024 ** 3
+        per_worker = WHISPER_WORKER_MEMORY_GB.get(settings.whisper_model, 2.0)
+        workers = min(workers, max(1, int(available_gb // per_worker)))
+    except (ValueError, OSError, AttributeError):
+        pass  # sysconf names are not available on every platform
+    if num_files is not None:
+        workers = min(workers, max(num_files, 1))
+    return workers
+
+
+# One TranscriptionService (and Whisper model) per worker process
+_worker_service = None
+
+
+def _init_worker(threads: int):
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _transcribe_file(path: str, video_id: str) -> Dict:
+    """Worker: decode + Whisper + save the transcript; returns timing info"""
+    global _worker_service
+    if _worker_service is None:
+        from app.services.transcription import TranscriptionService
+        _worker_service = TranscriptionService()
+
+    start = time.perf_counter()
+    samples, duration = _worker_service.decode_audio(Path(path))
+    result = _worker_service.transcribe_audio(samples)
+    transcript = _worker_service.process_transcript_segments(result, video_id)
+    _worker_service.save_transcript(transcript)
+    _worker_service.save_word_timings(result, video_id)
+    return {"video_id": video_id, "duration_seconds": duration, "seconds": time.perf_counter() - start}
+
+
+def _embed_video(video_id: str):
+    from app.services.embeddings import process_transcript_for_rag
+    asyncio.run(process_transcript_for_rag(video_id))
+
+
+class ProgressBar:
+    """Single-line progress bar on a terminal stream (plain lines otherwise)"""
+
+    def __init__(self, total: int, stream: TextIO = sys.stderr, width: int = 30):
+        self.total = total
+        self.stream = stream
+        self.width = width
+        self.done = 0
+        self.started = time.perf_counter()
+        self.interactive = stream.isatty()
+
+    def update(self, status: str, advance: int = 1):
+        self.done += advance
+        filled = int(self.width * self.done / self.total) if self.total else self.width
+        elapsed = time.perf_counter() - self.started
+        eta = elapsed / self.done * (self.total - self.done) if self.done else 0
+        line = (f"[{'#' * filled}{'-' * (self.width - filled)}] {self.done}/{self.total} "
+                f"{elapsed / 60:.1f}m elapsed, ~{eta / 60:.1f}m left  {status}")
+        if self.interactive:
+            self.stream.write("\r" + line[:160].ljust(160))
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def close(self):
+        if self.interactive:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def _record_import(path: Path, fp: str, video_id: str, duration: Optional[float], status: str):
+    get_store().write_json("imports", video_id, {
+        "video_id": video_id,
+        "title": path.stem,
+        "source_path": str(path),
+        "fingerprint": fp,
+        "duration_seconds": duration,
+        "status": status,
+        "updated_at": datetime.utcnow().isoformat(),
+    })
+
+
+def import_directory(
+    root: Path,
+    workers: Optional[int] = None,
+    recursive: bool = True,
+    embed: bool = True,
+    executor: Optional[Executor] = None,
+    progress_stream: TextIO = sys.stderr
+) -> Dict:
+    """
+    Import every media file under root
+
+    Resumable: a file whose transcript (and embeddings) already exist under its
+    fingerprint-derived video_id is skipped, and a file interrupted between
+    transcription and embedding only re-runs the embedding. An "imports"
+    record per video keeps the original path and title.
+    """
+    files = discover_media(Path(root), recursive=recursive)
+    store = get_store()
+
+    pending: Dict[str, Dict] = {}  # video_id -> file info
+    to_embed: List[str] = []
+    skipped = 0
+    for path in files:
+        fp = fingerprint(path)
+        video_id = video_id_for(fp)
+        if video_id in pending:
+            skipped += 1  # Duplicate copy in the same directory tree
+            continue
+        has_transcript = store.exists("transcripts", video_id)
+        if has_transcript and (not embed or store.exists("embeddings", video_id)):
+            skipped += 1
+            continue
+        pending[video_id] = {"path": path, "fingerprint": fp, "duration": None}
+        if has_transcript:
+            to_embed.append(video_id)
+
+    to_transcribe = [v for v in pending if v not in to_embed]
+    workers = workers or default_workers(len(to_transcribe))
+    progress_stream.write(f"📂 {len(files)} media files: {skipped} already imported, "
+                          f"{len(to_transcribe)} to transcribe, {len(to_embed)} to embed ({workers} workers)\n")
+
+    summary = {"files": len(files), "skipped": skipped, "imported": 0, "failed": [], "audio_seconds": 0.0}
+    progress = ProgressBar(len(pending), progress_stream)
+    started = time.perf_counter()
+
+    def finish(video_id: str):
+        info = pending[video_id]
+        try:
+            if embed:
+                _embed_video(video_id)
+            _record_import(info["path"], info["fingerprint"], video_id, info["duration"], "complete")
+            summary["imported"] += 1
+            progress.update(f"✅ {info['path'].name}")
+        except Exception as e:
+            logger.error(f"❌ Embedding failed for {info['path']}: {e}")
+            summary["failed"].append({"path": str(info["path"]), "stage": "embed", "error": str(e)})
+            progress.update(f"❌ {info['path'].name}")
+
+    # A caller-supplied executor is the caller's to shut down
+    owns_pool = executor is None
+    pool = executor or ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(settings.import_threads_per_worker,)
+    )
+    futures = {}
+    interrupted = False
+    try:
+        futures = {
+            pool.submit(_transcribe_file, str(pending[v]["path"]), v): v
+            for v in to_transcribe
+        }
+        for video_id in to_embed:
+            finish(video_id)
+        for future in as_completed(futures):
+            video_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"❌ Transcription failed for {pending[video_id]['path']}: {e}")
+                summary["failed"].append({"path": str(pending[video_id]["path"]), "stage": "transcribe", "error": str(e)})
+                progress.update(f"❌ {pending[video_id]['path'].name}")
+                continue
+            pending[video_id]["duration"] = result["duration_seconds"]
+            summary["audio_seconds"] += result["duration_seconds"]
+            finish(video_id)
+    except KeyboardInterrupt:
+        logger.warning("⚠️  Interrupted: finished files are saved, re-run the same command to resume")
+        interrupted = True
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        progress.close()
+        if owns_pool:
+            # After Ctrl-C don't wait for in-flight transcriptions to finish
+            pool.shutdown(wait=not interrupted, cancel_futures=interrupted)
+
+    wall = time.perf_counter() - started
+    summary["wall_seconds"] = round(wall, 1)
+    summary["audio_seconds"] = round(summary["audio_seconds"], 1)
+    # Audio hours processed per wall-clock hour
+    summary["throughput"] = round(summary["audio_seconds"] / wall, 2) if wall > 0 else 0.0
+    return summary
+
+
+def format_summary(summary: Dict) -> str:
+    icon = "⚠️ " if summary["failed"] else "✅"
+    lines = [
+        f"{icon} Imported {summary['imported']} of {summary['files']} files "
+        f"({summary['skipped']} already imported, {len(summary['failed'])} failed)",
+        f"   Audio: {summary['audio_seconds'] / 3600:.2f} h in {summary['wall_seconds'] / 3600:.2f} h wall clock "
+        f"= {summary['throughput']:.2f} audio hours per hour",
+    ]
+    for failure in summary["failed"]:
+        lines.append(f"   ❌ {failure['path']} ({failure['stage']}): {failure['error']}")
+    return "\n".join(lines)
@@ -0,0 +1,315 @@
+"""
+Per-playlist pipeline manifest for incremental refreshes
+Records, for every video and stage, the input hash and config the stored output
+was built from, so a refresh only re-runs stages whose inputs or settings changed
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.singleflight import pipeline_jobs, job_key
+from app.core.storage import get_store
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("transcribe", "embed", "quiz")
+STAGE_OUTPUTS = {"transcribe": "transcripts", "embed": "embeddings", "quiz": "quizzes"}  # Artifact kinds
+
+# Rough cost model for dry-run reports (USD per 1K tokens, Whisper runs locally)
+PRICE_PER_1K_TOKENS = {
+    "text-embedding-3-small": {"input": 0.00002},
+    "text-embedding-3-large": {"input": 0.00013},
+    "gpt-4": {"input": 0.03, "output": 0.06},
+    "gpt-4-turbo": {"input": 0.01, "output": 0.03},
+    "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
+}
+# Whisper wall-clock seconds per audio second on CPU
+WHISPER_REALTIME_FACTOR = {"tiny": 0.05, "base": 0.1, "small": 0.3, "medium": 0.6, "large": 1.2}
+TOKENS_PER_AUDIO_SECOND = 3.2  # ~150 spoken words/minute
+QUIZ_OUTPUT_TOKENS = 2000
+
+
+def content_hash(data) -> str:
+    """sha256 of canonical JSON (sorted keys)"""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def stage_config(stage: str) -> Dict:
+    """Settings that change a stage's output"""
+    # Opt-in settings are only listed when on, so older manifest entries stay current
+    word_timings = {"word_timestamps": True} if settings.word_timestamps else {}
+    if stage == "transcribe":
+        return {"whisper_model": settings.whisper_model, **word_timings}
+    if stage == "embed":
+        return {
+            "chunk_max_tokens": settings.chunk_max_tokens,
+            "embedding_model": settings.embedding_model,
+            "dedup_enabled": settings.dedup_enabled,
+            "dedup_threshold": settings.dedup_threshold,
+            **word_timings,
+        }
+    if stage == "quiz":
+        return {"quiz_model": settings.quiz_model, "num_questions": settings.quiz_questions_per_video}
+    raise ValueError(f"Unknown stage: {stage}. Options: {STAGES}")
+
+
+def stage_input_hash(stage: str, video: Dict) -> Optional[str]:
+    """
+    Hash of what a stage consumes (None if the input doesn't exist yet)
+
+    - transcribe: the video's identity and duration from the playlist
+    - embed: the transcript segments
+    - quiz: chunk texts and timestamps (not vectors, so an embedding model
+      change alone doesn't regenerate quizzes)
+    """
+    video_id = video["video_id"]
+    if stage == "transcribe":
+        return content_hash({"video_id": video_id, "duration_seconds": video.get("duration_seconds")})
+
+    upstream = get_store().read_json(STAGE_OUTPUTS["transcribe" if stage == "embed" else "embed"], video_id)
+    if upstream is None:
+        return None
+    if stage == "embed":
+        return content_hash(upstream.get("transcript", []))
+    return content_hash([
+        [c.get("text"), c.get("start"), c.get("end")] for c in upstream
+    ])
+
+
+def output_hash(stage: str, video_id: str) -> Optional[str]:
+    """Content digest of the stage's stored output"""
+    info = get_store().info(STAGE_OUTPUTS[stage], video_id)
+    return info.digest if info else None
+
+
+class PlaylistManifest:
+    """Manifest artifact ("manifests" kind, keyed by playlist_id)"""
+
+    def __init__(self, playlist_id: str, videos: Optional[Dict[str, Dict]] = None):
+        self.playlist_id = playlist_id
+        self.videos: Dict[str, Dict[str, Dict]] = videos or {}
+
+    @classmethod
+    def load(cls, playlist_id: str) -> "PlaylistManifest":
+        data = get_store().read_json("manifests", playlist_id)
+        return cls(playlist_id, data.get("videos", {}) if data else None)
+
+    def save(self):
+        get_store().write_json("manifests", self.playlist_id, {"playlist_id": self.playlist_id, "videos": self.videos})
+
+    def entry(self, video_id: str, stage: str) -> Optional[Dict]:
+        return self.videos.get(video_id, {}).get(stage)
+
+    def record(self, video_id: str, stage: str, input_hash: str, config: Dict):
+        self.videos.setdefault(video_id, {})[stage] = {
+            "input_hash": input_hash,
+            "config": config,
+            "output_hash": output_hash(stage, video_id),
+            "completed_at": datetime.utcnow().isoformat(),
+        }
+
+    def adopt(self, video: Dict, stage: str, input_hash: Optional[str]) -> bool:
+        """
+        Record an untracked stored output (e.g. from before manifests existed)
+        as built from the current input and config, so the first refresh of an
+        existing catalogue doesn't recompute it. Returns True if adopted.
+        """
+        video_id = video["video_id"]
+        if self.entry(video_id, stage) is not None or input_hash is None:
+            return False
+        if not get_store().exists(STAGE_OUTPUTS[stage], video_id):
+            return False
+        self.record(video_id, stage, input_hash, stage_config(stage))
+        return True
+
+    def stale_reason(self, video: Dict, stage: str, input_hash: Optional[str]) -> Optional[str]:
+        """
+        Why a stage must re-run (None if its stored output is current)
+        A hand-edited output is kept; it shows up as changed input downstream
+        """
+        video_id = video["video_id"]
+        entry = self.entry(video_id, stage)
+        if not get_store().exists(STAGE_OUTPUTS[stage], video_id):
+            return "missing output"
+        if entry is None:
+            return "not in manifest"
+        changed = sorted(
+            key for key in set(entry["config"]) | set(stage_config(stage))
+            if entry["config"].get(key) != stage_config(stage).get(key)
+        )
+        if changed:
+            return "config changed: " + ", ".join(changed)
+        if input_hash is None or entry["input_hash"] != input_hash:
+            return "input changed"
+        return None
+
+
+def estimate_stage_cost(stage: str, video: Dict) -> Dict:
+    """Estimated tokens, USD and wall-clock seconds for one stage run"""
+    duration = video.get("duration_seconds") or 0
+    if stage == "transcribe":
+        factor = WHISPER_REALTIME_FACTOR.get(settings.whisper_model, 1.0)
+        return {"tokens": 0, "usd": 0.0, "seconds": round(duration * factor, 1)}
+
+    transcript = get_store().read_json("transcripts", video["video_id"])
+    if transcript is not None:
+        text = " ".join(s.get("text", "") for s in transcript.get("transcript", []))
+        tokens = len(text) // 4
+    else:
+        tokens = int(duration * TOKENS_PER_AUDIO_SECOND)
+
+    if stage == "embed":
+        price = PRICE_PER_1K_TOKENS.get(settings.embedding_model, {"input": 0.0})
+        return {"tokens": tokens, "usd": round(tokens / 1000 * price["input"], 4), "seconds": None}
+
+    price = PRICE_PER_1K_TOKENS.get(settings.quiz_model, {"input": 0.0, "output": 0.0})
+    usd = tokens / 1000 * price["input"] + QUIZ_OUTPUT_TOKENS / 1000 * price["output"]
+    return {"tokens": tokens + QUIZ_OUTPUT_TOKENS, "usd": round(usd, 4), "seconds": None}
+
+
+def load_playlist_videos(playlist_id: str) -> List[Dict]:
+    """Videos of an ingested playlist"""
+    playlist = get_store().read_json("playlists", playlist_id)
+    if playlist is None:
+        raise ValueError(f"Playlist not found: {playlist_id}")
+    return playlist.get("videos", [])
+
+
+def plan_refresh(playlist_id: str, stages: Optional[List[str]] = None) -> Dict:
+    """
+    Dry run: which stages would be recomputed, why, and the estimated cost
+
+    A stale stage makes every later stage of the same video stale too, since
+    its input is about to change. Untracked outputs the refresh would adopt
+    count as up to date (and under "stages_adopted").
+    """
+    stages = stages or list(STAGES)
+    manifest = PlaylistManifest.load(playlist_id)
+    videos = load_playlist_videos(playlist_id)
+
+    work, up_to_date, adopted = [], 0, 0
+    totals = {"tokens": 0, "usd": 0.0, "seconds": 0.0}
+    for video in videos:
+        upstream_stale = False
+        for stage in STAGES:
+            if upstream_stale:
+                reason = "upstream stage re-runs"
+            else:
+                input_hash = stage_input_hash(stage, video)
+                adopted += manifest.adopt(video, stage, input_hash)
+                reason = manifest.stale_reason(video, stage, input_hash)
+            if reason is None:
+                up_to_date += 1
+                continue
+            upstream_stale = True
+            if stage not in stages:
+                break  # Later stages would consume a stale input
+            cost = estimate_stage_cost(stage, video)
+            work.append({"video_id": video["video_id"], "stage": stage, "reason": reason, **cost})
+            totals["tokens"] += cost["tokens"]
+            totals["usd"] += cost["usd"]
+            totals["seconds"] += cost["seconds"] or 0
+
+    return {
+        "playlist_id": playlist_id,
+        "videos": len(videos),
+        "stages_up_to_date": up_to_date,
+        "stages_adopted": adopted,
+        "stages_to_run": len(work),
+        "work": work,
+        "estimated_tokens": totals["tokens"],
+        "estimated_cost_usd": round(totals["usd"], 4),
+        "estimated_transcription_seconds": round(totals["seconds"], 1),
+    }
+
+
+def _stage_runner(stage: str) -> Callable:
+    if stage == "transcribe":
+        from app.services.transcription import TranscriptionService
+        return TranscriptionService().transcribe_video
+    if stage == "embed":
+        from app.services.embeddings import process_transcript_for_rag
+        return process_transcript_for_rag
+    from app.services.quiz_generator import QuizGeneratorService
+    generator = QuizGeneratorService()
+    return lambda video_id: generator.generate_quiz(video_id, settings.quiz_questions_per_video)
+
+
+async def refresh_playlist(playlist_id: str, stages: Optional[List[str]] = None) -> Dict:
+    """
+    Run only the stale stages of every video in a playlist
+
+    Input hashes are re-checked just before each stage, so a re-run upstream
+    stage that produced identical output doesn't cascade. Outputs stored before
+    the video was tracked are adopted as current instead of being recomputed.
+    The manifest is saved after every stage, so an interrupted refresh resumes
+    where it stopped.
+    Runs go through the pipeline single-flight registry, so concurrent API
+    requests for the same video share the work.
+    """
+    stages = stages or list(STAGES)
+    manifest = PlaylistManifest.load(playlist_id)
+    ran, skipped, adopted, failed = [], 0, 0, []
+
+    for video in load_playlist_videos(playlist_id):
+        video_id = video["video_id"]
+        upstream_ran = False
+        for stage in STAGES:
+            input_hash = stage_input_hash(stage, video)
+            # An untracked output is only trusted while its inputs are untouched
+            if not upstream_ran and manifest.adopt(video, stage, input_hash):
+                manifest.save()
+                adopted += 1
+            reason = manifest.stale_reason(video, stage, input_hash)
+            if reason is None:
+                skipped += 1
+                continue
+            if stage not in stages:
+                break  # Later stages would consume a stale input
+
+            logger.info(f"🔁 {playlist_id}/{video_id}: {stage} ({reason})")
+            try:
+                # Same keys as the transcribe/embed endpoints
+                key = job_key(stage, video_id, stage_config(stage))
+                await pipeline_jobs.do(key, _stage_runner(stage), video_id)
+            except Exception as e:
+                logger.error(f"❌ {stage} failed for {video_id}: {e}")
+                failed.append({"video_id": video_id, "stage": stage, "error": str(e)})
+                break
+
+            manifest.record(video_id, stage, stage_input_hash(stage, video), stage_config(stage))
+            manifest.save()
+            ran.append({"video_id": video_id, "stage": stage, "reason": reason})
+            upstream_ran = True
+
+    logger.info(
+        f"✅ Refreshed {playlist_id}: {len(ran)} stages run, {skipped} up to date "
+        f"({adopted} adopted), {len(failed)} failed"
+    )
+    return {"playlist_id": playlist_id, "ran": ran, "skipped": skipped, "adopted": adopted, "failed": failed}
+
+
+# CLI interface
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.services.manifest <playlist_id> [--dry-run]")
+        sys.exit(1)
+
+    playlist_id = sys.argv[1]
+    if "--dry-run" in sys.argv:
+        report = plan_refresh(playlist_id)
+        print(f"📋 {playlist_id}: {report['stages_to_run']} stages to run, "
+              f"{report['stages_up_to_date']} up to date ({report['stages_adopted']} adopted)")
+        for item in report["work"]:
+            print(f"   {item['video_id']:<12} {item['stage']:<10} {item['reason']}")
+        print(f"   Estimated cost: ${report['estimated_cost_usd']:.4f} "
+              f"({report['estimated_tokens']} tokens, "
+              f"{report['estimated_transcription_seconds']}s transcription)")
+    else:
+        asyncio.run(refresh_playlist(playlist_id))
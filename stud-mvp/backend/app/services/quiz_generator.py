@@ -3,11 +3,10 @@ Quiz generation service using GPT-4
 Generates multiple-choice questions from video transcripts
 Follows strict anti-hallucination guidelines
 """
-import openai
 from typing import List, Dict
-from pathlib import Path
 import json
 from app.core.config import settings
+from app.core.storage import get_store
 from app.models.schemas import QuizData, QuizQuestion
 
 
@@ -18,8 +17,9 @@ class QuizGeneratorService:
         self.api_key = settings.openai_api_key
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not set in environment")
+        import openai
         openai.api_key = self.api_key
-        self.model = "gpt-4"  # Use GPT-4 for better reasoning
+        self.model = settings.quiz_model  # GPT-4 by default for better reasoning
         
     def _build_quiz_prompt(self, chunks: List[Dict], num_questions: int = 5) -> str:
         """
@@ -91,15 +91,11 @@ IMPORTANT: Return ONLY valid JSON. No additional text or markdown formatting."""
             QuizData object with generated questions
         """
         # Load embedded chunks
-        embeddings_dir = Path(settings.storage_path) / "embeddings"
-        embeddings_file = embeddings_dir / f"{video_id}.json"
+        chunks = get_store().read_json("embeddings", video_id)
         
-        if not embeddings_file.exists():
+        if chunks is None:
             raise ValueError(f"Embeddings not found for video: {video_id}. Run embedding first.")
         
-        with open(embeddings_file, 'r', encoding='utf-8') as f:
-            chunks = json.load(f)
-        
         print(f"🎯 Generating quiz for {video_id}")
         print(f"   Questions: {num_questions}")
         print(f"   Source chunks: {len(chunks)}")
@@ -108,6 +104,8 @@ IMPORTANT: Return ONLY valid JSON. No additional text or markdown formatting."""
         prompt = self._build_quiz_prompt(chunks, num_questions)
         
         # Call GPT-4
+        import openai
+        
         try:
             response = await openai.chat.completions.acreate(
                 model=self.model,
@@ -175,12 +173,7 @@ IMPORTANT: Return ONLY valid JSON. No additional text or markdown formatting."""
             raise
     
     def _save_quiz(self, quiz: QuizData):
-        """Save quiz to JSON file"""
-        output_dir = Path(settings.storage_path) / "quizzes"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        output_file = output_dir / f"{quiz.video_id}.json"
-        
+        """Save quiz to the artifact store"""
         # Convert to dict for JSON serialization
         quiz_dict = {
             "video_id": quiz.video_id,
@@ -198,22 +191,17 @@ IMPORTANT: Return ONLY valid JSON. No additional text or markdown formatting."""
             ]
         }
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(quiz_dict, f, indent=2)
+        get_store().write_json("quizzes", quiz.video_id, quiz_dict)
         
-        print(f"💾 Saved quiz to: {output_file}")
+        print(f"💾 Saved quiz: {quiz.video_id}")
     
     def load_quiz(self, video_id: str) -> QuizData:
         """Load existing quiz from storage"""
-        quizzes_dir = Path(settings.storage_path) / "quizzes"
-        quiz_file = quizzes_dir / f"{video_id}.json"
+        quiz_dict = get_store().read_json("quizzes", video_id)
         
-        if not quiz_file.exists():
+        if quiz_dict is None:
             raise ValueError(f"Quiz not found for video: {video_id}")
         
-        with open(quiz_file, 'r', encoding='utf-8') as f:
-            quiz_dict = json.load(f)
-        
         # Convert back to QuizData
         questions = [
             QuizQuestion(**q_data)
@@ -0,0 +1,83 @@
+"""
+Search scoping with filter pushdown
+Resolves playlist_id / video_ids / time-range filters into the per-video index
+partitions a search has to touch, so query cost follows the course size
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.core.storage import get_store
+
+
+class SearchScope(NamedTuple):
+    """Which partitions (videos) to search and an optional (start, end) window in seconds"""
+
+    video_ids: Optional[List[str]] = None  # None searches every video
+    time_range: Optional[Tuple[float, float]] = None
+
+
+# playlist_id -> (playlist artifact version, video_ids)
+_partition_cache: Dict[str, Tuple[float, List[str]]] = {}
+
+
+def playlist_video_ids(playlist_id: str) -> List[str]:
+    """Video IDs of an ingested playlist (cached until the playlist is re-saved)"""
+    store = get_store()
+    version = store.version("playlists", playlist_id)
+    if version is None:
+        raise ValueError(f"Playlist not found: {playlist_id}")
+
+    cached = _partition_cache.get(playlist_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    playlist = store.read_json("playlists", playlist_id) or {}
+    video_ids = [v["video_id"] for v in playlist.get("videos", []) if v.get("video_id")]
+    _partition_cache[playlist_id] = (version, video_ids)
+    return video_ids
+
+
+def _intersect(scope: Optional[List[str]], allowed: Iterable[str]) -> List[str]:
+    if scope is None:
+        return list(dict.fromkeys(allowed))
+    allowed = set(allowed)
+    return [v for v in scope if v in allowed]
+
+
+def resolve_scope(
+    video_id: Optional[str] = None,
+    video_ids: Optional[List[str]] = None,
+    playlist_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None
+) -> SearchScope:
+    """
+    Combine search filters (each one narrows the previous)
+
+    - video_id / video_ids: explicit videos
+    - playlist_id: every video in the playlist (course)
+    - start / end: only chunks overlapping this window; needs exactly one video
+
+    Raises ValueError for an unknown playlist or an invalid time range.
+    """
+    scope = None
+    if video_id:
+        scope = [video_id]
+    if video_ids:
+        scope = _intersect(scope, video_ids)
+    if playlist_id:
+        scope = _intersect(scope, playlist_video_ids(playlist_id))
+
+    time_range = None
+    if start is not None or end is not None:
+        if scope is None or len(scope) != 1:
+            raise ValueError("A start/end time range needs exactly one video")
+        time_range = (start if start is not None else 0.0, end if end is not None else float("inf"))
+        if time_range[1] <= time_range[0]:
+            raise ValueError("end must be after start")
+    return SearchScope(scope, time_range)
+
+
+def in_time_range(chunk: Dict, time_range: Optional[Tuple[float, float]]) -> bool:
+    """Whether a chunk overlaps the window (always true without one)"""
+    if time_range is None:
+        return True
+    return chunk["end"] > time_range[0] and chunk["start"] < time_range[1]
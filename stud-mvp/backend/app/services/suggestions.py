@@ -0,0 +1,188 @@
+"""
+Precomputed per-video suggested questions
+Clusters a video's chunk embeddings, picks a representative chunk per cluster
+and generates one question per cluster in a single batched LLM call
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import timed_stage, record_llm_usage
+from app.core.storage import get_store
+from app.services.embeddings import EmbeddingService, cache_query_embedding
+
+logger = logging.getLogger(__name__)
+
+
+def kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 25,
+    seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k-means with k-means++ initialisation
+    Returns (labels [n], centroids [k, d])
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    k = min(k, n)
+    sq_norms = (vectors ** 2).sum(axis=1)
+
+    def sq_distances(centroids: np.ndarray) -> np.ndarray:
+        return sq_norms[:, None] - 2 * vectors @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+
+    centroids = vectors[[rng.integers(n)]]
+    while len(centroids) < k:
+        nearest = np.maximum(sq_distances(centroids).min(axis=1), 0)
+        total = nearest.sum()
+        probs = nearest / total if total > 0 else np.full(n, 1.0 / n)
+        centroids = np.vstack([centroids, vectors[rng.choice(n, p=probs)]])
+
+    labels = np.zeros(n, dtype=np.int64)
+    for _ in range(iterations):
+        labels = sq_distances(centroids).argmin(axis=1)
+        updated = np.array([
+            vectors[labels == j].mean(axis=0) if np.any(labels == j) else centroids[j]
+            for j in range(k)
+        ])
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    return labels, centroids
+
+
+def representative_chunks(chunks: List[Dict], k: int) -> List[Dict]:
+    """
+    One chunk per embedding cluster: the member closest to its centroid
+    Returned in video order so suggestions follow the lesson's flow
+    """
+    embedded = [c for c in chunks if c.get("embedding")]
+    if not embedded:
+        return []
+    vectors = np.asarray([c["embedding"] for c in embedded], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    labels, centroids = kmeans(vectors, k)
+    picked = []
+    for j in range(len(centroids)):
+        members = np.flatnonzero(labels == j)
+        if len(members) == 0:
+            continue
+        distances = ((vectors[members] - centroids[j]) ** 2).sum(axis=1)
+        picked.append(embedded[members[distances.argmin()]])
+    return sorted(picked, key=lambda c: c["chunk_index"])
+
+
+# video_id -> (artifact version, questions); loading also warms the query embedding cache
+_suggestion_cache: Dict[str, Tuple[float, List[Dict]]] = {}
+
+
+def load_suggestions(video_id: str) -> Optional[List[Dict]]:
+    """
+    Load precomputed suggestions for a video (None if not generated)
+    Each entry: question, chunk_index, start, end
+    """
+    store = get_store()
+    version = store.version("suggestions", video_id)
+    if version is None:
+        return None
+
+    cached = _suggestion_cache.get(video_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    data = store.read_json("suggestions", video_id)
+
+    # Clicking a suggestion re-asks its exact text, so pre-warm its embedding
+    model = data.get("embedding_model")
+    for entry, embedding in zip(data["questions"], data.get("question_embeddings", [])):
+        cache_query_embedding(model, entry["question"], embedding)
+
+    _suggestion_cache[video_id] = (version, data["questions"])
+    return data["questions"]
+
+
+class SuggestionService:
+    """Generates and stores suggested questions for a video"""
+
+    def __init__(self, embedding_service: Optional[EmbeddingService] = None):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.model = settings.suggestions_model
+
+    def _build_prompt(self, chunks: List[Dict]) -> str:
+        excerpts = "\n\n".join(
+            f"Excerpt {i} [{c['start']:.1f}s - {c['end']:.1f}s]:\n{c['text']}"
+            for i, c in enumerate(chunks, 1)
+        )
+        return f"""Below are {len(chunks)} excerpts from one educational video transcript, each from a different topic in the video.
+
+For EACH excerpt, write ONE question a student might ask a tutor about that part of the video.
+- The question must be answerable from the excerpt alone
+- Keep it short (under 15 words) and specific to the excerpt's topic
+- Do not mention "the excerpt" or "the transcript"
+
+{excerpts}
+
+Return ONLY valid JSON in this format, with exactly {len(chunks)} questions in excerpt order:
+{{"questions": ["question for excerpt 1", "question for excerpt 2"]}}"""
+
+    async def generate_for_video(self, video_id: str, chunks: List[Dict]) -> List[Dict]:
+        """
+        Cluster chunks, generate one question per cluster, embed the questions
+        (one batch call) and save them with the video
+        """
+        with timed_stage("suggestion_clustering"):
+            representatives = representative_chunks(chunks, settings.suggested_questions_count)
+        if not representatives:
+            return []
+
+        import openai
+
+        with timed_stage("llm_call", model=self.model):
+            response = await openai.chat.completions.acreate(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You write concise study questions grounded in video transcripts."
+                    },
+                    {
+                        "role": "user",
+                        "content": self._build_prompt(representatives)
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=60 * len(representatives),
+                response_format={"type": "json_object"}
+            )
+        record_llm_usage(getattr(response, "usage", None), self.model)
+
+        questions = json.loads(response.choices[0].message.content).get("questions", [])
+        entries = [
+            {
+                "question": question.strip(),
+                "chunk_index": chunk["chunk_index"],
+                "start": chunk["start"],
+                "end": chunk["end"]
+            }
+            for question, chunk in zip(questions, representatives)
+            if isinstance(question, str) and question.strip()
+        ]
+
+        question_embeddings = await self.embedding_service.generate_embeddings_batch(
+            [e["question"] for e in entries]
+        )
+        for entry, embedding in zip(entries, question_embeddings):
+            cache_query_embedding(self.embedding_service.model, entry["question"], embedding)
+
+        get_store().write_json("suggestions", video_id, {
+            "video_id": video_id,
+            "questions": entries,
+            "embedding_model": self.embedding_service.model,
+            "question_embeddings": question_embeddings
+        })
+
+        logger.info(f"💡 Saved {len(entries)} suggested questions for {video_id}")
+        return entries
@@ -3,13 +3,19 @@ Video transcription service using OpenAI Whisper
 Handles audio extraction and speech-to-text conversion
 """
 import subprocess
-import json
+import logging
 from pathlib import Path
-from typing import Optional
-import whisper
+from typing import TYPE_CHECKING, Optional, Union
 from app.core.config import settings
+from app.core.metrics import timed_stage, WHISPER_REALTIME_FACTOR
+from app.core.storage import get_store
 from app.models.schemas import TranscriptData, TranscriptChunk
 
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
 
 class TranscriptionService:
     """Service for transcribing videos using Whisper"""
@@ -20,10 +26,13 @@ class TranscriptionService:
         self.storage_path = Path(settings.storage_path)
         
     def _load_model(self):
-        """Lazy load Whisper model"""
+        """Lazy load Whisper model (whisper/torch are only imported here)"""
         if self.model is None:
-            print(f"Loading Whisper model: {self.model_name}")
-            self.model = whisper.load_model(self.model_name)
+            import whisper
+            
+            logger.info(f"Loading Whisper model: {self.model_name}")
+            with timed_stage("whisper_model_load", model=self.model_name):
+                self.model = whisper.load_model(self.model_name)
         return self.model
     
     def download_audio(self, video_id: str, output_dir: Optional[Path] = None) -> Path:
@@ -50,20 +59,21 @@ class TranscriptionService:
         ]
         
         try:
-            print(f"Downloading audio for video: {video_id}")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=settings.max_video_duration_minutes * 60
-            )
+            logger.info(f"Downloading audio for video: {video_id}")
+            with timed_stage("audio_download"):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    timeout=settings.max_video_duration_minutes * 60
+                )
             
             audio_file = output_dir / f"{video_id}.mp3"
             if not audio_file.exists():
                 raise FileNotFoundError(f"Audio file not found: {audio_file}")
             
-            print(f"✅ Audio downloaded: {audio_file}")
+            logger.info(f"✅ Audio downloaded: {audio_file}")
             return audio_file
             
         except subprocess.TimeoutExpired:
@@ -71,19 +81,42 @@ class TranscriptionService:
         except subprocess.CalledProcessError as e:
             raise Exception(f"yt-dlp failed: {e.stderr}")
     
-    def transcribe_audio(self, audio_file: Path) -> dict:
+    def decode_audio(self, media_file: Path):
+        """
+        Decode any audio/video file ffmpeg understands to 16 kHz mono float32
+        Returns (samples, duration_seconds)
         """
-        Transcribe audio file using Whisper
+        import whisper
+        
+        with timed_stage("audio_decode"):
+            samples = whisper.load_audio(str(media_file))
+        return samples, len(samples) / whisper.audio.SAMPLE_RATE
+    
+    def transcribe_audio(self, audio: Union[Path, "np.ndarray"]) -> dict:
+        """
+        Transcribe an audio file (or samples from decode_audio) using Whisper
         Returns Whisper result dict with segments
         """
         model = self._load_model()
         
-        print(f"Transcribing: {audio_file.name}")
-        result = model.transcribe(
-            str(audio_file),
-            verbose=False,
-            word_timestamps=False  # Set to True for word-level timestamps (slower)
-        )
+        if isinstance(audio, Path):
+            logger.info(f"Transcribing: {audio.name}")
+            audio = str(audio)
+        with timed_stage("whisper_transcribe", model=self.model_name) as timing:
+            result = model.transcribe(
+                audio,
+                verbose=False,
+                word_timestamps=settings.word_timestamps  # Slower; enables exact chunk boundaries
+            )
+        
+        # Realtime factor: processing seconds per second of audio
+        segments = result.get("segments") or []
+        audio_seconds = float(segments[-1]["end"]) if segments else 0.0
+        if audio_seconds > 0:
+            WHISPER_REALTIME_FACTOR.observe(
+                timing["seconds"] / audio_seconds,
+                model=self.model_name
+            )
         
         return result
     
@@ -109,17 +142,43 @@ class TranscriptionService:
         
         return transcript_data
     
-    def save_transcript(self, transcript_data: TranscriptData):
-        """Save transcript to JSON file"""
-        output_dir = self.storage_path / "transcripts"
-        output_dir.mkdir(parents=True, exist_ok=True)
+    def extract_word_timings(self, whisper_result: dict, video_id: str) -> Optional[dict]:
+        """
+        Word-level timings in columnar form (None if Whisper ran without them)
         
-        output_file = output_dir / f"{transcript_data.video_id}.json"
+        words/start/end are parallel arrays; token_offsets holds the running
+        token count before each word (len(words) + 1 entries), so chunking can
+        cut at token budgets without re-tokenising the transcript
+        """
+        words, starts, ends = [], [], []
+        for segment in whisper_result.get("segments", []):
+            for word in segment.get("words") or []:
+                words.append(word["word"])
+                starts.append(round(float(word["start"]), 2))
+                ends.append(round(float(word["end"]), 2))
+        if not words:
+            return None
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(transcript_data.model_dump(mode='json'), f, indent=2)
+        from app.services.embeddings import ChunkingService
+        return {
+            "video_id": video_id,
+            "words": words,
+            "start": starts,
+            "end": ends,
+            "token_offsets": ChunkingService().word_token_offsets(words)
+        }
+    
+    def save_word_timings(self, whisper_result: dict, video_id: str):
+        """Save word timings next to the transcript ("words" artifact)"""
+        word_timings = self.extract_word_timings(whisper_result, video_id)
+        if word_timings:
+            get_store().write_json("words", video_id, word_timings)
+    
+    def save_transcript(self, transcript_data: TranscriptData):
+        """Save transcript to the artifact store"""
+        get_store().write_json("transcripts", transcript_data.video_id, transcript_data.model_dump(mode='json'))
         
-        print(f"✅ Saved transcript to: {output_file}")
+        logger.info(f"✅ Saved transcript: {transcript_data.video_id}")
     
     async def transcribe_video(self, video_id: str, cleanup_audio: bool = True) -> TranscriptData:
         """
@@ -146,28 +205,26 @@ class TranscriptionService:
             
             # Save transcript
             self.save_transcript(transcript_data)
+            self.save_word_timings(whisper_result, video_id)
             
             # Cleanup audio
             if cleanup_audio and audio_file.exists():
                 audio_file.unlink()
-                print(f"🗑️  Deleted audio file: {audio_file.name}")
+                logger.info(f"🗑️  Deleted audio file: {audio_file.name}")
             
             return transcript_data
             
         except Exception as e:
-            print(f"❌ Transcription failed for {video_id}: {e}")
+            logger.error(f"❌ Transcription failed for {video_id}: {e}")
             raise
     
     def load_transcript(self, video_id: str) -> Optional[TranscriptData]:
-        """Load existing transcript from disk"""
-        transcript_file = self.storage_path / "transcripts" / f"{video_id}.json"
+        """Load existing transcript from the artifact store"""
+        data = get_store().read_json("transcripts", video_id)
         
-        if not transcript_file.exists():
+        if data is None:
             return None
         
-        with open(transcript_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         return TranscriptData(**data)
 
 
@@ -0,0 +1,319 @@
+"""
+Compressed vector storage for the embedding store
+Scalar int8 quantisation and PCA / Matryoshka dimensionality reduction,
+with full-precision rescoring of the top candidates from disk
+"""
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.storage import get_store
+from app.services.search_scope import in_time_range
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_MODES = ("none", "int8", "matryoshka", "pca", "matryoshka+int8", "pca+int8")
+
+
+def parse_mode(mode: str) -> Tuple[Optional[str], bool]:
+    """
+    Split a compression mode into (reducer, quantize)
+
+    Examples:
+        "int8"            -> (None, True)
+        "matryoshka"      -> ("matryoshka", False)
+        "pca+int8"        -> ("pca", True)
+    """
+    parts = {p for p in mode.lower().replace(" ", "").split("+") if p and p != "none"}
+    quantize = "int8" in parts
+    reducers = parts - {"int8"}
+    if len(reducers) > 1 or not reducers <= {"pca", "matryoshka"}:
+        raise ValueError(f"Unknown vector compression mode: {mode}. Options: {COMPRESSION_MODES}")
+    return (reducers.pop() if reducers else None), quantize
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise rows (zero rows are left as zeros)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric scalar quantisation with one float32 scale per vector
+    Returns (codes int8 [n, d], scales float32 [n])
+    """
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Reconstruct float32 vectors from int8 codes and per-vector scales"""
+    return codes.astype(np.float32) * scales[:, None]
+
+
+class CompressedIndex:
+    """
+    In-memory compressed copy of a set of embedding vectors
+
+    Vectors are L2-normalised first so that a dot product is a cosine similarity.
+    - matryoshka: keep the first `dims` components and renormalise
+      (text-embedding-3 models are trained so that prefixes remain useful)
+    - pca: project onto the top `dims` right singular vectors of the (uncentred)
+      matrix, which best preserves inner products
+    - int8: quantise the (possibly reduced) vectors with per-vector scales
+    """
+
+    def __init__(self, vectors: np.ndarray, mode: str = "int8", dims: int = 256):
+        self.mode = mode
+        self.reducer, self.quantized = parse_mode(mode)
+        full = _normalize(np.asarray(vectors, dtype=np.float32))
+        self.count, self.full_dims = full.shape
+        self.components: Optional[np.ndarray] = None
+
+        reduced = self._fit_reduce(full, dims)
+        self.dims = reduced.shape[1]
+
+        if self.quantized:
+            self.codes, self.scales = quantize_int8(reduced)
+        else:
+            self.codes, self.scales = reduced.astype(np.float32), None
+
+    def _fit_reduce(self, full: np.ndarray, dims: int) -> np.ndarray:
+        if self.reducer == "matryoshka":
+            return _normalize(full[:, :dims])
+        if self.reducer == "pca":
+            k = max(1, min(dims, self.count, self.full_dims))
+            _, _, vt = np.linalg.svd(full, full_matrices=False)
+            self.components = vt[:k].astype(np.float32)
+            return full @ self.components.T
+        return full
+
+    def reduce_query(self, query: np.ndarray) -> np.ndarray:
+        """Map a full-dimension query into the compressed space"""
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        if self.reducer == "matryoshka":
+            head = query[:self.dims]
+            return head / (np.linalg.norm(head) or 1.0)
+        if self.reducer == "pca":
+            return self.components @ query
+        return query
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of the query against every vector"""
+        q = self.reduce_query(query)
+        if self.quantized:
+            return (self.codes @ q) * self.scales
+        return self.codes @ q
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory for the compressed vectors"""
+        total = self.codes.nbytes
+        if self.scales is not None:
+            total += self.scales.nbytes
+        if self.components is not None:
+            total += self.components.nbytes
+        return total
+
+
+def _embeddings_dir() -> Path:
+    return Path(settings.storage_path) / "embeddings"
+
+
+def full_precision_path(video_id: str) -> Path:
+    """
+    Sidecar .npy file holding a video's full-precision float32 vectors
+    Always on local disk (it is memory-mapped), whatever the storage backend
+    """
+    return _embeddings_dir() / f"{video_id}.f32.npy"
+
+
+def write_full_precision(chunks: List[Dict], video_id: str):
+    """Write the float32 sidecar used for rescoring"""
+    vectors = np.asarray([c["embedding"] for c in chunks if c.get("embedding")], dtype=np.float32)
+    path = full_precision_path(video_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, _normalize(vectors) if len(vectors) else vectors)
+
+
+class CompressedVideoIndex:
+    """Compressed vectors plus embedding-free chunk metadata for one video"""
+
+    def __init__(self, video_id: str, mtime: float, chunks: List[Dict], index: CompressedIndex):
+        self.video_id = video_id
+        self.mtime = mtime
+        self.chunks = chunks
+        self.index = index
+
+    def full_vectors(self) -> np.ndarray:
+        """Memory-map the full-precision sidecar (rows are read on demand)"""
+        return np.load(full_precision_path(self.video_id), mmap_mode="r")
+
+
+# video_id -> CompressedVideoIndex (refreshed when the embeddings file changes)
+_index_cache: Dict[str, CompressedVideoIndex] = {}
+
+
+def get_video_index(video_id: str) -> Optional[CompressedVideoIndex]:
+    """Load (or reuse) the compressed index for a video"""
+    store = get_store()
+    mtime = store.version("embeddings", video_id)
+    if mtime is None:
+        return None
+
+    cached = _index_cache.get(video_id)
+    if cached and cached.mtime == mtime and cached.index.mode == settings.vector_compression:
+        return cached
+
+    from app.services.dedup import load_embedded_chunks
+    chunks = [c for c in load_embedded_chunks(video_id) or [] if c.get("embedding")]
+    if not chunks:
+        return None
+
+    sidecar = full_precision_path(video_id)
+    if not sidecar.exists() or sidecar.stat().st_mtime < mtime:
+        write_full_precision(chunks, video_id)
+
+    vectors = np.asarray([c["embedding"] for c in chunks], dtype=np.float32)
+    metadata = [{k: v for k, v in c.items() if k != "embedding"} for c in chunks]
+    index = CompressedIndex(vectors, settings.vector_compression, settings.vector_compression_dims)
+
+    entry = CompressedVideoIndex(video_id, mtime, metadata, index)
+    _index_cache[video_id] = entry
+    return entry
+
+
+def search_compressed(
+    query_embedding: List[float],
+    video_ids: Optional[List[str]] = None,
+    top_k: int = 5,
+    rescore_candidates: Optional[int] = None,
+    time_range: Optional[Tuple[float, float]] = None
+) -> List[Dict]:
+    """
+    Two-stage search: approximate scores over compressed vectors, then exact
+    cosine rescoring of the best candidates using full-precision vectors from disk
+    Only the listed videos' indexes are loaded; rows outside time_range are
+    excluded from both stages
+
+    Returns chunk dicts (without embeddings) with a "similarity" field, best first.
+    """
+    if video_ids is None:
+        video_ids = get_store().keys("embeddings")
+    if rescore_candidates is None:
+        rescore_candidates = settings.vector_rescore_candidates
+    rescore_candidates = max(rescore_candidates, top_k)
+
+    indexes = [idx for idx in (get_video_index(v) for v in video_ids) if idx]
+    if not indexes:
+        return []
+
+    # Stage 1: approximate scores across all requested videos
+    scores = np.concatenate([idx.index.approximate_scores(query_embedding) for idx in indexes])
+    owners = np.concatenate([np.full(idx.index.count, i) for i, idx in enumerate(indexes)])
+    rows = np.concatenate([np.arange(idx.index.count) for idx in indexes])
+    if time_range is not None:
+        keep = np.array([in_time_range(c, time_range) for idx in indexes for c in idx.chunks], dtype=bool)
+        scores, owners, rows = scores[keep], owners[keep], rows[keep]
+        if len(scores) == 0:
+            return []
+
+    n = min(rescore_candidates, len(scores))
+    candidates = np.argpartition(-scores, n - 1)[:n]
+
+    # Stage 2: exact rescoring from the full-precision sidecars
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+
+    results = []
+    for owner in np.unique(owners[candidates]):
+        idx = indexes[owner]
+        picked = np.sort(rows[candidates[owners[candidates] == owner]])
+        exact = np.asarray(idx.full_vectors()[picked]) @ query
+        for row, similarity in zip(picked, exact):
+            chunk = dict(idx.chunks[row])
+            chunk["similarity"] = float(similarity)
+            results.append(chunk)
+
+    results.sort(key=lambda x: x["similarity"], reverse=True)
+    return results[:top_k]
+
+
+def compression_report(
+    vectors: np.ndarray,
+    mode: str,
+    dims: int = 256,
+    top_k: int = 5,
+    rescore_candidates: int = 50,
+    max_queries: int = 200,
+    seed: int = 0
+) -> Dict:
+    """
+    Measure memory savings vs. recall loss for a compression mode
+
+    Each sampled stored vector is used as a query; recall@k compares the
+    compressed ranking (with and without rescoring) against exact cosine.
+    """
+    full = _normalize(np.asarray(vectors, dtype=np.float32))
+    n = len(full)
+    index = CompressedIndex(full, mode, dims)
+
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(n, size=min(max_queries, n), replace=False)
+    k = min(top_k, n)
+    m = min(max(rescore_candidates, k), n)
+
+    recall_raw, recall_rescored = [], []
+    for qi in queries:
+        exact = full @ full[qi]
+        truth = set(np.argpartition(-exact, k - 1)[:k])
+
+        approx = index.approximate_scores(full[qi])
+        raw_top = set(np.argpartition(-approx, k - 1)[:k])
+
+        candidates = np.argpartition(-approx, m - 1)[:m]
+        rescored = candidates[np.argsort(-exact[candidates])[:k]]
+
+        recall_raw.append(len(truth & raw_top) / k)
+        recall_rescored.append(len(truth & set(rescored)) / k)
+
+    float64_bytes = full.size * 8
+    return {
+        "mode": mode,
+        "vectors": n,
+        "dims": index.dims,
+        "float64_bytes": float64_bytes,
+        "compressed_bytes": index.nbytes,
+        "memory_ratio": round(float64_bytes / index.nbytes, 1) if index.nbytes else 0.0,
+        f"recall@{k}": round(float(np.mean(recall_raw)), 4),
+        f"recall@{k}_rescored": round(float(np.mean(recall_rescored)), 4),
+    }
+
+
+# CLI interface: report on existing embeddings
+if __name__ == "__main__":
+    import sys
+
+    dims = int(sys.argv[1]) if len(sys.argv) > 1 else settings.vector_compression_dims
+
+    store = get_store()
+    all_vectors = []
+    for video_id in store.keys("embeddings"):
+        all_vectors.extend(c["embedding"] for c in store.read_json("embeddings", video_id) if c.get("embedding"))
+
+    if not all_vectors:
+        print(f"No embeddings found in {settings.storage_type} storage")
+        sys.exit(1)
+
+    print(f"📊 Compression report over {len(all_vectors)} vectors (dims={dims})")
+    for mode in COMPRESSION_MODES[1:]:
+        report = compression_report(np.asarray(all_vectors), mode, dims)
+        print(f"   {mode:<16} {report['compressed_bytes'] / 1024:>10.1f} KB "
+              f"(x{report['memory_ratio']} smaller)  "
+              + "  ".join(f"{k}={v}" for k, v in report.items() if k.startswith("recall")))
@@ -3,12 +3,11 @@ YouTube playlist ingestion service
 Fetches playlist metadata and video information using YouTube Data API v3
 """
 import re
-import json
 from typing import Optional
 from datetime import datetime
-from pathlib import Path
 import httpx
 from app.core.config import settings
+from app.core.storage import get_store
 from app.models.schemas import PlaylistData, VideoMetadata
 
 
@@ -218,16 +217,10 @@ class YouTubeIngestionService:
         return playlist_data
     
     def _save_playlist_data(self, playlist_data: PlaylistData):
-        """Save playlist data to JSON file"""
-        output_dir = Path(settings.storage_path) / "playlists"
-        output_dir.mkdir(parents=True, exist_ok=True)
+        """Save playlist data to the artifact store"""
+        get_store().write_json("playlists", playlist_data.playlist_id, playlist_data.model_dump(mode='json'))
         
-        output_file = output_dir / f"{playlist_data.playlist_id}.json"
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(playlist_data.model_dump(mode='json'), f, indent=2, default=str)
-        
-        print(f"✅ Saved playlist data to: {output_file}")
+        print(f"✅ Saved playlist data: {playlist_data.playlist_id}")
 
 
 # CLI interface for testing
@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks for backend hot paths
+Run from the backend directory: python -m benchmarks.<name>
+"""
@@ -0,0 +1,85 @@
+"""
+Benchmark: serialising a 500-chunk video payload
+Compares stdlib json vs orjson, with and without embeddings, and compressed sizes
+"""
+import gzip
+import json
+import time
+from typing import Callable, Dict, List
+import numpy as np
+import orjson
+from app.api.embeddings import project_chunks
+
+NUM_CHUNKS = 500
+DIMS = 1536
+REPEATS = 5
+
+
+def synthetic_chunks(count: int = NUM_CHUNKS, dims: int = DIMS, seed: int = 0) -> List[Dict]:
+    """Chunks shaped like storage/embeddings/<video_id>.json"""
+    rng = np.random.default_rng(seed)
+    words = ["gradient", "descent", "matrix", "vector", "learning", "rate", "loss", "model", "the", "a"]
+    chunks = []
+    for i in range(count):
+        chunks.append({
+            "video_id": "benchmark01",
+            "chunk_index": i,
+            "text": " ".join(rng.choice(words, size=120)),
+            "start": i * 30.0,
+            "end": i * 30.0 + 30.0,
+            "tokens": 160,
+            "embedding": rng.standard_normal(dims).astype(np.float32).tolist(),
+        })
+    return chunks
+
+
+def best_of(fn: Callable[[], bytes], repeats: int = REPEATS):
+    """Fastest wall time (ms) over several runs, plus the output"""
+    best, output = float("inf"), b""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, output
+
+
+def run() -> List[Dict]:
+    chunks = synthetic_chunks()
+    payloads = {
+        "with embeddings": {"video_id": "benchmark01", "chunks": project_chunks(chunks, include_embeddings=True)},
+        "without embeddings": {"video_id": "benchmark01", "chunks": project_chunks(chunks)},
+    }
+    # Same options as Starlette's JSONResponse / FastAPI's ORJSONResponse
+    encoders = {
+        "json": lambda p: json.dumps(p, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8"),
+        "orjson": lambda p: orjson.dumps(p, option=orjson.OPT_SERIALIZE_NUMPY),
+    }
+
+    rows = []
+    for payload_name, payload in payloads.items():
+        for encoder_name, encode in encoders.items():
+            ms, body = best_of(lambda: encode(payload))
+            row = {
+                "payload": payload_name,
+                "encoder": encoder_name,
+                "ms": round(ms, 1),
+                "bytes": len(body),
+                "gzip_bytes": len(gzip.compress(body, compresslevel=9)),
+            }
+            try:
+                import brotli
+                row["brotli_bytes"] = len(brotli.compress(body, quality=4))
+            except ImportError:
+                pass
+            rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"📊 Serialising {NUM_CHUNKS} chunks ({DIMS}-dim embeddings), best of {REPEATS}")
+    for row in run():
+        sizes = "  ".join(
+            f"{key.replace('_bytes', '')}={row[key] / 1024:,.0f} KB"
+            for key in ("bytes", "gzip_bytes", "brotli_bytes") if key in row
+        )
+        print(f"   {row['payload']:<19} {row['encoder']:<7} {row['ms']:>8.1f} ms  {sizes}")
@@ -0,0 +1,103 @@
+"""
+Benchmark: artifact store read/write throughput and disk usage per codec
+Compares the legacy pretty-printed JSON files against LocalStore with zstd, gzip and none
+"""
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import orjson
+from app.core.storage import CODECS, LocalStore
+from benchmarks.payload_serialization import synthetic_chunks
+
+NUM_VIDEOS = 4
+REPEATS = 3
+
+
+def synthetic_transcript(video_id: str, segments: int = 1500) -> Dict:
+    """Transcript shaped like storage/transcripts/<video_id>.json"""
+    return {
+        "video_id": video_id,
+        "language": "en",
+        "transcript": [
+            {"text": f"In this part we look at gradient descent step {i} and the learning rate", "start": i * 4.0, "end": i * 4.0 + 4.0}
+            for i in range(segments)
+        ],
+    }
+
+
+def artifacts() -> List[tuple]:
+    items = []
+    for n in range(NUM_VIDEOS):
+        video_id = f"benchmark{n:02d}"
+        items.append(("transcripts", video_id, synthetic_transcript(video_id)))
+        items.append(("embeddings", video_id, synthetic_chunks(seed=n)))
+    return items
+
+
+def disk_usage(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file())
+
+
+def _legacy_write(root: Path, items: List[tuple]):
+    for kind, key, data in items:
+        (root / kind).mkdir(parents=True, exist_ok=True)
+        with open(root / kind / f"{key}.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _legacy_read(root: Path, items: List[tuple]):
+    for kind, key, _ in items:
+        with open(root / kind / f"{key}.json", "r", encoding="utf-8") as f:
+            json.load(f)
+
+
+def _timed(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run() -> List[Dict]:
+    items = artifacts()
+    raw = sum(len(orjson.dumps(data)) for _, _, data in items)  # Same MB for every format
+    rows = []
+    for name in ("legacy json", *CODECS):
+        root = Path(tempfile.mkdtemp(prefix="stud-storage-"))
+        try:
+            if name == "legacy json":
+                write = lambda: _legacy_write(root, items)
+                read = lambda: _legacy_read(root, items)
+            else:
+                store = LocalStore(root, codec=name)
+                # Fresh root per run so dedup doesn't turn repeat writes into no-ops
+                def write():
+                    shutil.rmtree(root, ignore_errors=True)
+                    for kind, key, data in items:
+                        store.write_json(kind, key, data)
+                read = lambda: [store.read_json(kind, key) for kind, key, _ in items]
+
+            write_s = _timed(write)
+            read_s = _timed(read)
+            stored = disk_usage(root)
+            rows.append({
+                "format": name,
+                "write_mb_s": round(raw / 1e6 / write_s, 1),
+                "read_mb_s": round(raw / 1e6 / read_s, 1),
+                "disk_mb": round(stored / 1e6, 2),
+            })
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"📊 {NUM_VIDEOS} videos (transcript + 500 embedded chunks each), best of {REPEATS}")
+    for row in run():
+        print(f"   {row['format']:<12} write {row['write_mb_s']:>7.1f} MB/s  "
+              f"read {row['read_mb_s']:>7.1f} MB/s  disk {row['disk_mb']:>7.2f} MB")
@@ -0,0 +1,125 @@
+"""
+Benchmark: word-timestamp chunking vs segment-level chunking
+Storage size of the columnar word timings and chunking time for a one-hour lecture
+"""
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+import numpy as np
+import orjson
+from app.core.storage import compress
+from app.services.embeddings import ChunkingService
+
+WORDS_PER_MINUTE = 150
+MINUTES = 60
+MAX_TOKENS = 800
+REPEATS = 3
+
+
+def synthetic_lecture(seed: int = 0) -> Dict:
+    """Whisper-shaped result with word timings (segments of 10-30 words)"""
+    rng = np.random.default_rng(seed)
+    vocabulary = ["gradient", "descent", "matrix", "vector", "learning", "rate", "loss", "model",
+                  "the", "a", "of", "we", "minimise", "update", "weights", "so", "now"]
+    total_words = WORDS_PER_MINUTE * MINUTES
+    seconds_per_word = 60.0 / WORDS_PER_MINUTE
+
+    segments, t, written = [], 0.0, 0
+    while written < total_words:
+        count = min(int(rng.integers(10, 31)), total_words - written)
+        words = []
+        for n in range(count):
+            text = " " + str(rng.choice(vocabulary)) + ("." if n == count - 1 or rng.random() < 0.06 else "")
+            duration = seconds_per_word * float(rng.uniform(0.6, 1.2))
+            words.append({"word": text, "start": round(t, 2), "end": round(t + duration, 2)})
+            t += seconds_per_word
+        segments.append({
+            "start": words[0]["start"],
+            "end": words[-1]["end"],
+            "text": "".join(w["word"] for w in words),
+            "words": words
+        })
+        written += count
+    return {"segments": segments}
+
+
+def best_of(fn, repeats: int = REPEATS):
+    best, output = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, output
+
+
+def chunking_service() -> ChunkingService:
+    service = ChunkingService(max_tokens=MAX_TOKENS)
+    try:
+        service.encoding
+    except Exception:
+        # Offline: tiktoken can't fetch cl100k_base, so count whitespace words instead
+        print("   (tiktoken encoding unavailable, counting whitespace-separated words as tokens)")
+        service._encoding = SimpleNamespace(encode=str.split)
+    return service
+
+
+def run() -> List[Dict]:
+    result = synthetic_lecture()
+    service = chunking_service()
+    segments = [SimpleNamespace(start=s["start"], end=s["end"], text=s["text"].strip()) for s in result["segments"]]
+    transcript = {"video_id": "benchmark01", "transcript": [vars(s) for s in segments]}
+
+    offsets_ms, word_timings = best_of(lambda: _word_timings(service, result))
+    segment_ms, segment_chunks = best_of(lambda: service.merge_small_chunks(segments))
+    word_ms, word_chunks = best_of(lambda: service.chunk_words(word_timings))
+
+    transcript_json = orjson.dumps(transcript)
+    words_json = orjson.dumps(word_timings)
+    return [
+        {
+            "mode": "segments",
+            "chunks": len(segment_chunks),
+            "avg_tokens": round(np.mean([c["tokens"] for c in segment_chunks])),
+            "chunking_ms": round(segment_ms, 1),
+            "extra_bytes": 0,
+            "extra_zstd_bytes": 0,
+            "boundary_step_s": round(float(np.mean([s.end - s.start for s in segments])), 2),
+            "transcript_zstd_bytes": len(compress(transcript_json, "zstd")),
+        },
+        {
+            "mode": "words",
+            "chunks": len(word_chunks),
+            "avg_tokens": round(np.mean([c["tokens"] for c in word_chunks])),
+            "chunking_ms": round(word_ms, 1),
+            "offsets_ms": round(offsets_ms, 1),
+            "extra_bytes": len(words_json),
+            "extra_zstd_bytes": len(compress(words_json, "zstd")),
+            "boundary_step_s": round(float(np.mean(np.diff(word_timings["start"]))), 2),
+            "transcript_zstd_bytes": len(compress(transcript_json, "zstd")),
+        },
+    ]
+
+
+def _word_timings(service: ChunkingService, result: Dict) -> Dict:
+    """Same columnar layout as TranscriptionService.extract_word_timings"""
+    words = [w for s in result["segments"] for w in s["words"]]
+    texts = [w["word"] for w in words]
+    return {
+        "video_id": "benchmark01",
+        "words": texts,
+        "start": [w["start"] for w in words],
+        "end": [w["end"] for w in words],
+        "token_offsets": service.word_token_offsets(texts),
+    }
+
+
+if __name__ == "__main__":
+    print(f"📊 {MINUTES}-minute lecture ({WORDS_PER_MINUTE * MINUTES} words), {MAX_TOKENS}-token chunks, best of {REPEATS}")
+    rows = run()
+    for row in rows:
+        extra = (f"token offsets {row['offsets_ms']:>6.1f} ms  " if "offsets_ms" in row else " " * 26)
+        print(f"   {row['mode']:<9} {row['chunks']:>3} chunks  avg {row['avg_tokens']:>4} tokens  "
+              f"chunking {row['chunking_ms']:>7.1f} ms  {extra}"
+              f"extra storage {row['extra_bytes'] / 1024:>6.1f} KB ({row['extra_zstd_bytes'] / 1024:.1f} KB zstd)  "
+              f"boundary step {row['boundary_step_s']:.2f}s")
+    print(f"   (segment-level transcript itself: {rows[0]['transcript_zstd_bytes'] / 1024:.1f} KB zstd)")
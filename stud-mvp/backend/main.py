@@ -2,27 +2,38 @@
 STUD Backend - FastAPI Application
 Main entry point for the STUD API server
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+import importlib
 import sys
 import os
+import time
 from pathlib import Path
 
-# Sentry for error tracking
-import sentry_sdk
-from sentry_sdk.integrations.fastapi import FastApiIntegration
-
 # Add app directory to Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.api import ingest, transcribe, embeddings, quiz, tutor, auth
 from app.core.database import init_db
+from app.core.config import settings
+from app.core.metrics import (
+    HTTP_REQUEST_SECONDS,
+    configure_logging,
+    new_request_id,
+    registry,
+    request_id_var,
+)
+
+configure_logging(settings.log_level)
 
 # Initialize Sentry if DSN is provided
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 if SENTRY_DSN:
+    # Sentry for error tracking (imported only when configured)
+    import sentry_sdk
+    from sentry_sdk.integrations.fastapi import FastApiIntegration
+    
     sentry_sdk.init(
         dsn=SENTRY_DSN,
         integrations=[FastApiIntegration()],
@@ -36,7 +47,8 @@ app = FastAPI(
     description="Backend API for Studying Till Unlocking Dreams platform",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse  # Much faster for large chunk/float payloads
 )
 
 # CORS middleware
@@ -48,19 +60,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression for large payloads (chunk lists, transcripts)
+if settings.response_compression == "brotli":
+    # Optional dependency: pip install brotli-asgi (falls back to gzip for clients without br)
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=settings.response_compression_min_size)
+elif settings.response_compression == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=settings.response_compression_min_size)
+
+
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    """
+    Assign a request ID (honouring an incoming X-Request-ID), expose it to
+    logs via a context variable, and record request latency per route
+    """
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        # Use the route template (not the raw path) to keep label cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=path,
+            status=str(status_code)
+        )
+        request_id_var.reset(token)
+
+
 # Initialize database
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     init_db()
+    if settings.app_role != "pipeline":
+        from app.services.analytics import analytics_writer
+        await analytics_writer.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered analytics events"""
+    if settings.app_role != "pipeline":
+        from app.services.analytics import analytics_writer
+        await analytics_writer.stop()
+
+
+# Routers served by each worker role (settings.app_role).
+# "api" workers never import the transcription stack; "pipeline" workers
+# run ingestion/transcription/embedding/quiz jobs without the tutor.
+ROLE_ROUTERS = {
+    "all": ["auth", "ingest", "transcribe", "embeddings", "quiz", "tutor"],
+    "api": ["auth", "ingest", "embeddings", "quiz", "tutor"],
+    "pipeline": ["ingest", "transcribe", "embeddings", "quiz"],
+}
+
+if settings.app_role not in ROLE_ROUTERS:
+    raise ValueError(f"Unknown APP_ROLE: {settings.app_role}. Options: {list(ROLE_ROUTERS)}")
 
 # Include routers
-app.include_router(auth.router)
-app.include_router(ingest.router)
-app.include_router(transcribe.router)
-app.include_router(embeddings.router)
-app.include_router(quiz.router)
-app.include_router(tutor.router)
+for router_module in ROLE_ROUTERS[settings.app_role]:
+    app.include_router(importlib.import_module(f"app.api.{router_module}").router)
 
 @app.get("/health")
 async def health_check():
@@ -77,6 +146,19 @@ async def health_check():
         }
     )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint
+    Per-stage latency histograms, token counters and HTTP request latency
+    """
+    if not settings.metrics_enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @app.get("/")
 async def root():
     """
@@ -89,6 +171,8 @@ async def root():
     }
 
 if __name__ == "__main__":
+    import uvicorn
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -316,3 +316,60 @@ def test_tutor_response_model():
     assert response.confidence == 0.85
     assert len(response.suggested_questions) == 1
     assert response.session_id == "test-session"
+
+
+@pytest.mark.asyncio
+async def test_ask_question_overlaps_retrieval_and_history(tmp_path, monkeypatch):
+    """Question embedding, index warm-up and history load run concurrently"""
+    import asyncio
+    import time
+    from types import SimpleNamespace
+    import openai
+    from app.core.config import settings
+    from app.core.metrics import stage_timeline, timed_stage
+    from app.core.storage import get_store
+    
+    try:
+        tutor = AITutorService()
+    except ValueError:
+        pytest.skip("OpenAI API key not available")
+    
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    monkeypatch.setattr(settings, "vector_compression", "none")
+    monkeypatch.setattr(settings, "shared_index_enabled", False)
+    get_store().write_json("embeddings", "vid1", [
+        {"video_id": "vid1", "chunk_index": 0, "start": 0.0, "end": 30.0,
+         "text": "Variables store values.", "embedding": [1.0, 0.0]}
+    ])
+    
+    async def slow_embedding(text):
+        with timed_stage("embedding_call", mode="single"):
+            await asyncio.sleep(0.2)
+        return [1.0, 0.0]
+    
+    original_load = tutor._load_conversation_history
+    
+    def slow_history(session_id, context_window):
+        time.sleep(0.2)
+        return original_load(session_id, context_window)
+    
+    async def fake_completion(**kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Variables store values."))],
+            usage=None
+        )
+    
+    monkeypatch.setattr(tutor.embedding_service, "generate_embedding", slow_embedding)
+    monkeypatch.setattr(tutor, "_load_conversation_history", slow_history)
+    monkeypatch.setattr(openai.chat.completions, "acreate", fake_completion, raising=False)
+    
+    start = time.perf_counter()
+    with stage_timeline() as timeline:
+        response = await tutor.ask_question("What are variables?", video_id="vid1", session_id="s1")
+    elapsed = time.perf_counter() - start
+    
+    assert response.sources[0]["video_id"] == "vid1"
+    assert elapsed < 0.35  # Sequential would be >= 0.4s
+    stages = {e["stage"]: e for e in timeline}
+    assert {"embedding_call", "index_warmup", "index_search", "llm_call"} <= set(stages)
+    assert stages["index_warmup"]["start_ms"] < stages["embedding_call"]["start_ms"] + stages["embedding_call"]["ms"]
@@ -0,0 +1,92 @@
+"""
+Tests for the buffered tutor analytics writer and rollups
+"""
+import asyncio
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.analytics import TutorEvent
+from app.services.analytics import AnalyticsWriter, get_video_analytics
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.mark.asyncio
+async def test_events_buffer_until_flush(session_factory):
+    """Nothing is written until a flush; then the batch is bulk-inserted"""
+    writer = AnalyticsWriter(session_factory, batch_size=100, flush_interval_ms=60000)
+    writer.record_question("s1", 0, "vid1", 0.8)
+    writer.record_feedback("s1", 0, rating=4)
+
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(TutorEvent)) == 0
+    assert writer.pending == 2
+
+    assert await writer.flush() == 2
+    assert writer.pending == 0
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(TutorEvent)) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_size_triggers_flush(session_factory):
+    """Reaching batch_size schedules a flush without waiting for the timer"""
+    writer = AnalyticsWriter(session_factory, batch_size=3, flush_interval_ms=60000)
+    for i in range(3):
+        writer.record_question("s1", i, "vid1", 0.5)
+    await asyncio.sleep(0.1)
+
+    assert writer.pending == 0
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(TutorEvent)) == 3
+
+
+@pytest.mark.asyncio
+async def test_rollups_accumulate_across_flushes(session_factory):
+    """Rollups add up over batches and feedback is attributed to the question's video"""
+    writer = AnalyticsWriter(session_factory, batch_size=100, flush_interval_ms=60000)
+    writer.record_question("s1", 0, "vid1", 0.9)
+    writer.record_question("s1", 1, "vid1", 0.5)
+    writer.record_question("s2", 0, "vid2", 0.4)
+    await writer.flush()
+
+    # Feedback in a later batch, without a video_id
+    writer.record_feedback("s1", 0, rating=5)
+    writer.record_feedback("s1", 1, rating=2, comment="too vague")
+    await writer.stop()
+
+    with session_factory() as db:
+        vid1 = get_video_analytics(db, "vid1")
+        vid2 = get_video_analytics(db, "vid2")
+        assert get_video_analytics(db, "missing") is None
+
+    assert vid1["total_questions"] == 2
+    assert vid1["average_confidence"] == 0.7
+    assert vid1["total_ratings"] == 2
+    assert vid1["average_rating"] == 3.5
+    assert sum(d["questions"] for d in vid1["questions_per_day"]) == 2
+
+    assert vid2["total_questions"] == 1
+    assert vid2["average_rating"] is None
+
+
+@pytest.mark.asyncio
+async def test_periodic_flush(session_factory):
+    """The background loop flushes every flush_interval_ms"""
+    writer = AnalyticsWriter(session_factory, batch_size=100, flush_interval_ms=20)
+    await writer.start()
+    writer.record_question("s1", 0, "vid1", 0.6)
+    await asyncio.sleep(0.2)
+    assert writer.pending == 0
+    await writer.stop()
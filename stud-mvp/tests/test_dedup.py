@@ -0,0 +1,127 @@
+"""
+Unit tests for near-duplicate chunk detection (MinHash/LSH)
+"""
+from app.core.config import settings
+from app.services.dedup import (
+    MinHasher,
+    NearDuplicateDetector,
+    collapse_duplicates,
+    estimate_jaccard,
+    load_embedded_chunks,
+    repoint_duplicates,
+)
+from app.core.storage import get_store
+
+INTRO = (
+    "Hey everyone and welcome back to the channel. Before we start, this video is "
+    "sponsored by our friends who make the best note taking app for students. "
+    "Use the link in the description to get one month free."
+)
+
+
+def _chunk(video_id, index, text):
+    return {"video_id": video_id, "chunk_index": index, "text": text, "start": 0.0, "end": 5.0}
+
+
+def test_signature_similarity():
+    """Test that near-identical texts have high estimated Jaccard"""
+    hasher = MinHasher()
+    
+    same = estimate_jaccard(hasher.signature(INTRO), hasher.signature(INTRO + " Thanks!"))
+    different = estimate_jaccard(
+        hasher.signature(INTRO),
+        hasher.signature("Today we learn how Python lists store references to objects in memory.")
+    )
+    
+    assert same >= 0.8
+    assert different < 0.2
+
+
+def test_mark_duplicates_across_videos():
+    """Test that repeated intros are linked to the first (canonical) chunk"""
+    detector = NearDuplicateDetector(threshold=0.8)
+    
+    first = [_chunk("vid_a", 0, INTRO), _chunk("vid_a", 1, "Variables hold values in Python.")]
+    second = [_chunk("vid_b", 0, INTRO.replace("Hey", "Hi")), _chunk("vid_b", 1, "Loops repeat code blocks.")]
+    
+    assert detector.mark_duplicates(first) == 0
+    assert detector.mark_duplicates(second) == 1
+    assert second[0]["duplicate_of"] == {"video_id": "vid_a", "chunk_index": 0}
+    assert "duplicate_of" not in second[1]
+
+
+def test_detector_persistence(tmp_path, monkeypatch):
+    """Test save/load round trip and removing a video before re-processing"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    
+    detector = NearDuplicateDetector.load()
+    detector.mark_duplicates([_chunk("vid_a", 0, INTRO)])
+    detector.save()
+    
+    reloaded = NearDuplicateDetector.load()
+    assert reloaded.generation == detector.generation == 1
+    assert reloaded.mark_duplicates([_chunk("vid_b", 0, INTRO)]) == 1
+    
+    reloaded.remove_video("vid_a")
+    again = [_chunk("vid_a", 0, INTRO)]
+    assert reloaded.mark_duplicates(again) == 1
+    assert again[0]["duplicate_of"] == {"video_id": "vid_b", "chunk_index": 0}
+
+
+def test_remove_video_repoints_duplicates(tmp_path, monkeypatch):
+    """Test that duplicates of a re-processed canonical chunk get a new canonical"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    detector = NearDuplicateDetector(threshold=0.8)
+    
+    first = [_chunk("vid_a", 0, INTRO)]
+    second = [_chunk("vid_b", 0, INTRO)]
+    third = [_chunk("vid_c", 0, INTRO)]
+    for chunks in (first, second, third):
+        detector.mark_duplicates(chunks)
+        get_store().write_json("embeddings", chunks[0]["video_id"], chunks)
+    first[0]["embedding"] = [1.0, 0.0]
+    get_store().write_json("embeddings", "vid_a", first)
+    
+    repointed = detector.remove_video("vid_a")
+    repoint_duplicates(repointed)
+    
+    assert repointed == {"vid_b:0": None, "vid_c:0": "vid_b:0"}
+    promoted = get_store().read_json("embeddings", "vid_b")[0]
+    assert "duplicate_of" not in promoted
+    assert promoted["embedding"] == [1.0, 0.0]  # Taken over from the old canonical
+    assert get_store().read_json("embeddings", "vid_c")[0]["duplicate_of"] == {"video_id": "vid_b", "chunk_index": 0}
+    assert detector.find(detector.hasher.signature(INTRO)) == "vid_b:0"
+
+
+def test_duplicates_resolve_canonical_embedding(tmp_path, monkeypatch):
+    """Test that stored duplicates get their canonical vector when loaded, under their own video"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    canonical = _chunk("vid_a", 0, INTRO)
+    canonical["embedding"] = [0.6, 0.8]
+    get_store().write_json("embeddings", "vid_a", [canonical])
+    
+    stored = [_chunk("vid_b", 0, INTRO), _chunk("vid_b", 1, INTRO), _chunk("vid_b", 2, "Loops repeat code.")]
+    stored[0]["duplicate_of"] = {"video_id": "vid_a", "chunk_index": 0}
+    stored[1]["duplicate_of"] = {"video_id": "vid_x", "chunk_index": 0}
+    stored[2]["embedding"] = [1.0, 0.0]
+    get_store().write_json("embeddings", "vid_b", stored)
+    
+    loaded = load_embedded_chunks("vid_b")
+    assert loaded[0]["embedding"] == [0.6, 0.8]
+    assert loaded[0]["video_id"] == "vid_b"
+    assert "embedding" not in loaded[1]
+    assert "embedding" not in get_store().read_json("embeddings", "vid_b")[0]
+
+
+def test_collapse_duplicates_in_results():
+    """Test that duplicate search results collapse into the best-ranked one"""
+    results = [
+        _chunk("vid_a", 0, INTRO),
+        _chunk("vid_b", 0, INTRO),
+        _chunk("vid_c", 3, "Functions group reusable logic."),
+    ]
+    
+    collapsed = collapse_duplicates(results, threshold=0.8)
+    
+    assert [c["video_id"] for c in collapsed] == ["vid_a", "vid_c"]
+    assert collapsed[0]["duplicates"] == 1
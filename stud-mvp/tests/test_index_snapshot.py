@@ -0,0 +1,109 @@
+"""
+Unit tests for shared memory-mapped index snapshots
+"""
+import json
+import os
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.index_snapshot import (
+    SharedIndex,
+    current_generation,
+    publish_snapshot,
+)
+
+
+def _write_embeddings(embeddings_dir, video_id, vectors):
+    chunks = [
+        {
+            "video_id": video_id,
+            "chunk_index": i,
+            "start": float(i * 10),
+            "end": float(i * 10 + 10),
+            "text": f"{video_id} chunk {i}",
+            "tokens": 4,
+            "embedding": row.tolist()
+        }
+        for i, row in enumerate(vectors)
+    ]
+    path = embeddings_dir / f"{video_id}.json"
+    path.write_text(json.dumps(chunks))
+    return path
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    embeddings_dir = tmp_path / "embeddings"
+    embeddings_dir.mkdir()
+    return embeddings_dir
+
+
+def test_publish_and_search(storage):
+    """Test that a published snapshot is searchable with video filters"""
+    rng = np.random.default_rng(0)
+    vectors_a = rng.normal(size=(5, 64))
+    vectors_b = rng.normal(size=(3, 64))
+    _write_embeddings(storage, "vid_a", vectors_a)
+    _write_embeddings(storage, "vid_b", vectors_b)
+    
+    assert publish_snapshot() == 1
+    assert current_generation() == 1
+    
+    index = SharedIndex()
+    results = index.search(vectors_b[2].tolist(), top_k=2)
+    assert results[0]["video_id"] == "vid_b"
+    assert results[0]["chunk_index"] == 2
+    assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+    assert "embedding" not in results[0]
+    
+    scoped = index.search(vectors_b[2].tolist(), top_k=3, video_ids=["vid_a"])
+    assert len(scoped) == 3
+    assert all(r["video_id"] == "vid_a" for r in scoped)
+    
+    # Chunks 1-2 of vid_a cover 10s-30s
+    windowed = index.search(vectors_a[4].tolist(), top_k=5, video_ids=["vid_a"], time_range=(12.0, 25.0))
+    assert sorted(r["chunk_index"] for r in windowed) == [1, 2]
+
+
+def test_readers_follow_generation_bump(storage):
+    """Test that a worker sees updates without restarting"""
+    rng = np.random.default_rng(1)
+    _write_embeddings(storage, "vid_a", rng.normal(size=(4, 32)))
+    publish_snapshot()
+    
+    index = SharedIndex()
+    assert index.current().generation == 1
+    
+    new_vectors = rng.normal(size=(2, 32))
+    _write_embeddings(storage, "vid_new", new_vectors)
+    publish_snapshot()
+    
+    snapshot = index.current()
+    assert snapshot.generation == 2
+    assert snapshot.count == 6
+    assert index.search(new_vectors[1].tolist(), top_k=1)[0]["video_id"] == "vid_new"
+
+
+def test_unchanged_videos_reused_and_old_generations_pruned(storage):
+    """Test incremental rebuilds copy unchanged rows and prune old files"""
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(3, 16))
+    path = _write_embeddings(storage, "vid_a", vectors)
+    publish_snapshot()
+    
+    # Remove the JSON contents but keep its mtime: rows must come from the snapshot
+    stat = path.stat()
+    path.write_text("[]")
+    os.utime(path, (stat.st_atime, stat.st_mtime))
+    publish_snapshot()
+    publish_snapshot()
+    
+    snapshot = SharedIndex().current()
+    assert snapshot.count == 3
+    assert np.allclose(
+        snapshot.vectors[0],
+        vectors[0] / np.linalg.norm(vectors[0]),
+        atol=1e-6
+    )
+    assert not (storage.parent / "index" / "snapshot-00000001.idx").exists()
@@ -0,0 +1,128 @@
+"""
+Unit tests for bulk import of local recordings
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.cli import main
+from app.core.config import settings
+from app.core.storage import get_store
+from app.services import local_import
+from app.services.local_import import discover_media, fingerprint, default_workers, import_directory
+
+
+@pytest.fixture
+def lectures(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path / "data"))
+    root = tmp_path / "lectures"
+    (root / "week2").mkdir(parents=True)
+    (root / "week1.mp4").write_bytes(b"video one" * 1000)
+    (root / "week2" / "part1.MP3").write_bytes(b"audio two" * 1000)
+    (root / "notes.pdf").write_bytes(b"not media")
+    (root / ".week3.mkv").write_bytes(b"hidden")
+    return root
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fake transcribe/embed steps that write artifacts and log each call"""
+    calls = []
+
+    def transcribe(path, video_id):
+        calls.append(("transcribe", video_id))
+        if "broken" in path:
+            raise RuntimeError("ffmpeg could not decode")
+        get_store().write_json("transcripts", video_id, {"video_id": video_id, "transcript": []})
+        return {"video_id": video_id, "duration_seconds": 1800.0, "seconds": 0.01}
+
+    def embed(video_id):
+        calls.append(("embed", video_id))
+        get_store().write_json("embeddings", video_id, [])
+
+    monkeypatch.setattr(local_import, "_transcribe_file", transcribe)
+    monkeypatch.setattr(local_import, "_embed_video", embed)
+    return calls
+
+
+def _run(root, **kwargs):
+    return import_directory(root, executor=ThreadPoolExecutor(2), progress_stream=io.StringIO(), **kwargs)
+
+
+def test_discover_media(lectures):
+    """Only visible audio/video files are picked up"""
+    assert [p.name for p in discover_media(lectures)] == ["week1.mp4", "part1.MP3"]
+    assert [p.name for p in discover_media(lectures, recursive=False)] == ["week1.mp4"]
+
+
+def test_fingerprint_follows_content(tmp_path):
+    """Renamed copies share a fingerprint; different content doesn't"""
+    a = tmp_path / "a.mp3"
+    a.write_bytes(b"x" * 5_000_000)
+    b = tmp_path / "b.mp3"
+    b.write_bytes(b"x" * 5_000_000)
+    c = tmp_path / "c.mp3"
+    c.write_bytes(b"x" * 4_999_999 + b"y")
+
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(c)
+
+
+def test_default_workers(monkeypatch):
+    """Pool size is bounded by cores and the number of files"""
+    monkeypatch.setattr(local_import.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "import_threads_per_worker", 2)
+    assert 1 <= default_workers() <= 4
+    assert default_workers(num_files=1) == 1
+
+
+def test_import_and_resume(lectures, pipeline):
+    """A second run skips finished files and only embeds half-done ones"""
+    summary = _run(lectures)
+    assert summary["imported"] == 2 and summary["skipped"] == 0
+    assert summary["audio_seconds"] == 3600.0
+    assert summary["throughput"] > 0
+    assert sorted(s for s, _ in pipeline) == ["embed", "embed", "transcribe", "transcribe"]
+
+    record = get_store().read_json("imports", pipeline[0][1])
+    assert record["status"] == "complete" and record["title"] in ("week1", "part1")
+
+    # Simulate an interruption between transcription and embedding
+    video_id = pipeline[0][1]
+    get_store().delete("embeddings", video_id)
+    pipeline.clear()
+
+    summary = _run(lectures)
+    assert summary["skipped"] == 1 and summary["imported"] == 1
+    assert pipeline == [("embed", video_id)]
+
+
+def test_caller_executor_is_left_running(lectures, pipeline):
+    """An executor passed in by the caller is not shut down"""
+    executor = ThreadPoolExecutor(2)
+    import_directory(lectures, executor=executor, progress_stream=io.StringIO())
+    assert executor.submit(lambda: 42).result() == 42
+    executor.shutdown()
+
+
+def test_renamed_copy_is_skipped(lectures, pipeline):
+    """The same recording under another name isn't processed again"""
+    _run(lectures)
+    pipeline.clear()
+    (lectures / "week1-copy.mp4").write_bytes((lectures / "week1.mp4").read_bytes())
+
+    summary = _run(lectures)
+    assert summary["skipped"] == 3 and pipeline == []
+
+
+def test_failures_are_reported(lectures, pipeline):
+    """A file that fails to decode doesn't stop the rest"""
+    (lectures / "broken.wav").write_bytes(b"garbage")
+    summary = _run(lectures)
+    assert summary["imported"] == 2
+    assert [f["stage"] for f in summary["failed"]] == ["transcribe"]
+
+
+def test_cli_rejects_missing_directory(tmp_path, capsys):
+    """import-dir exits non-zero for a path that isn't a directory"""
+    assert main(["import-dir", str(tmp_path / "missing")]) == 1
+    assert "Not a directory" in capsys.readouterr().out
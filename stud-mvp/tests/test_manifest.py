@@ -0,0 +1,123 @@
+"""
+Unit tests for the per-playlist pipeline manifest and incremental refresh
+"""
+import json
+import pytest
+from app.core.config import settings
+from app.services import manifest
+from app.services.manifest import PlaylistManifest, plan_refresh, refresh_playlist
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    for folder in ("playlists", "transcripts", "embeddings", "quizzes"):
+        (tmp_path / folder).mkdir()
+    return tmp_path
+
+
+def _write_playlist(storage, video_ids):
+    videos = [{"video_id": v, "title": v, "duration_seconds": 600} for v in video_ids]
+    (storage / "playlists" / "PL1.json").write_text(json.dumps({"playlist_id": "PL1", "videos": videos}))
+
+
+@pytest.fixture
+def runs(storage, monkeypatch):
+    """Fake stage runners that write deterministic outputs and log each run"""
+    calls = []
+
+    def runner(stage):
+        async def run(video_id):
+            calls.append((stage, video_id))
+            if stage == "transcribe":
+                data = {"video_id": video_id, "transcript": [{"text": f"{video_id} words", "start": 0.0, "end": 5.0}]}
+                (storage / "transcripts" / f"{video_id}.json").write_text(json.dumps(data))
+            elif stage == "embed":
+                chunks = [{"video_id": video_id, "chunk_index": 0, "text": f"{video_id} words",
+                           "start": 0.0, "end": 5.0, "embedding": [0.1, 0.2]}]
+                (storage / "embeddings" / f"{video_id}.json").write_text(json.dumps(chunks))
+            else:
+                (storage / "quizzes" / f"{video_id}.json").write_text(json.dumps({"video_id": video_id}))
+        return run
+
+    monkeypatch.setattr(manifest, "_stage_runner", runner)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_processes_new_videos(storage, runs):
+    """A second refresh after the playlist gains a video only touches that video"""
+    _write_playlist(storage, ["vid1", "vid2"])
+    await refresh_playlist("PL1")
+    assert len(runs) == 6
+
+    _write_playlist(storage, ["vid1", "vid2", "vid3"])
+    plan = plan_refresh("PL1")
+    assert {(w["video_id"], w["stage"]) for w in plan["work"]} == {
+        ("vid3", "transcribe"), ("vid3", "embed"), ("vid3", "quiz")
+    }
+    assert plan["stages_up_to_date"] == 6
+
+    runs.clear()
+    result = await refresh_playlist("PL1")
+    assert runs == [("transcribe", "vid3"), ("embed", "vid3"), ("quiz", "vid3")]
+    assert result["skipped"] == 6
+
+
+@pytest.mark.asyncio
+async def test_config_change_reruns_affected_stages(storage, runs, monkeypatch):
+    """Changing the embedding model re-embeds, but identical chunks don't regenerate quizzes"""
+    _write_playlist(storage, ["vid1"])
+    await refresh_playlist("PL1")
+
+    monkeypatch.setattr(settings, "embedding_model", "text-embedding-3-large")
+    plan = plan_refresh("PL1")
+    assert plan["work"][0]["stage"] == "embed"
+    assert plan["work"][0]["reason"] == "config changed: embedding_model"
+    assert plan["estimated_cost_usd"] > 0
+
+    runs.clear()
+    await refresh_playlist("PL1")
+    assert runs == [("embed", "vid1")]
+    assert plan_refresh("PL1")["stages_to_run"] == 0
+
+
+@pytest.mark.asyncio
+async def test_edited_transcript_is_kept_and_propagated(storage, runs):
+    """A corrected transcript is not re-transcribed, but everything built from it is stale"""
+    _write_playlist(storage, ["vid1"])
+    await refresh_playlist("PL1")
+
+    transcript = storage / "transcripts" / "vid1.json"
+    data = json.loads(transcript.read_text())
+    data["transcript"][0]["text"] = "corrected words"
+    transcript.write_text(json.dumps(data))
+
+    plan = plan_refresh("PL1")
+    assert [(w["stage"], w["reason"]) for w in plan["work"]] == [
+        ("embed", "input changed"),
+        ("quiz", "upstream stage re-runs"),
+    ]
+
+    assert PlaylistManifest.load("PL1").videos["vid1"]["transcribe"]["config"] == {
+        "whisper_model": settings.whisper_model
+    }
+
+
+@pytest.mark.asyncio
+async def test_existing_outputs_are_adopted(storage, runs):
+    """Videos processed before manifests existed are adopted instead of recomputed"""
+    _write_playlist(storage, ["vid1", "vid2"])
+    await refresh_playlist("PL1")
+    (storage / "manifests" / "PL1.ref").unlink()
+    (storage / "quizzes" / "vid2.json").unlink()
+
+    plan = plan_refresh("PL1")
+    assert plan["stages_adopted"] == 5
+    assert [(w["video_id"], w["stage"]) for w in plan["work"]] == [("vid2", "quiz")]
+
+    runs.clear()
+    result = await refresh_playlist("PL1")
+    assert runs == [("quiz", "vid2")]
+    assert result["adopted"] == 5
+    assert plan_refresh("PL1")["stages_to_run"] == 0
@@ -0,0 +1,108 @@
+"""
+Unit tests for metrics registry and stage timers
+"""
+import asyncio
+import logging
+import time
+import pytest
+from app.core.metrics import (
+    MetricsRegistry,
+    RequestIdFilter,
+    STAGE_ERRORS,
+    STAGE_SECONDS,
+    request_id_var,
+    stage_timeline,
+    timed_stage,
+)
+
+
+def test_counter_and_histogram_render():
+    """Test Prometheus text rendering of counters and histograms"""
+    registry = MetricsRegistry()
+    counter = registry.counter("test_tokens_total", "Tokens")
+    histogram = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    
+    counter.inc(5, direction="in")
+    counter.inc(2, direction="in")
+    histogram.observe(0.05, stage="search")
+    histogram.observe(0.5, stage="search")
+    
+    text = registry.render()
+    
+    assert "# TYPE test_tokens_total counter" in text
+    assert 'test_tokens_total{direction="in"} 7.0' in text
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{stage="search",le="0.1"} 1.0' in text
+    assert 'test_latency_seconds_bucket{stage="search",le="1.0"} 2.0' in text
+    assert 'test_latency_seconds_bucket{stage="search",le="+Inf"} 2.0' in text
+    assert 'test_latency_seconds_count{stage="search"} 2.0' in text
+
+
+def test_label_values_escaped():
+    """Test that quotes in label values do not break the exposition format"""
+    registry = MetricsRegistry()
+    counter = registry.counter("test_escape_total", "Escape")
+    counter.inc(route='/a"b')
+    
+    assert 'test_escape_total{route="/a\\"b"} 1.0' in registry.render()
+
+
+def test_timed_stage_records_duration():
+    """Test that timed_stage observes one sample and reports seconds"""
+    before = STAGE_SECONDS.count(stage="unit_test_stage")
+    
+    with timed_stage("unit_test_stage") as timing:
+        pass
+    
+    assert STAGE_SECONDS.count(stage="unit_test_stage") == before + 1
+    assert timing["seconds"] >= 0.0
+
+
+def test_timed_stage_counts_errors():
+    """Test that exceptions are counted and re-raised"""
+    before = STAGE_ERRORS.value(stage="unit_test_failure")
+    
+    with pytest.raises(RuntimeError):
+        with timed_stage("unit_test_failure"):
+            raise RuntimeError("boom")
+    
+    assert STAGE_ERRORS.value(stage="unit_test_failure") == before + 1
+    assert STAGE_SECONDS.count(stage="unit_test_failure") >= 1
+
+
+@pytest.mark.asyncio
+async def test_stage_timeline_collects_concurrent_stages():
+    """Stages in gathered tasks and worker threads land on the request's timeline"""
+    async def embed():
+        with timed_stage("unit_test_embed"):
+            await asyncio.sleep(0.05)
+    
+    def read_history():
+        with timed_stage("unit_test_history"):
+            time.sleep(0.05)
+    
+    with stage_timeline() as timeline:
+        await asyncio.gather(embed(), asyncio.to_thread(read_history))
+    
+    with timed_stage("unit_test_outside"):
+        pass
+    
+    stages = {e["stage"]: e for e in timeline}
+    assert set(stages) == {"unit_test_embed", "unit_test_history"}
+    embed_entry, history_entry = stages["unit_test_embed"], stages["unit_test_history"]
+    assert embed_entry["ms"] >= 45 and history_entry["ms"] >= 45
+    # Overlapping, not back to back
+    assert history_entry["start_ms"] < embed_entry["start_ms"] + embed_entry["ms"]
+    assert embed_entry["start_ms"] < history_entry["start_ms"] + history_entry["ms"]
+
+
+def test_request_id_filter():
+    """Test that log records carry the current request ID"""
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None)
+    token = request_id_var.set("req-123")
+    try:
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    
+    assert record.request_id == "req-123"
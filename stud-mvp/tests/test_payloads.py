@@ -0,0 +1,34 @@
+"""
+Tests for response payload projection
+"""
+from app.api.embeddings import project_chunks
+
+
+def _chunks():
+    return [
+        {"video_id": "v1", "chunk_index": i, "text": f"chunk {i}", "start": i * 10.0,
+         "end": i * 10.0 + 10.0, "tokens": 5, "embedding": [0.1] * 8}
+        for i in range(3)
+    ]
+
+
+def test_embeddings_excluded_by_default():
+    """Embeddings are dropped unless requested"""
+    projected = project_chunks(_chunks())
+    assert all("embedding" not in c for c in projected)
+    assert projected[0]["text"] == "chunk 0"
+
+
+def test_include_embeddings():
+    """include_embeddings returns the full chunks"""
+    projected = project_chunks(_chunks(), include_embeddings=True)
+    assert projected[0]["embedding"] == [0.1] * 8
+
+
+def test_fields_projection():
+    """Only the requested fields are returned; unknown fields are ignored"""
+    projected = project_chunks(_chunks(), fields="chunk_index, start,missing")
+    assert projected == [{"chunk_index": i, "start": i * 10.0} for i in range(3)]
+
+    with_embedding = project_chunks(_chunks(), fields="chunk_index", include_embeddings=True)
+    assert set(with_embedding[0]) == {"chunk_index", "embedding"}
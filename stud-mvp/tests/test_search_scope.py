@@ -0,0 +1,86 @@
+"""
+Unit tests for playlist-scoped search and filter pushdown
+"""
+import pytest
+from app.core.config import settings
+from app.core.storage import get_store
+from app.services.search_scope import SearchScope, in_time_range, playlist_video_ids, resolve_scope
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    store = get_store()
+    store.write_json("playlists", "PL_math", {"playlist_id": "PL_math", "videos": [{"video_id": "m1"}, {"video_id": "m2"}]})
+    store.write_json("playlists", "PL_art", {"playlist_id": "PL_art", "videos": [{"video_id": "a1"}]})
+    for video_id in ("m1", "m2", "a1"):
+        store.write_json("embeddings", video_id, [
+            {"video_id": video_id, "chunk_index": i, "start": i * 30.0, "end": i * 30.0 + 30.0,
+             "text": f"{video_id} chunk {i}", "embedding": [1.0, float(i)]}
+            for i in range(4)
+        ])
+    return store
+
+
+def test_resolve_scope_defaults_to_everything():
+    """No filters searches every video"""
+    assert resolve_scope() == SearchScope(None, None)
+
+
+def test_playlist_scope(storage):
+    """A playlist expands to its videos, and other filters narrow it"""
+    assert resolve_scope(playlist_id="PL_math").video_ids == ["m1", "m2"]
+    assert resolve_scope(video_ids=["m2", "a1"], playlist_id="PL_math").video_ids == ["m2"]
+    assert resolve_scope(video_id="a1", playlist_id="PL_math").video_ids == []
+
+    with pytest.raises(ValueError, match="Playlist not found"):
+        resolve_scope(playlist_id="PL_missing")
+
+
+def test_playlist_partitions_follow_updates(storage):
+    """A re-ingested playlist is picked up without a restart"""
+    assert playlist_video_ids("PL_art") == ["a1"]
+    storage.write_json("playlists", "PL_art", {"playlist_id": "PL_art", "videos": [{"video_id": "a1"}, {"video_id": "a2"}]})
+    assert playlist_video_ids("PL_art") == ["a1", "a2"]
+
+
+def test_time_range_needs_one_video(storage):
+    """A time window only makes sense within a single video"""
+    assert resolve_scope(video_id="m1", start=30.0, end=60.0).time_range == (30.0, 60.0)
+    assert resolve_scope(video_id="m1", start=30.0).time_range == (30.0, float("inf"))
+
+    with pytest.raises(ValueError):
+        resolve_scope(playlist_id="PL_math", start=0.0, end=10.0)
+    with pytest.raises(ValueError):
+        resolve_scope(video_id="m1", start=60.0, end=30.0)
+
+
+def test_in_time_range():
+    """Chunks overlapping the window are kept"""
+    chunk = {"start": 30.0, "end": 60.0}
+    assert in_time_range(chunk, None)
+    assert in_time_range(chunk, (50.0, 70.0))
+    assert not in_time_range(chunk, (60.0, 90.0))
+
+
+def test_tutor_only_loads_scoped_partitions(storage, monkeypatch):
+    """The tutor's index warm-up reads only the playlist's embeddings"""
+    from app.services.ai_tutor import AITutorService
+
+    try:
+        tutor = AITutorService()
+    except ValueError:
+        pytest.skip("OpenAI API key not available")
+    monkeypatch.setattr(settings, "vector_compression", "none")
+    monkeypatch.setattr(settings, "shared_index_enabled", False)
+
+    reads = []
+    original = type(storage).read_json
+    monkeypatch.setattr(type(storage), "read_json", lambda self, kind, key: reads.append((kind, key)) or original(self, kind, key))
+
+    chunks = tutor._warm_index(resolve_scope(playlist_id="PL_math"))
+    assert {c["video_id"] for c in chunks} == {"m1", "m2"}
+    assert sorted(key for kind, key in reads if kind == "embeddings") == ["m1", "m2"]
+
+    results = tutor._search_chunks([1.0, 0.0], resolve_scope(video_id="m1", start=40.0, end=70.0), top_k=5)
+    assert [r["chunk_index"] for r in results] == [1, 2]
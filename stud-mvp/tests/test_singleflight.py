@@ -0,0 +1,96 @@
+"""
+Unit tests for single-flight de-duplication of pipeline jobs
+"""
+import asyncio
+import pytest
+from app.core.singleflight import FileLock, SingleFlight, job_key
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_execute_once():
+    """20 concurrent requests for one video run the job exactly once"""
+    flight = SingleFlight()
+    executions = 0
+    
+    async def transcribe(video_id):
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return {"video_id": video_id, "chunks": 42}
+    
+    key = job_key("transcribe", "vid123", {"whisper_model": "base"})
+    results = await asyncio.gather(*[
+        flight.do(key, transcribe, "vid123") for _ in range(20)
+    ])
+    
+    assert executions == 1
+    assert all(r is results[0] for r in results)
+    assert not flight.in_flight(key)
+
+
+@pytest.mark.asyncio
+async def test_different_params_run_separately():
+    """Jobs with different params are not merged"""
+    flight = SingleFlight()
+    executions = []
+    
+    async def transcribe(model):
+        executions.append(model)
+        await asyncio.sleep(0.01)
+        return model
+    
+    await asyncio.gather(
+        flight.do(job_key("transcribe", "vid123", {"whisper_model": "base"}), transcribe, "base"),
+        flight.do(job_key("transcribe", "vid123", {"whisper_model": "small"}), transcribe, "small"),
+    )
+    
+    assert sorted(executions) == ["base", "small"]
+
+
+@pytest.mark.asyncio
+async def test_failure_shared_and_not_cached():
+    """All attached callers see the failure; the next call retries"""
+    flight = SingleFlight()
+    executions = 0
+    
+    async def flaky():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("yt-dlp failed")
+    
+    key = job_key("transcribe", "vid123")
+    results = await asyncio.gather(*[flight.do(key, flaky) for _ in range(20)], return_exceptions=True)
+    
+    assert executions == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    
+    with pytest.raises(RuntimeError):
+        await flight.do(key, flaky)
+    assert executions == 2
+
+
+@pytest.mark.asyncio
+async def test_file_lock_across_workers(tmp_path):
+    """Two workers sharing a lock directory: the second reuses the first's output"""
+    outputs = {}
+    executions = 0
+    
+    async def embed(video_id):
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        outputs[video_id] = ["chunk"]
+        return outputs[video_id]
+    
+    worker_a = SingleFlight(FileLock(tmp_path))
+    worker_b = SingleFlight(FileLock(tmp_path))
+    key = job_key("embed", "vid123")
+    
+    results = await asyncio.gather(*[
+        worker.do(key, embed, "vid123", done_check=lambda: outputs.get("vid123"))
+        for worker in [worker_a, worker_b] * 10
+    ])
+    
+    assert executions == 1
+    assert all(r == ["chunk"] for r in results)
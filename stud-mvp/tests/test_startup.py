@@ -0,0 +1,72 @@
+"""
+Startup-time budget for the FastAPI app
+Imports main in a fresh interpreter with -X importtime and checks that heavy
+dependencies stay lazy and the total import time stays within budget
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Cumulative import time budget for `import main` (override on slow CI runners)
+IMPORT_BUDGET_MS = int(os.getenv("STUD_IMPORT_BUDGET_MS", "1500"))
+
+HEAVY_MODULES = ("whisper", "torch", "tiktoken", "openai")
+
+
+def _import_main(role: str):
+    """Import main with -X importtime; returns (cumulative_ms, heavy modules loaded)"""
+    probe = (
+        "import sys, main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "APP_ROLE": role},
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith("| main"):
+            cumulative_us = int(line.split("|")[1])
+    
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, loaded
+
+
+@pytest.mark.parametrize("role", ["all", "api"])
+def test_heavy_dependencies_not_imported_at_startup(role):
+    """whisper/torch, tiktoken and openai must be imported on first use only"""
+    _, loaded = _import_main(role)
+    assert loaded == []
+
+
+def test_api_role_skips_transcription_code():
+    """API-only workers never import the transcription service"""
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, main; print('app.services.transcription' in sys.modules)"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "APP_ROLE": "api"},
+        timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip() == "False"
+
+
+def test_import_time_budget():
+    """`python -X importtime -c 'import main'` stays within IMPORT_BUDGET_MS"""
+    cumulative_ms, _ = _import_main("all")
+    assert 0 < cumulative_ms <= IMPORT_BUDGET_MS, (
+        f"import main took {cumulative_ms:.0f} ms (budget {IMPORT_BUDGET_MS} ms)"
+    )
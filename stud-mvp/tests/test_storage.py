@@ -0,0 +1,181 @@
+"""
+Unit tests for the artifact store (local and S3-compatible backends)
+"""
+import io
+import os
+from datetime import datetime, timezone
+import pytest
+from botocore.exceptions import ClientError
+from app.core.config import settings
+from app.core.storage import ArtifactStore, LocalStore, S3Store, get_store
+
+
+class FakeS3Client:
+    """In-memory stand-in for the subset of the S3 API the store uses"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def _missing(self, operation):
+        return ClientError({"Error": {"Code": "404" if operation == "HeadObject" else "NoSuchKey"}}, operation)
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = (bytes(Body), datetime.now(timezone.utc))
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self._missing("GetObject")
+        body, modified = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(body), "LastModified": modified}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self._missing("HeadObject")
+        body, modified = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(body), "LastModified": modified}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + 2]  # Tiny pages to exercise pagination
+        truncated = start + 2 < len(keys)
+        result = {"Contents": [{"Key": k} for k in page], "IsTruncated": truncated}
+        if truncated:
+            result["NextContinuationToken"] = str(start + 2)
+        return result
+
+
+@pytest.fixture(params=["zstd", "gzip", "none"])
+def local_store(tmp_path, request):
+    return LocalStore(tmp_path, codec=request.param)
+
+
+@pytest.fixture
+def s3_store():
+    # Set STUD_TEST_S3_ENDPOINT (and AWS credentials) to run against MinIO instead
+    endpoint = os.getenv("STUD_TEST_S3_ENDPOINT")
+    if endpoint:
+        import boto3
+        client = boto3.client("s3", endpoint_url=endpoint)
+        bucket = os.getenv("STUD_TEST_S3_BUCKET", "stud-test")
+        prefix = f"test-{os.getpid()}-{datetime.now().timestamp()}/"
+        return S3Store(bucket, prefix=prefix, client=client, codec="zstd")
+    return S3Store("stud-test", client=FakeS3Client(), codec="zstd")
+
+
+def _transcript(video_id):
+    return {
+        "video_id": video_id,
+        "transcript": [{"text": f"Segment {i} of {video_id}", "start": i * 5.0, "end": i * 5.0 + 5.0} for i in range(50)]
+    }
+
+
+def _round_trip(store):
+    assert store.read_json("transcripts", "vid1") is None
+    assert not store.exists("transcripts", "vid1")
+
+    info = store.write_json("transcripts", "vid1", _transcript("vid1"))
+    assert store.read_json("transcripts", "vid1") == _transcript("vid1")
+    assert store.exists("transcripts", "vid1")
+    assert info.size > 0 and info.stored_size > 0
+
+    store.write_json("transcripts", "vid2", _transcript("vid2"))
+    store.write_json("transcripts", "vid3", _transcript("vid3"))
+    store.write_json("quizzes", "vid1", {"video_id": "vid1", "questions": []})
+    assert store.keys("transcripts") == ["vid1", "vid2", "vid3"]
+
+    store.delete("transcripts", "vid2")
+    assert store.keys("transcripts") == ["vid1", "vid3"]
+    assert store.read_json("transcripts", "vid2") is None
+
+
+def test_local_round_trip(local_store):
+    """Artifacts round-trip through every codec"""
+    _round_trip(local_store)
+
+
+def test_s3_round_trip(s3_store):
+    """The S3 backend behaves like the local one"""
+    _round_trip(s3_store)
+
+
+def test_compression_reduces_disk_usage(tmp_path):
+    """Compressed blobs are smaller than the JSON they hold"""
+    store = LocalStore(tmp_path, codec="zstd")
+    info = store.write_json("transcripts", "vid1", _transcript("vid1"))
+    assert info.stored_size < info.size / 2
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    """Two keys with the same content share one blob"""
+    store = LocalStore(tmp_path, codec="gzip")
+    first = store.write_json("embeddings", "vid_a", [{"text": "same", "embedding": [0.1, 0.2]}])
+    second = store.write_json("embeddings", "vid_b", [{"text": "same", "embedding": [0.1, 0.2]}])
+
+    assert first.digest == second.digest
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 1
+
+
+def test_writes_are_atomic_and_gc_reclaims(tmp_path):
+    """No temp files are left behind and unreferenced blobs are reclaimed"""
+    store = LocalStore(tmp_path, codec="zstd")
+    store.write_json("conversations", "s1", [{"question": "Q1"}])
+    store.write_json("conversations", "s1", [{"question": "Q1"}, {"question": "Q2"}])
+
+    assert not list(tmp_path.rglob("*.tmp"))
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 2
+    assert store.gc() == 0  # Both blobs are within the grace period
+    assert store.gc(grace_seconds=0) > 0
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 1
+    assert store.read_json("conversations", "s1")[1]["question"] == "Q2"
+
+
+def test_backends_must_implement_primitives():
+    """A backend missing a primitive fails at construction"""
+    class PartialStore(ArtifactStore):
+        def _blob_size(self, name):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_legacy_json_files_are_read_and_migrated(tmp_path):
+    """Plain <kind>/<key>.json files are readable and replaced on the next write"""
+    (tmp_path / "playlists").mkdir()
+    (tmp_path / "playlists" / "PL1.json").write_text('{"playlist_id": "PL1", "videos": []}')
+    store = LocalStore(tmp_path, codec="zstd")
+
+    assert store.keys("playlists") == ["PL1"]
+    assert store.read_json("playlists", "PL1")["playlist_id"] == "PL1"
+    assert store.info("playlists", "PL1").digest
+
+    store.write_json("playlists", "PL1", {"playlist_id": "PL1", "videos": [{"video_id": "v1"}]})
+    assert not (tmp_path / "playlists" / "PL1.json").exists()
+    assert store.read_json("playlists", "PL1")["videos"] == [{"video_id": "v1"}]
+
+
+def test_version_changes_on_write(tmp_path):
+    """Caches keyed on version() notice rewrites"""
+    store = LocalStore(tmp_path)
+    store.write_json("suggestions", "vid1", {"questions": []})
+    before = store.version("suggestions", "vid1")
+    os.utime(store._ref_path("suggestions", "vid1"), (before - 10, before - 10))
+    store.write_json("suggestions", "vid1", {"questions": ["Why?"]})
+    assert store.version("suggestions", "vid1") > before - 10
+
+
+def test_get_store_follows_settings(tmp_path, monkeypatch):
+    """get_store() is rebuilt when storage settings change"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    monkeypatch.setattr(settings, "storage_compression", "gzip")
+    store = get_store()
+    assert isinstance(store, LocalStore) and store.root == tmp_path and store.codec == "gzip"
+    assert get_store() is store
+
+    monkeypatch.setattr(settings, "storage_type", "ftp")
+    with pytest.raises(ValueError):
+        get_store()
@@ -0,0 +1,77 @@
+"""
+Unit tests for precomputed suggested questions
+"""
+import json
+import numpy as np
+from app.core.config import settings
+from app.services.embeddings import get_cached_query_embedding
+from app.services.suggestions import kmeans, load_suggestions, representative_chunks
+
+
+def _clustered_chunks(topics=3, per_topic=6, dims=32, seed=0):
+    """Chunks whose embeddings form well separated topic clusters"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dims)) * 5
+    chunks = []
+    for i in range(topics * per_topic):
+        topic = i // per_topic
+        chunks.append({
+            "video_id": "vid_a",
+            "chunk_index": i,
+            "start": i * 10.0,
+            "end": i * 10.0 + 10,
+            "text": f"topic {topic} part {i}",
+            "embedding": (centers[topic] + rng.normal(size=dims) * 0.1).tolist()
+        })
+    return chunks
+
+
+def test_kmeans_separates_clusters():
+    """Test that k-means recovers well separated clusters"""
+    chunks = _clustered_chunks()
+    vectors = np.asarray([c["embedding"] for c in chunks])
+    
+    labels, centroids = kmeans(vectors, 3)
+    
+    assert centroids.shape == (3, 32)
+    for topic in range(3):
+        assert len(set(labels[topic * 6:(topic + 1) * 6])) == 1
+    assert len(set(labels)) == 3
+
+
+def test_representative_chunks_one_per_topic():
+    """Test one representative per cluster, in video order"""
+    chunks = _clustered_chunks()
+    
+    picked = representative_chunks(chunks, 3)
+    
+    assert len(picked) == 3
+    assert [c["chunk_index"] // 6 for c in picked] == [0, 1, 2]
+    assert [c["chunk_index"] for c in picked] == sorted(c["chunk_index"] for c in picked)
+
+
+def test_representative_chunks_more_clusters_than_chunks():
+    """Test that k is capped by the number of embedded chunks"""
+    chunks = _clustered_chunks(topics=1, per_topic=2)
+    chunks.append({"video_id": "vid_a", "chunk_index": 2, "text": "duplicate", "start": 0, "end": 1})
+    
+    assert len(representative_chunks(chunks, 10)) == 2
+
+
+def test_load_suggestions_warms_query_cache(tmp_path, monkeypatch):
+    """Test that loading stored suggestions pre-warms their embeddings"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    suggestions_dir = tmp_path / "suggestions"
+    suggestions_dir.mkdir()
+    (suggestions_dir / "vid_a.json").write_text(json.dumps({
+        "video_id": "vid_a",
+        "questions": [{"question": "What is a list?", "chunk_index": 0, "start": 0.0, "end": 10.0}],
+        "embedding_model": "text-embedding-3-small",
+        "question_embeddings": [[0.1, 0.2, 0.3]]
+    }))
+    
+    questions = load_suggestions("vid_a")
+    
+    assert questions[0]["question"] == "What is a list?"
+    assert get_cached_query_embedding("text-embedding-3-small", "What is a list?") == [0.1, 0.2, 0.3]
+    assert load_suggestions("missing") is None
@@ -0,0 +1,107 @@
+"""
+Unit tests for compressed vector storage (int8 / PCA / Matryoshka)
+"""
+import json
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services import vector_compression
+from app.services.vector_compression import (
+    CompressedIndex,
+    compression_report,
+    dequantize_int8,
+    parse_mode,
+    quantize_int8,
+    search_compressed,
+)
+
+
+def _sample_vectors(n=300, dims=1536, seed=42):
+    """Clustered unit vectors, similar in spirit to transcript embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dims))
+    vectors = centers[rng.integers(0, 20, size=n)] + 0.5 * rng.normal(size=(n, dims))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_parse_mode():
+    """Test compression mode parsing"""
+    assert parse_mode("int8") == (None, True)
+    assert parse_mode("matryoshka") == ("matryoshka", False)
+    assert parse_mode("pca+int8") == ("pca", True)
+    assert parse_mode("none") == (None, False)
+    
+    with pytest.raises(ValueError):
+        parse_mode("pca+matryoshka")
+
+
+def test_int8_roundtrip_error_small():
+    """Test that int8 quantisation reconstructs vectors closely"""
+    vectors = _sample_vectors(n=50).astype(np.float32)
+    codes, scales = quantize_int8(vectors)
+    
+    assert codes.dtype == np.int8
+    assert scales.shape == (50,)
+    
+    restored = dequantize_int8(codes, scales)
+    assert np.max(np.abs(restored - vectors)) <= scales.max() / 2 + 1e-6
+
+
+def test_compressed_index_memory_savings():
+    """Test that compressed indexes are much smaller than float64 lists"""
+    vectors = _sample_vectors()
+    float64_bytes = vectors.size * 8
+    
+    assert CompressedIndex(vectors, "int8").nbytes < float64_bytes / 7
+    assert CompressedIndex(vectors, "matryoshka+int8", dims=256).dims == 256
+    assert CompressedIndex(vectors, "matryoshka+int8", dims=256).nbytes < float64_bytes / 40
+
+
+@pytest.mark.parametrize("mode", ["int8", "matryoshka+int8", "pca+int8"])
+def test_recall_with_rescoring(mode):
+    """Test that rescoring recovers near-exact recall"""
+    report = compression_report(_sample_vectors(), mode, dims=256, top_k=5, max_queries=50)
+    
+    assert report["recall@5_rescored"] >= 0.9
+    assert report["recall@5_rescored"] >= report["recall@5"]
+    assert report["memory_ratio"] > 1
+
+
+def test_search_compressed_end_to_end(tmp_path, monkeypatch):
+    """Test two-stage search against files in storage"""
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    monkeypatch.setattr(settings, "vector_compression", "int8")
+    vector_compression._index_cache.clear()
+    
+    vectors = _sample_vectors(n=40)
+    embeddings_dir = tmp_path / "embeddings"
+    embeddings_dir.mkdir()
+    for video_id, rows in (("vid_a", vectors[:20]), ("vid_b", vectors[20:])):
+        chunks = [
+            {
+                "video_id": video_id,
+                "chunk_index": i,
+                "start": float(i),
+                "end": float(i + 1),
+                "text": f"{video_id} chunk {i}",
+                "tokens": 3,
+                "embedding": row.tolist()
+            }
+            for i, row in enumerate(rows)
+        ]
+        (embeddings_dir / f"{video_id}.json").write_text(json.dumps(chunks))
+    
+    results = search_compressed(vectors[25].tolist(), top_k=3)
+    
+    assert results[0]["video_id"] == "vid_b"
+    assert results[0]["chunk_index"] == 5
+    assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-4)
+    assert "embedding" not in results[0]
+    assert (embeddings_dir / "vid_b.f32.npy").exists()
+    
+    # Scoped search only touches the requested video
+    scoped = search_compressed(vectors[25].tolist(), video_ids=["vid_a"], top_k=3)
+    assert all(r["video_id"] == "vid_a" for r in scoped)
+    
+    windowed = search_compressed(vectors[5].tolist(), video_ids=["vid_b"], top_k=5, time_range=(10.0, 12.0))
+    assert sorted(r["chunk_index"] for r in windowed) == [10, 11]
@@ -0,0 +1,77 @@
+"""
+Unit tests for word-timestamp chunking
+"""
+from types import SimpleNamespace
+import pytest
+from app.services.embeddings import ChunkingService
+from app.services.transcription import TranscriptionService
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    """One token per whitespace-separated word, so budgets are easy to reason about"""
+    monkeypatch.setattr(ChunkingService, "encoding", property(lambda self: SimpleNamespace(encode=str.split)))
+
+
+def _whisper_result():
+    sentences = [
+        ["Today", "we", "cover", "gradient", "descent."],
+        ["It", "minimises", "a", "loss."],
+        ["Step", "size", "matters", "a", "lot."],
+    ]
+    segments, t = [], 0.0
+    for sentence in sentences:
+        words = []
+        for word in sentence:
+            words.append({"word": " " + word, "start": t, "end": t + 0.4, "probability": 0.9})
+            t += 0.5
+        segments.append({"start": words[0]["start"], "end": words[-1]["end"],
+                         "text": "".join(w["word"] for w in words), "words": words})
+    return {"segments": segments}
+
+
+def test_extract_word_timings():
+    """Word timings are stored as parallel arrays with token offsets"""
+    timings = TranscriptionService().extract_word_timings(_whisper_result(), "vid1")
+
+    assert len(timings["words"]) == len(timings["start"]) == len(timings["end"]) == 14
+    assert timings["token_offsets"] == list(range(15))
+    assert timings["start"][5] == 2.5 and timings["end"][13] == pytest.approx(6.9)
+
+
+def test_extract_word_timings_without_words():
+    """Segment-only Whisper output has no word timings"""
+    result = {"segments": [{"start": 0.0, "end": 5.0, "text": "Hello"}]}
+    assert TranscriptionService().extract_word_timings(result, "vid1") is None
+
+
+def test_chunk_words_respects_budget_and_timestamps():
+    """Chunks stay within the token budget and use exact word times"""
+    timings = TranscriptionService().extract_word_timings(_whisper_result(), "vid1")
+    chunks = ChunkingService(max_tokens=6).chunk_words(timings)
+
+    assert all(c["tokens"] <= 6 for c in chunks)
+    assert " ".join(c["text"] for c in chunks).split() == [w.strip() for w in timings["words"]]
+    assert chunks[0]["start"] == 0.0
+    for chunk in chunks:
+        first = timings["words"].index(" " + chunk["text"].split()[0])
+        assert chunk["start"] == timings["start"][first]
+    assert chunks[-1]["end"] == timings["end"][-1]
+    assert [c["chunk_index"] for c in chunks] == list(range(len(chunks)))
+
+
+def test_chunk_words_prefers_sentence_ends():
+    """A cut near the budget moves back to the end of a sentence"""
+    timings = TranscriptionService().extract_word_timings(_whisper_result(), "vid1")
+    chunks = ChunkingService(max_tokens=6).chunk_words(timings)
+
+    # 6 tokens would end mid-sentence ("... descent. It"); the cut lands after "descent."
+    assert chunks[0]["text"] == "Today we cover gradient descent."
+    assert chunks[0]["end"] == pytest.approx(2.4)
+
+
+def test_chunk_words_single_long_word():
+    """A word longer than the budget still forms its own chunk"""
+    timings = {"video_id": "vid1", "words": [" a b c", " d"], "start": [0.0, 1.0], "end": [1.0, 2.0]}
+    chunks = ChunkingService(max_tokens=2).chunk_words(timings)
+    assert [c["text"] for c in chunks] == ["a b c", "d"]